@@ -1,124 +1,86 @@
 """Raw script of the game."""
 
-import random as rdm
-from dataclasses import dataclass
-
-from utils.data.base import Settings
 from utils.data.settings import check_settings, GameLanguage, NPlayers, NBots
-from utils.player import Player
-from utils.card import Card
-from utils.card_piles import (
-    MajorCardsDrawPile, MinorCardsDrawPile,
-    MinorCardsDiscardPile, ActionCardsDiscardPile
-)
+from utils.engine import Game, GameResult
+from utils.policies import PassivePolicy, GreedyPolicy
+from utils.movegen import MoveGenerator
+from utils.io_adapters import IOAdapter, ConsoleAdapter, human_turn
+from utils.replay import ReplayWriter, ReplayRecorder
 
 
-def _interactive_init() -> tuple[str, int, int]:
+def _interactive_init(io: IOAdapter) -> tuple[str, int, int]:
     """Setup game settings in interactive way."""
-    language = input(
+    language = io.asks(
         "Which language do you want to play with?\n"
-        f"Currently supported languages: {', '.join(GameLanguage.values())}.\n"
+        f"Currently supported languages: {', '.join(GameLanguage.values())}."
     )
-    n_players = int(input("How many people are playing (6 max)?\n"))
+    n_players = int(io.asks("How many people are playing (6 max)?"))
     assert n_players <= 6, "Too many players."
     if n_players < 6:
-        n_bots = int(input(f"How many bots to add (6 - {n_players} = {6 - n_players} max)?\n"))
+        n_bots = int(io.asks(f"How many bots to add (6 - {n_players} = {6 - n_players} max)?"))
         assert n_players + n_bots <= 6, "Too many bots."
     else:
         n_bots = 0
 
     check_settings(GameLanguage, language)
     check_settings(NPlayers, n_players)
-    check_settings(NBots, n_bots)
+    if n_bots:
+        check_settings(NBots, n_bots)
 
     return language, n_players, n_bots
 
 
-def play_game(language: str, n_players: int, n_bots: int) -> None:
-    """Main script of the game."""
+def play_game(
+    language: str,
+    n_players: int,
+    n_bots: int,
+    io: IOAdapter | None = None,
+    seed: int | None = None,
+    replays: ReplayWriter | None = None
+) -> GameResult:
+    """
+    Main script of the game. Human players share the adapter `io` (console by
+    default), bots are greedy. The game is recorded to `replays`, if given.
+    """
+    io = io if io is not None else ConsoleAdapter()
+    recorder = replays.recorder() if replays is not None else ReplayRecorder(keyframe_interval=0)
     # 1) Game initialization
-    players: list[Player] = []
-    for idx in range(1, n_players + 1):
-        name = input(f"Enter name for player {idx}:")
-        players.append(Player(name, language))
-
-    print("Loading...")
-    # 1.1) Generate a full, randomly shuffled card pile for minor cards.
-    minor_draw_pile = MinorCardsDrawPile(language)
-    minor_discard = MinorCardsDiscardPile(language)
-    # 1.2) Generate a full, randomly shuffled card pile for major cards.
-    major_draw_pile = MajorCardsDrawPile(language)
-    action_discard = ActionCardsDiscardPile(language)
-    # 1.3) Distribute 5 minor cards to each player.
-    init_hands = minor_draw_pile.distribute(n_players, 5)
-    # 1.4) Distribute 1 major card to each player.
-    init_majors = major_draw_pile.distribute(n_players, 1)
+    names = [io.asks(f"Enter name for player {idx}:") for idx in range(1, n_players + 1)]
+    names += [f"Bot {idx}" for idx in range(1, n_bots + 1)]
+    policies = [PassivePolicy()] * n_players + [
+        recorder.records(GreedyPolicy()) for _ in range(n_bots)
+    ]
 
-    for idx, player in enumerate(players):
-        player.adds_to_hand(init_hands[idx])
-        player.adds_to_major_pile(init_majors[idx])
+    if io.renders:
+        io.shows("Loading...")
+    game = Game(language, policies, names=names, seed=seed)
+    generator = MoveGenerator()
 
-    print("Game starts !")
-    # 2) Game start, phase 1
-    active_player_idx = 0
-    # 2.6) If all minor cards have been drawn, pass to phase 2, else pass to next player in phase 1
-    while len(minor_draw_pile) > 0:
-        active_player = players[active_player_idx]
-        print(f"It is {active_player.name}'s turn.")
-        # 2.1) Turn step 1: Activation of revealed Permanent cards.
-        if active_player.has_active_permanents():
-            for active_perm in active_player.active_permanents:
-                yes_no = input(f"{active_player.name}, do you want to activate {active_perm}? [Y/N]")
-                if yes_no.lower() in {"y", "yes"}:
-                    active_player.activates_permanent_card(active_perm)
-        # 2.2) Turn step 2: Draw a minor card, except if an activated Permanent card said otherwise.
-        draw_effects = tuple() # TODO: import from effects module.
-        if any(draw_effect in active_player.active_effects for draw_effect in draw_effects):
-            raise NotImplementedError
+    if io.renders:
+        io.shows("Game starts !")
+    # 2) Phase 1, then 3) phase 2 once the minor cards draw pile is empty: see `Game.play_turn`.
+    while not game.is_over():
+        recorder.starts_turn(game)
+        if io.renders:
+            io.shows(f"It is {game.active_player.name}'s turn.")
+        if game.active_player_idx < n_players:
+            human_turn(game, io, generator, record=recorder.codes)
         else:
-            active_player.draws_from(minor_draw_pile)
-        # 2.3) Turn step 3: Reveal a new major card if wanted.
-        if active_player.has_unused_majors():
-            yes_no = input(f"{active_player.name}, do you want to reveal a major card? [Y/N]")
-            if yes_no.lower() in {"y", "yes"}:
-                player_majors = "\n".join(
-                    [
-                        f"{idx} - {card}" for idx, card
-                        in enumerate(active_player.major_pile, start=1)
-                    ]
-                )
-                card_idx = int(input(
-                    "Which card do you want to play?\n"
-                    f"{player_majors}"
-                ))
-                major_card = active_player.major_pile[card_idx - 1]
-                active_player.reveals_major_card(major_card)
-        # 2.4) Turn step 4: Create a new combination or complete an existing one, if possible and wanted.
-        yes_no = input(
-            f"{active_player.name}, do you want to play a new combination "
-            "or complete an existing one? [Y/N]"
-        )
-        if yes_no.lower() in {"y", "yes"}:
-            raise NotImplementedError
-        # NOTE: authorized combinations: pair, three/four of a kind, suite of 3+ cards.
-        # 2.5) Turn step 5: If a combination has been created or completed, draw a major card.
-        if active_player.has_played_combination():
-            active_player.draws_from(major_draw_pile)
-        
-        active_player.ends_turn()
-        active_player_idx += 1
-        active_player_idx %= len(players)
+            game.play_turn()
 
-    # 3) Phase 2
-    # 3.0) From now on, any player not having any card left in hand is out of game and doesn't play anymore.
-    # No risk of getting Death card anymore, but cannot use any reserved major card, counter attacks, or earn any more points.
-    # 3.1) Turn step 1: Activation of revealed Permanent cards (possible alternative drawing effect).
-    # 3.2) Turn step 2: Draw a random card in a player hand, except if an activated Permanent card said otherwise.
-    # 3.3) Turn step 3: Reveal a new major card if wanted.
-    # 3.4) Turn step 4: Create a new combination or complete an existing one, if possible and wanted.
-    # 3.5) Turn step 5: If major cards are not depleted yet, and a combination was created or completed, draw a major card.
+    result = game.result()
+    if replays is not None:
+        replays.writes(recorder.replay(game, humans=(1 << n_players) - 1))
+    if io.renders:
+        scores = ", ".join(
+            f"{player.name}: {score}" for player, score in zip(game.players, result.scores)
+        )
+        winners = " and ".join(game.players[idx].name for idx in result.winners)
+        io.shows(f"Game over. Scores: {scores}. {winners} won!")
+    return result
 
 
 if __name__ == "__main__":
-    settings = _interactive_init()
-    play_game(*settings)
+    console = ConsoleAdapter()
+    settings = _interactive_init(console)
+    play_game(*settings, io=console)
@@ -0,0 +1,46 @@
+"""
+Sets of cards as bitmasks of card IDs.
+
+With 78 cards, any set of cards fits in one Python int whose bit `card_id` is set
+when the card is in the set. Membership checks, counts (popcount) and set
+operations between zones are then single integer operations: legality checks,
+move generation and determinizations work on such masks.
+"""
+
+import typing as tp
+
+try:
+    from .card import Card
+    from .data.cards_table import N_CARDS, N_MAJORS, DEATH_ID
+except ImportError:
+    from card import Card
+    from data.cards_table import N_CARDS, N_MAJORS, DEATH_ID
+
+
+FULL_MASK = (1 << N_CARDS) - 1
+"""Mask of all the cards of the game."""
+
+MAJORS_MASK = (1 << N_MAJORS) - 1
+"""Mask of all the major cards."""
+
+MINORS_MASK = FULL_MASK & ~MAJORS_MASK
+"""Mask of all the minor cards."""
+
+DEATH_BIT = 1 << DEATH_ID
+"""Mask of the Death (XIII) card."""
+
+
+def mask_of(cards: tp.Iterable[Card]) -> int:
+    """Mask of given cards."""
+    mask = 0
+    for card in cards:
+        mask |= 1 << card.card_id
+    return mask
+
+
+def ids_of(mask: int) -> tp.Iterator[int]:
+    """IDs of the cards of a mask, in increasing order."""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
@@ -0,0 +1,285 @@
+"""
+Bounded pool of workers thinking for bots, so that long searches never block
+the event loop serving the human players.
+
+A bot turn is handed to a worker as a `BotRequest`: the compact snapshot of
+the game with the state of its random generator (see `Game.snapshot`), which
+also holds what the bot knows of the hidden cards. The worker plays the turn on its own copy of
+the game and sends back the decisions taken, which are then replayed on the
+real game with a `ScriptedPolicy`. As the random generator is part of the
+snapshot, the replay draws the same cards as the worker did.
+
+Each turn has a deadline: search policies are asked to answer with their best
+decision so far when it hits (see `Policy.stops_at`), and a turn still not
+decided shortly after it is cancelled and played by a fast fallback policy.
+"""
+
+import asyncio
+import math
+import threading
+import time
+import typing as tp
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+try:
+    from .data.base import check_num_value
+    from .determinization import Knowledge
+    from .engine import Game
+    from .policies import Policy, PassivePolicy, GreedyPolicy, ScriptedPolicy, Decision
+except ImportError:
+    from data.base import check_num_value
+    from determinization import Knowledge
+    from engine import Game
+    from policies import Policy, PassivePolicy, GreedyPolicy, ScriptedPolicy, Decision
+
+
+DEFAULT_DEADLINE = 1.
+"""Default wall-clock time a bot has to decide its turn, in seconds."""
+
+DEFAULT_GRACE = 0.25
+"""Time a worker is given past the deadline before its turn is played by the fallback."""
+
+_local = threading.local()
+
+
+@dataclass(frozen=True, slots=True)
+class BotRequest:
+    """
+    Everything a worker needs to play the turn of a bot.
+
+    Attributes
+    ----------
+
+    language: str
+        Language setting of the game.
+
+    max_turns: int
+        Turn limit of the game.
+
+    seed: int
+        Seed of the game.
+
+    snapshot: bytes
+        Snapshot of the game, random generator included.
+
+    decisions: tuple[Decision, ...]
+        Decisions log of the game, along which search policies reuse their tree.
+    """
+    language: str
+    max_turns: int
+    seed: int
+    snapshot: bytes
+    decisions: tuple[Decision, ...]
+
+    @classmethod
+    def from_game(cls, game: Game) -> tp.Self:
+        """Request to play the turn of the active player of `game`."""
+        return cls(
+            game.language, game.max_turns, game.seed, game.snapshot(include_rng=True),
+            tuple(game.decisions)
+        )
+
+    @property
+    def n_players(self) -> int:
+        """Number of players of the game."""
+        return self.snapshot[1]
+
+    def game(self) -> Game:
+        """
+        Game in the state of the request, reusing one game per thread and
+        number of players. Only the bot keeps what it knows of the hidden cards.
+        """
+        copies = _local.__dict__.setdefault("copies", {})
+        key = (self.language, self.n_players, self.max_turns)
+        if key not in copies:
+            copies[key] = Game(
+                self.language, [PassivePolicy()] * self.n_players,
+                max_turns=self.max_turns, seed=0
+            )
+        game = copies[key]
+        game.restore(self.snapshot)
+        game.seed = self.seed
+        game.decisions[:] = self.decisions
+        game.moves.clear()
+        for player in game.players:
+            if player is not game.active_player:
+                player.knowledge = Knowledge()
+        return game
+
+
+def thinks(
+    request: BotRequest,
+    policy: Policy,
+    deadline: float = math.inf,
+    stop: threading.Event | None = None
+) -> tuple[Decision, ...]:
+    """
+    Play the turn of a bot in a worker.
+
+    Parameters
+    ----------
+
+    request: BotRequest
+        Turn to play.
+
+    policy: Policy
+        Policy of the bot.
+
+    deadline: float
+        Time (`time.perf_counter` time) by which the bot has decided. Defaults
+        to no limit.
+
+    stop: threading.Event, optional
+        Set to make the bot answer at once with its best decisions so far.
+
+    Returns
+    -------
+
+    tuple[Decision, ...]
+        Decisions taken during the turn, in order.
+    """
+    game = request.game()
+    n_decisions = len(game.decisions)
+    seat = game.active_player_idx
+    game.policies[seat] = policy
+    policy.stops_at(deadline, stop)
+    try:
+        game.play_turn()
+    finally:
+        policy.stops_at()
+        game.policies[seat] = PassivePolicy()
+    return tuple(game.decisions[n_decisions:])
+
+
+class BotPool:
+    """
+    Bounded pool of threads or processes playing bot turns, see the module
+    documentation.
+
+    Threads share the policies of the bots, whose searches are stopped at once
+    on cancellation; they run in parallel only as far as the searches release
+    the GIL. Processes think in parallel, but receive a copy of the policy for
+    each turn, so that what a policy learns during a turn (search trees, random
+    generator state) is not kept.
+
+    Attributes
+    ----------
+
+    deadline: float
+        Wall-clock time a bot has to decide its turn, in seconds.
+
+    n_turns: int
+        Number of bot turns played.
+
+    n_late: int
+        Number of turns played by the fallback because the worker missed the deadline.
+    """
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        processes: bool = False,
+        max_pending: int | None = None,
+        deadline: float = DEFAULT_DEADLINE,
+        grace: float = DEFAULT_GRACE,
+        fallback: Policy | None = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_workers: int, optional
+            Number of workers. Defaults to the default of the executor.
+
+        processes: bool
+            Whether to think in processes rather than threads. Defaults to False.
+
+        max_pending: int, optional
+            Maximum number of bot turns queued or thinking at once; the others
+            wait for a free slot. Defaults to twice the number of workers.
+
+        deadline: float
+            Wall-clock time a bot has to decide its turn, in seconds. Defaults
+            to `DEFAULT_DEADLINE`.
+
+        grace: float
+            Time given to a worker past the deadline before cancelling its turn.
+            Defaults to `DEFAULT_GRACE`.
+
+        fallback: Policy, optional
+            Policy playing the turns the workers failed to decide in time.
+            Defaults to `GreedyPolicy`.
+        """
+        check_num_value(deadline, "deadline", ">", 0)
+        check_num_value(grace, "grace", ">=", 0)
+        self.processes = processes
+        self.executor: Executor = (
+            ProcessPoolExecutor(max_workers) if processes else ThreadPoolExecutor(max_workers)
+        )
+        n_workers = self.executor._max_workers
+        if max_pending is None:
+            max_pending = 2 * n_workers
+        check_num_value(max_pending, "max_pending", ">", 0)
+        self.max_pending = max_pending
+        self.deadline = deadline
+        self.grace = grace
+        self.fallback = fallback if fallback is not None else GreedyPolicy()
+        self.n_turns = 0
+        self.n_late = 0
+        self._slots: asyncio.Semaphore | None = None
+
+    async def plays_turn(self, game: Game, deadline: float | None = None) -> None:
+        """
+        Play the turn of the active bot of `game`, thinking in the pool. The game
+        is not changed until the decisions of the bot come back.
+
+        Parameters
+        ----------
+
+        game: Game
+            Game whose active player is a bot.
+
+        deadline: float, optional
+            Wall-clock time the bot has to decide, in seconds. Defaults to
+            the deadline of the pool.
+        """
+        deadline = self.deadline if deadline is None else deadline
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        seat = game.active_player_idx
+        policy = game.policies[seat]
+        request = BotRequest.from_game(game)
+        stop = None if self.processes else threading.Event()
+
+        decisions = None
+        async with self._slots:
+            # The deadline runs from the submission, waiting for a free worker included.
+            work = self.executor.submit(
+                thinks, request, policy, time.perf_counter() + deadline, stop
+            )
+            future = asyncio.wrap_future(work)
+            try:
+                decisions = await asyncio.wait_for(asyncio.shield(future), deadline + self.grace)
+            except TimeoutError:
+                self.n_late += 1
+                if stop is not None:
+                    # The worker shares the policy: let it go before the next turn.
+                    stop.set()
+                    await asyncio.wait([future])
+            finally:
+                if decisions is None:
+                    # Deadline missed or table cancelled: stop the worker as soon as possible.
+                    if stop is not None:
+                        stop.set()
+                    work.cancel()
+
+        self.n_turns += 1
+        game.policies[seat] = self.fallback if decisions is None else ScriptedPolicy(decisions)
+        try:
+            game.play_turn()
+        finally:
+            game.policies[seat] = policy
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers, cancelling the turns not started yet."""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
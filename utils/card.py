@@ -3,15 +3,38 @@
 
 import typing as tp
 
-from data import (
-    CardNames, EnglishCardNames, FrenchCardNames
+try:
+    from .data import (
+        CardNames, EnglishCardNames, FrenchCardNames
+        )
+    from .data.cards_table import (
+        CARD_IDS, CARD_NAMES, CARD_FAMILIES, CARD_FACE_VALUES,
+        CARD_SCORES, CARD_IS_MAJOR, FAMILY_NAMES, FAMILY_LANGUAGES,
+        CARD_NAMES_INDEX
+    )
+    from .data.majors_table import MAJOR_TYPES
+    from .effects import CardEffect, CARD_SPECIAL_EFFECTS
+except ImportError:
+    from data import (
+        CardNames, EnglishCardNames, FrenchCardNames
+        )
+    from data.cards_table import (
+        CARD_IDS, CARD_NAMES, CARD_FAMILIES, CARD_FACE_VALUES,
+        CARD_SCORES, CARD_IS_MAJOR, FAMILY_NAMES, FAMILY_LANGUAGES,
+        CARD_NAMES_INDEX
     )
-from effects import CardEffect
+    from data.majors_table import MAJOR_TYPES
+    from effects import CardEffect, CARD_SPECIAL_EFFECTS
 
 
 class Card:
     """
     Define properties of a card.
+
+    Cards are immutable and interned: `Card(name)` always returns the same shared
+    instance for a given name, so building piles or checking hands content never
+    allocates new cards. Two cards are equal when they are the same card, whatever
+    the language of their names, and they hash to their `card_id`.
     
     Attributes
     ----------
@@ -19,6 +42,13 @@ class Card:
     name: CardName
         The full name of the card, e.g. 'ace_of_cups'.
 
+    card_id: int
+        Canonical ID of the card (0 to 77), the same in every language.
+        See `utils.data.cards_table` for the attribute tables indexed by it.
+
+    language: str
+        Language of the card name.
+
     face_value: str
         The value one can read on the card ('ace', 'three', 'king', '0', 'XV', ...).
 
@@ -29,26 +59,84 @@ class Card:
         The raw score value of the card, i.e. its worth in points regardless of its
         eventual special effects.
 
-    special_effects: list[CardEffect]
-        List of all special effects that can be applied by the card.
+    special_effects: tuple[CardEffect, ...]
+        All special effects and restrictions that can be applied by the card.
+
+    major_type: str | None
+        'action', 'equipment' or 'permanent' for revealable major cards, else None.
 
     partners: tuple[str, ...]
         For the cards having the 'partnership' effect, gives a tuple of the face values
         of the partner cards. For cards that do not have this effect, an empty tuple is
         returned. 
     """
+    __slots__ = ("name", "card_id", "language")
+
+    name: CardNames
+    card_id: int
+    language: str
+
     names_eng: EnglishCardNames = EnglishCardNames()
     names_fr: FrenchCardNames = FrenchCardNames()
+    _interned: dict[str, tuple[tp.Self, ...]] = {}
 
-    def __init__(self, name: str | CardNames) -> None:
+    def __new__(cls, name: str | CardNames) -> tp.Self:
         """
         Parameters
         ----------
 
         name: str | CardName
-            Name of the card to instantiate.
+            Name of the card to get.
         """
-        self.name: CardNames = self._parse_name(name)
+        name = cls._parse_name(name)
+        return cls._interned[FAMILY_LANGUAGES[type(name)]][CARD_IDS[name]]
+
+    @classmethod
+    def _intern_all(cls) -> None:
+        """Build the shared instance of every card in every language, once."""
+        for language, names in CARD_NAMES.items():
+            cards = []
+            for card_id, name in enumerate(names):
+                card = object.__new__(cls)
+                object.__setattr__(card, "name", name)
+                object.__setattr__(card, "card_id", card_id)
+                object.__setattr__(card, "language", language)
+                cards.append(card)
+            cls._interned[language] = tuple(cards)
+
+    @classmethod
+    def all_by_id(cls, language: str) -> tuple[tp.Self, ...]:
+        """Every card of the game with names in given language, indexed by card ID."""
+        return cls._interned[language]
+
+    def __setattr__(self, name: str, value: tp.Any) -> None:
+        raise AttributeError(f"{self.__class__.__name__} objects are immutable.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{self.__class__.__name__} objects are immutable.")
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Card):
+            return self.card_id == other.card_id
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return self.card_id
+
+    def __reduce__(self) -> tuple[type[tp.Self], tuple[CardNames]]:
+        return (self.__class__, (self.name,))
+
+    def __copy__(self) -> tp.Self:
+        return self
+
+    def __deepcopy__(self, memo: dict[int, tp.Any]) -> tp.Self:
+        return self
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name.value!r})"
+
+    def __str__(self) -> str:
+        return self.name.value.replace("_", " ")
 
     @classmethod
     def _parse_name(cls, name: str | CardNames) -> CardNames:
@@ -56,15 +144,9 @@ class Card:
         if isinstance(name, CardNames):
             return name
 
-        if cls.names_eng.contains(name):
-            for family in cls.names_eng.families:
-                if family.contains(name):
-                    return family(name)
-
-        if cls.names_fr.contains(name):
-            for family in cls.names_fr.families:
-                if family.contains(name):
-                    return family(name)
+        card_name = CARD_NAMES_INDEX.get(name)
+        if card_name is not None:
+            return card_name
 
         raise ValueError(
                 f"{cls.__name__}: {name!r} is not a valid card name."
@@ -75,13 +157,7 @@ class Card:
         """
         The family ('major', 'cups', ...) this card belongs to.
         """
-        if self.names_eng.is_major(self.name):
-            return "major"
-
-        if self.names_fr.is_major(self.name):
-            return "majeure"
-
-        return self.name.value.split("_")[-1]
+        return FAMILY_NAMES[self.language][CARD_FAMILIES[self.card_id]]
 
     @property
     def face_value(self: tp.Self) -> str:
@@ -89,56 +165,30 @@ class Card:
         The face value of the card, e.g. 'three', 'king', ...
         for a minor card, or e.g. '0', 'XI', ... for a major card.
         """
-        if self.is_minor_any():
-            return self.name.value.split("_")[0]
-
-        if self.names_eng.is_major(self.name):
-            family_class = self.names_eng[self.family]
-
-        elif self.names_fr.is_major(self.name):
-            family_class = self.names_fr[self.family]
-
-        int_value = family_class.values().index(self.name)
-        roman_value = to_roman_num(int_value)
-
-        assert roman_value is not None
-
-        return roman_value
+        return CARD_FACE_VALUES[self.language][self.card_id]
 
     @property
     def score_value(self: tp.Self) -> int:
         """Raw score value of the card, regardless of special effects."""
-        if self.has_face_value("XIII"):
-            return 0
-
-        if self.names_eng.contains(self.name):
-            family_class = self.names_eng[self.family]
-
-        elif self.names_fr.contains(self.name):
-            family_class = self.names_fr[self.family]
+        return CARD_SCORES[self.card_id]
 
-        assert family_class is not None
-
-        return family_class.values().index(self.name) + int(self.is_minor_any())
+    @property
+    def special_effects(self: tp.Self) -> tuple[CardEffect, ...]:
+        """Special effects and restrictions of the card, empty for minor cards."""
+        return CARD_SPECIAL_EFFECTS[self.card_id]
 
     @property
-    def special_effects(self: tp.Self) -> list[CardEffect]:
-        """Special effects of the card for score calculations."""
-        raise NotImplementedError
+    def major_type(self: tp.Self) -> str | None:
+        """How the card is played once revealed (see `MajorType`), None if it is not revealable."""
+        return MAJOR_TYPES[self.card_id]
 
     def is_major_any(self: tp.Self) -> bool:
         """Whether given name corresponds to a major card name in any supported language."""
-        return (
-            self.names_fr.is_major(self.name) or
-            self.names_eng.is_major(self.name)
-        )
+        return CARD_IS_MAJOR[self.card_id]
 
     def is_minor_any(self: tp.Self) -> bool:
         """Whether given name corresponds to a minor card name in any supported language."""
-        return (
-            self.names_eng.is_minor(self.name) or
-            self.names_fr.is_minor(self.name)
-        )
+        return not CARD_IS_MAJOR[self.card_id]
 
     def has_face_value(self: tp.Self, face_value: str) -> bool:
         """
@@ -163,6 +213,9 @@ class Card:
         return effect in self.special_effects
 
 
+Card._intern_all()
+
+
 def to_roman_num(value: int, contract_big: bool = False) -> str | None:
     """
     Convert any positive integer into Roman numerals (e.g. 12 -> 'XII').
@@ -233,6 +286,6 @@ def to_roman_num(value: int, contract_big: bool = False) -> str | None:
     for k, v in substractions:
         if total.find(k) == -1:
             continue
-        total.replace(k, v)
+        total = total.replace(k, v)
     
     return total
\ No newline at end of file
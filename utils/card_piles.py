@@ -17,18 +17,29 @@ class DrawPile(ABC):
     """
     Base class to be subclassed to define draw piles.
     Do not call directly.
+
+    The pile is shuffled once when created or reset, then cards are drawn from
+    its top, which is the end of `cards_left`. `n_rearrangements` counts the
+    times the order of the cards left changed otherwise than by drawing, so
+    that what a player saw of the pile can be told outdated.
     """
-    def __init__(self, language: str = "french") -> None:
+    def __init__(self, language: str = "french", rng: rdm.Random | None = None) -> None:
         """
         Parameters
         ----------
         language: str
             Language setting for the cards names.
+
+        rng: random.Random, optional
+            Random generator used to shuffle the pile. Defaults to a new generator
+            seeded from the `random` module.
         """
+        self.rng = rng if rng is not None else rdm.Random(rdm.getrandbits(64))
         self.full_list = self._set_cards_list(language)
         self.n_cards_total = len(self.full_list)
-        self.cards_left = self.full_list
-        self.retries = 4
+        self.cards_left = list(self.full_list)
+        self.n_rearrangements = 0
+        self.shuffle()
     
     @staticmethod
     @abstractmethod
@@ -43,49 +54,14 @@ class DrawPile(ABC):
     def __len__(self) -> int:
         return self.n_cards_left
 
-    def _draw_one(self) -> Card | None:
-        """
-        Draw one card. Do not call directly,
-        call the draw() method to draw cards properly instead.
-        """
-        if self.n_cards_left < 1:
-            return None
-
-        retries = self.retries
-
-        while retries > 0:
-            card = rdm.choice(self.cards_left)
-
-            try:
-                self.cards_left.remove(card)
-            except ValueError:
-                retries -= 1
-                warnings.warn(
-                    f"{self.__class__.__name__}: "
-                    "An error occurred while trying to draw a card: "
-                    "the card chosen among the pile does not actually "
-                    "exist in said pile anymore. This error should not "
-                    "be possible to occur in normal circumstances. "
-                    f"Card causing the error: {card.name.value!r}.\n"
-                    f"Retries left: {retries}"
-                )
-                continue
-            else:
-                break
-
-        else:
-            raise ValueError(
-                f"{self.__class__.__name__}: "
-                "Too many consecutive draw errors occurred, this pile is broken. "
-                "Try relaunching the game from the start. If the bug persists, "
-                "contact the developper and send the game logs to help debugging."
-            )
-
-        return card
+    def shuffle(self) -> None:
+        """Shuffle the cards left in the pile (Fisher-Yates, using the pile generator)."""
+        self.rng.shuffle(self.cards_left)
+        self.n_rearrangements += 1
 
     def draw(self, number: int = 1) -> list[Card] | None:
         """
-        Draw given number of cards from the pile.
+        Draw given number of cards from the top of the pile.
         
         Parameters
         ----------
@@ -95,7 +71,7 @@ class DrawPile(ABC):
         Returns
         -------
         list[Card] or None:
-            Drawn cards in a list or None if `number` is not valid.
+            Drawn cards in a list, top card first, or None if `number` is not valid.
         """
         if number < 1:
             warnings.warn(
@@ -104,21 +80,64 @@ class DrawPile(ABC):
             )
             return None
 
-        drawn_cards = []
+        if number > self.n_cards_left:
+            warnings.warn(
+                f"{self.__class__.__name__}: "
+                "This pile is empty, impossible to draw from it anymore."
+            )
+            number = self.n_cards_left
 
-        while len(drawn_cards) < number:
-            card = self._draw_one()
+        drawn_cards = self.cards_left[:-number - 1:-1]
+        del self.cards_left[len(self.cards_left) - number:]
 
-            if card is None:
-                warnings.warn(
-                    f"{self.__class__.__name__}: "
-                    "This pile is empty, impossible to draw from it anymore."
-                )
-                break
+        return drawn_cards
 
-            drawn_cards.append(card)
+    def peek(self, number: int = 1) -> list[Card]:
+        """
+        Look at given number of cards on top of the pile without drawing them.
 
-        return drawn_cards
+        Parameters
+        ----------
+        number: int
+            Number of cards to look at. Defaults to 1.
+
+        Returns
+        -------
+        list[Card]:
+            Cards on top of the pile, top card first. Less cards are returned
+            if the pile does not hold enough of them.
+        """
+        return self.cards_left[:-number - 1:-1] if number > 0 else []
+
+    def reorder(self, cards: list[Card]) -> None:
+        """
+        Put back the cards on top of the pile in a new order, e.g. after
+        looking at them with `peek`.
+
+        Parameters
+        ----------
+        cards: list[Card]
+            New order of the top cards, top card first. Must be the same cards
+            as the ones returned by `peek(len(cards))`.
+        """
+        number = len(cards)
+        if sorted(self.peek(number), key=hash) != sorted(cards, key=hash):
+            raise ValueError(
+                f"{self.__class__.__name__}: "
+                f"Given cards are not the {number} cards on top of the pile."
+            )
+
+        self.cards_left[len(self.cards_left) - number:] = cards[::-1]
+        self.n_rearrangements += 1
+
+    def puts_on_top(self, cards: list[Card]) -> None:
+        """Put cards back on top of the pile, top card first, e.g. to undo a draw."""
+        self.cards_left.extend(reversed(cards))
+
+    def puts_back(self, cards: list[Card]) -> None:
+        """Put cards back into the pile and shuffle it."""
+        self.cards_left.extend(cards)
+        self.shuffle()
 
     def distribute(
         self,
@@ -155,20 +174,25 @@ class DrawPile(ABC):
         if hands is None:
             hands = [[] for _ in range(n_players)]
 
-        for _ in range(n_cards_per_player):
-            for idx in range(n_players):
-                true_idx = (idx + active_player_idx) % n_players
-                draw = self.draw()
-                assert draw is not None, (
-                    "type checker assertion, never triggered."
-                )
-                hands[true_idx] += draw
+        if n_players < 1 or n_cards_per_player < 1:
+            return hands
+
+        dealt = self.draw(n_players * n_cards_per_player)
+        assert dealt is not None, (
+            "type checker assertion, never triggered."
+        )
+
+        # Card k goes to the k-th player after the active one, modulo n_players.
+        for idx in range(n_players):
+            true_idx = (idx + active_player_idx) % n_players
+            hands[true_idx] += dealt[idx::n_players]
 
         return hands
 
     def reset(self) -> None:
-        """Refill the pile with all its cards, keeping other parameters."""
-        self.cards_left = self.full_list
+        """Refill the pile with all its cards and shuffle it, keeping other parameters."""
+        self.cards_left = list(self.full_list)
+        self.shuffle()
 
 
 class MinorCardsDrawPile(DrawPile):
@@ -183,7 +207,7 @@ class MinorCardsDrawPile(DrawPile):
             case "french":
                 names = []
                 for family in Card.names_fr.families:
-                    if isinstance(family, Card.names_fr.MAJEURES):
+                    if family is Card.names_fr.MAJEURES:
                         names.append(family.MORT)
                     else:
                         names += family.values()
@@ -191,7 +215,7 @@ class MinorCardsDrawPile(DrawPile):
             case "english":
                 names = []
                 for family in Card.names_eng.families:
-                    if isinstance(family, Card.names_eng.MAJORS):
+                    if family is Card.names_eng.MAJORS:
                         names.append(family.DEATH)
                     else:
                         names += family.values()
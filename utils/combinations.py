@@ -0,0 +1,448 @@
+"""
+Find every legal combination and combination extension in a hand.
+
+Authorized combinations are pairs, three and four of a kind (same face value,
+different families) and suites of at least 3 minor cards of the same family
+with consecutive face values. Two major cards relax these rules when attached:
+the JOKER effect (Le Bateleur) takes the place of one missing minor card, and
+the HYBRID effect (L'Amoureux) allows mixing two families in a suite.
+
+Hands are indexed by a `HandIndex`, updated as cards enter or leave the hand,
+which keeps per-face counts and per-family face bitmasks so that finding all
+combinations is a handful of integer operations per face value and family.
+"""
+
+import functools
+import itertools
+import typing as tp
+
+from dataclasses import dataclass
+from enum import IntEnum
+
+try:
+    from .data.cards_table import (
+        N_MAJORS, N_RANKS, N_MINOR_FAMILIES, CARD_FAMILIES, CARD_RANKS, CARD_IS_MAJOR
+    )
+except ImportError:
+    from data.cards_table import (
+        N_MAJORS, N_RANKS, N_MINOR_FAMILIES, CARD_FAMILIES, CARD_RANKS, CARD_IS_MAJOR
+    )
+
+
+MIN_SUITE_LENGTH = 3
+"""Minimum number of cards in a suite."""
+
+MAX_SAME_FACE = N_MINOR_FAMILIES
+"""Maximum number of cards in a n-of-a-kind combination."""
+
+_FAMILY_PAIRS = tuple(itertools.combinations(range(1, N_MINOR_FAMILIES + 1), 2))
+
+
+def minor_id(family: int, rank: int) -> int:
+    """ID of the minor card of given family index (1 to 4) and rank (0 = ace to 13 = king)."""
+    return N_MAJORS + (family - 1) * N_RANKS + rank
+
+
+def _interval(low: int, high: int) -> int:
+    """Bitmask of the ranks from `low` to `high` included."""
+    return ((1 << (high - low + 1)) - 1) << low
+
+
+class CombinationKind(IntEnum):
+    """Kinds of combinations."""
+    SAME_FACE = 0
+    SUITE = 1
+
+
+@dataclass(frozen=True, slots=True)
+class Combination:
+    """
+    A legal combination.
+
+    Attributes
+    ----------
+
+    kind: CombinationKind
+        Whether the combination is a n-of-a-kind or a suite.
+
+    mask: int
+        Bitmask of the IDs of the minor cards of the combination.
+
+    low: int
+        Lowest rank of the combination (0 = ace to 13 = king).
+
+    high: int
+        Highest rank of the combination. Equal to `low` for a n-of-a-kind.
+
+    families: int
+        Bitmask of the family indices (1 to 4) of the cards of the combination.
+
+    jokers: int
+        Number of missing minor cards replaced by a JOKER (0 or 1).
+    """
+    kind: CombinationKind
+    mask: int
+    low: int
+    high: int
+    families: int
+    jokers: int = 0
+
+    @property
+    def size(self) -> int:
+        """Number of cards of the combination, jokers included."""
+        return self.mask.bit_count() + self.jokers
+
+    def is_hybrid(self) -> bool:
+        """Whether the combination is a suite mixing two families."""
+        return self.kind is CombinationKind.SUITE and self.families.bit_count() > 1
+
+
+class HandIndex:
+    """
+    Index of the minor cards of a hand, to be updated with `add` and `remove`
+    as cards enter or leave the hand.
+
+    Attributes
+    ----------
+
+    mask: int
+        Bitmask of the IDs of all the cards in hand, majors included.
+
+    rank_counts: list[int]
+        Number of minor cards of each rank.
+
+    rank_families: list[int]
+        Bitmask of the family indices holding each rank.
+
+    family_ranks: list[int]
+        Bitmask of the ranks held in each family, by family index (index 0 unused).
+    """
+    __slots__ = ("mask", "rank_counts", "rank_families", "family_ranks")
+
+    def __init__(self, card_ids: tp.Iterable[int] = ()) -> None:
+        """
+        Parameters
+        ----------
+
+        card_ids: Iterable[int]
+            IDs of the cards initially in hand.
+        """
+        self.mask = 0
+        self.rank_counts = [0] * N_RANKS
+        self.rank_families = [0] * N_RANKS
+        self.family_ranks = [0] * (N_MINOR_FAMILIES + 1)
+        for card_id in card_ids:
+            self.add(card_id)
+
+    def add(self, card_id: int) -> None:
+        """Index a card entering the hand."""
+        self.mask |= 1 << card_id
+        if CARD_IS_MAJOR[card_id]:
+            return
+        family, rank = CARD_FAMILIES[card_id], CARD_RANKS[card_id]
+        self.rank_counts[rank] += 1
+        self.rank_families[rank] |= 1 << family
+        self.family_ranks[family] |= 1 << rank
+
+    def remove(self, card_id: int) -> None:
+        """Unindex a card leaving the hand."""
+        self.mask &= ~(1 << card_id)
+        if CARD_IS_MAJOR[card_id]:
+            return
+        family, rank = CARD_FAMILIES[card_id], CARD_RANKS[card_id]
+        self.rank_counts[rank] -= 1
+        self.rank_families[rank] &= ~(1 << family)
+        self.family_ranks[family] &= ~(1 << rank)
+
+    def ranks_of(self, families: int) -> int:
+        """Bitmask of the ranks held in any of the given families (bitmask of indices)."""
+        ranks = 0
+        for family in range(1, N_MINOR_FAMILIES + 1):
+            if families >> family & 1:
+                ranks |= self.family_ranks[family]
+        return ranks
+
+
+def _family_subsets(families: int) -> tp.Iterator[int]:
+    """Non-empty subsets of a bitmask of families."""
+    subset = families
+    while subset:
+        yield subset
+        subset = (subset - 1) & families
+
+
+def _rank_mask(rank: int, families: int) -> int:
+    """Bitmask of the card IDs of given rank in given families."""
+    mask = 0
+    for family in range(1, N_MINOR_FAMILIES + 1):
+        if families >> family & 1:
+            mask |= 1 << minor_id(family, rank)
+    return mask
+
+
+def _family_indices(families: int) -> list[int]:
+    return [family for family in range(1, N_MINOR_FAMILIES + 1) if families >> family & 1]
+
+
+def _suite_masks(index: HandIndex, ranks: int, families: int) -> tp.Iterator[tuple[int, int]]:
+    """
+    Every way of picking one card in hand per rank of `ranks`, among one or two
+    `families`, as (bitmask of card IDs, bitmask of the families used). Ranks held
+    in a single family are placed with one shift; only ranks held in both families
+    are enumerated.
+    """
+    family_list = _family_indices(families)
+    if len(family_list) == 1:
+        family = family_list[0]
+        yield (ranks << minor_id(family, 0), families if ranks else 0)
+        return
+
+    family_1, family_2 = family_list
+    ranks_1 = index.family_ranks[family_1] & ranks
+    ranks_2 = index.family_ranks[family_2] & ranks
+    both = ranks_1 & ranks_2
+    fixed_1, fixed_2 = ranks_1 & ~both, ranks_2 & ~both
+    base_1, base_2 = minor_id(family_1, 0), minor_id(family_2, 0)
+
+    subset = both
+    while True:
+        picked_1, picked_2 = fixed_1 | subset, fixed_2 | (both & ~subset)
+        used = (1 << family_1 if picked_1 else 0) | (1 << family_2 if picked_2 else 0)
+        yield ((picked_1 << base_1) | (picked_2 << base_2), used)
+        if not subset:
+            return
+        subset = (subset - 1) & both
+
+
+def same_face_combinations(index: HandIndex, joker: bool = False) -> list[Combination]:
+    """
+    Every pair, three and four of a kind in the hand.
+
+    Parameters
+    ----------
+
+    index: HandIndex
+        Index of the hand.
+
+    joker: bool
+        Whether a JOKER can replace one missing card. Defaults to False.
+    """
+    combinations = []
+    for rank in range(N_RANKS):
+        if index.rank_counts[rank] < 2 - joker:
+            continue
+        for subset in _family_subsets(index.rank_families[rank]):
+            n_cards = subset.bit_count()
+            mask = _rank_mask(rank, subset)
+            if n_cards >= 2:
+                combinations.append(
+                    Combination(CombinationKind.SAME_FACE, mask, rank, rank, subset)
+                )
+            if joker and n_cards < MAX_SAME_FACE:
+                combinations.append(
+                    Combination(CombinationKind.SAME_FACE, mask, rank, rank, subset, 1)
+                )
+    return combinations
+
+
+def _suites_in(
+    index: HandIndex, families: int, jokers: int, both_families: bool
+) -> tp.Iterator[Combination]:
+    ranks = index.ranks_of(families)
+    if ranks.bit_count() < MIN_SUITE_LENGTH - jokers:
+        return
+    for low in range(N_RANKS - MIN_SUITE_LENGTH + 1):
+        if not ranks >> low & 1 and not jokers:
+            continue
+        for high in range(low + MIN_SUITE_LENGTH - 1, N_RANKS):
+            interval = _interval(low, high)
+            n_missing = (interval & ~ranks).bit_count()
+            if n_missing > jokers:
+                break
+            for mask, used_families in _suite_masks(index, interval & ranks, families):
+                if both_families and used_families != families:
+                    continue
+                yield Combination(
+                    CombinationKind.SUITE, mask, low, high, used_families, n_missing
+                )
+
+
+def suite_combinations(
+    index: HandIndex, joker: bool = False, hybrid: bool = False
+) -> list[Combination]:
+    """
+    Every suite in the hand.
+
+    Parameters
+    ----------
+
+    index: HandIndex
+        Index of the hand.
+
+    joker: bool
+        Whether a JOKER can replace one missing card. Defaults to False.
+
+    hybrid: bool
+        Whether suites mixing two families are allowed. Defaults to False.
+    """
+    jokers = int(joker)
+    combinations = []
+    for family in range(1, N_MINOR_FAMILIES + 1):
+        combinations.extend(_suites_in(index, 1 << family, jokers, False))
+    if hybrid:
+        for family_1, family_2 in _FAMILY_PAIRS:
+            families = (1 << family_1) | (1 << family_2)
+            combinations.extend(_suites_in(index, families, jokers, True))
+    return combinations
+
+
+def find_combinations(
+    index: HandIndex, joker: bool = False, hybrid: bool = False
+) -> list[Combination]:
+    """
+    Every legal new combination in the hand.
+
+    Parameters
+    ----------
+
+    index: HandIndex
+        Index of the hand.
+
+    joker: bool
+        Whether a JOKER can replace one missing card. Defaults to False.
+
+    hybrid: bool
+        Whether suites mixing two families are allowed. Defaults to False.
+    """
+    return same_face_combinations(index, joker) + suite_combinations(index, joker, hybrid)
+
+
+def find_extensions(
+    index: HandIndex, combination: Combination, joker: bool = False
+) -> list[Combination]:
+    """
+    Every legal way of completing an existing combination with cards of the hand.
+
+    Parameters
+    ----------
+
+    index: HandIndex
+        Index of the hand.
+
+    combination: Combination
+        Combination to complete.
+
+    joker: bool
+        Whether a JOKER can replace one missing card, if the combination does not
+        already use one. Defaults to False.
+
+    Returns
+    -------
+
+    list[Combination]
+        Cards from the hand to add (`mask`), with the resulting range, families
+        and number of jokers of the completed combination.
+    """
+    jokers_left = int(joker and not combination.jokers)
+    extensions = []
+
+    if combination.kind is CombinationKind.SAME_FACE:
+        rank = combination.low
+        room = MAX_SAME_FACE - combination.size
+        available = index.rank_families[rank] & ~combination.families
+        for subset in _family_subsets(available):
+            n_cards = subset.bit_count()
+            if n_cards > room:
+                continue
+            mask = _rank_mask(rank, subset)
+            families = combination.families | subset
+            extensions.append(Combination(
+                CombinationKind.SAME_FACE, mask, rank, rank, families, combination.jokers
+            ))
+            if jokers_left and n_cards < room:
+                extensions.append(
+                    Combination(CombinationKind.SAME_FACE, mask, rank, rank, families, 1)
+                )
+        if jokers_left and room > 0:
+            extensions.append(Combination(
+                CombinationKind.SAME_FACE, 0, rank, rank, combination.families, 1
+            ))
+        return extensions
+
+    families = combination.families
+    ranks = index.ranks_of(families)
+    current = _interval(combination.low, combination.high)
+    for low in range(combination.low, -1, -1):
+        for high in range(combination.high, N_RANKS):
+            if low == combination.low and high == combination.high:
+                continue
+            added = _interval(low, high) & ~current
+            n_missing = (added & ~ranks).bit_count()
+            if n_missing > jokers_left:
+                break
+            for mask, _ in _suite_masks(index, added & ranks, families):
+                extensions.append(Combination(
+                    CombinationKind.SUITE, mask, low, high,
+                    families, combination.jokers + n_missing
+                ))
+    return extensions
+
+
+@functools.lru_cache(maxsize=4096)
+def classify(mask: int, jokers: int = 0, hybrid: bool = False) -> Combination | None:
+    """
+    Combination formed by given minor cards, or None if they do not form a
+    legal combination. Results are cached, as the same combinations are
+    classified again each time their owner looks for extensions.
+
+    Parameters
+    ----------
+
+    mask: int
+        Bitmask of the IDs of the cards.
+
+    jokers: int
+        Number of missing cards replaced by a JOKER (0 or 1). Defaults to 0.
+
+    hybrid: bool
+        Whether suites mixing two families are allowed. Defaults to False.
+    """
+    if mask & ((1 << N_MAJORS) - 1) or not mask:
+        return None
+
+    card_ids = []
+    remaining = mask
+    while remaining:
+        low_bit = remaining & -remaining
+        card_ids.append(low_bit.bit_length() - 1)
+        remaining ^= low_bit
+    index = HandIndex(card_ids)
+
+    ranks = [rank for rank in range(N_RANKS) if index.rank_counts[rank]]
+    families = 0
+    for rank in ranks:
+        families |= index.rank_families[rank]
+    n_cards = len(card_ids) + jokers
+
+    if len(ranks) == 1:
+        if 2 <= n_cards <= MAX_SAME_FACE:
+            return Combination(CombinationKind.SAME_FACE, mask, ranks[0], ranks[0], families, jokers)
+        return None
+
+    if any(index.rank_counts[rank] > 1 for rank in ranks) or n_cards < MIN_SUITE_LENGTH:
+        return None
+    if families.bit_count() > 1 + hybrid:
+        return None
+
+    low, high = ranks[0], ranks[-1]
+    n_missing = high - low + 1 - len(ranks)
+    if n_missing > jokers:
+        return None
+    if jokers > n_missing:
+        # The joker extends the suite at one of its ends.
+        if high < N_RANKS - 1:
+            high += 1
+        else:
+            low -= 1
+
+    return Combination(CombinationKind.SUITE, mask, low, high, families, jokers)
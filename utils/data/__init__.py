@@ -1,8 +1,13 @@
 """All possible cards names in the game, in all supported languages."""
 
-from base import CardNames, CardNamesPack, EffectNames
-from cards_names_english import EnglishCardNames
-from cards_names_french import FrenchCardNames
+try:
+    from .base import CardNames, CardNamesPack, EffectNames
+    from .cards_names_english import EnglishCardNames
+    from .cards_names_french import FrenchCardNames
+except ImportError:
+    from base import CardNames, CardNamesPack, EffectNames
+    from cards_names_english import EnglishCardNames
+    from cards_names_french import FrenchCardNames
 
 __all__ = [
     "CardNames", "CardNamesPack", "EffectNames",
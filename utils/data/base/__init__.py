@@ -1,9 +1,15 @@
 """package of the base classes for game data storage implementation."""
 
-from common_asserts import check_type, check_num_value
-from base_classes import Settings
-from cards_names_base import CardNames, CardNamesPack
-from effects_names_base import EffectNames
+try:
+    from .common_asserts import check_type, check_num_value
+    from .base_classes import Settings
+    from .cards_names_base import CardNames, CardNamesPack
+    from .effects_names_base import EffectNames
+except ImportError:
+    from common_asserts import check_type, check_num_value
+    from base_classes import Settings
+    from cards_names_base import CardNames, CardNamesPack
+    from effects_names_base import EffectNames
 
 
 __all__ = [
@@ -63,7 +63,7 @@ class Names(GameDataBase, StrEnum):
     ...
 
 
-class Settings(ABCEnumMeta, GameDataBase):
+class Settings(GameDataBase, metaclass=ABCEnumMeta):
     """
     Base class for settings classes.
     Should not be called directly in higher levels of the project.
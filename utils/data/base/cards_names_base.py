@@ -6,7 +6,10 @@ import typing as tp
 from abc import ABC, abstractmethod
 from collections.abc import Callable
 
-from base_classes import Names
+try:
+    from .base_classes import Names
+except ImportError:
+    from base_classes import Names
 
 
 class CardNames(Names):
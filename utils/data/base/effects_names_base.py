@@ -1,6 +1,9 @@
 """Base class for card effects names classes."""
 
-from base_classes import Names
+try:
+    from .base_classes import Names
+except ImportError:
+    from base_classes import Names
 
 
 class EffectNames(Names):
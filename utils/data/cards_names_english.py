@@ -4,7 +4,10 @@ Enum classes listing all possible card names in the game (english names).
 
 from enum import auto
 
-from base import CardNames, CardNamesPack
+try:
+    from .base import CardNames, CardNamesPack
+except ImportError:
+    from base import CardNames, CardNamesPack
 
 
 class MajorCardNamesEng(CardNames):
@@ -0,0 +1,137 @@
+"""
+Canonical integer identifiers of the cards and their attributes, precomputed
+once at import for all supported languages.
+
+Card IDs go from 0 to 77: majors first in arcana order (0 = Fool, ..., 21 = World),
+then minors family by family in pack order (wands, cups, pentacles, swords),
+each family going from ace to king. A card has the same ID in every language.
+"""
+
+try:
+    from .base import CardNames, CardNamesPack
+    from .cards_names_english import EnglishCardNames
+    from .cards_names_french import FrenchCardNames
+except ImportError:
+    from base import CardNames, CardNamesPack
+    from cards_names_english import EnglishCardNames
+    from cards_names_french import FrenchCardNames
+
+
+N_MAJORS = 22
+"""Number of major cards."""
+
+N_RANKS = 14
+"""Number of cards in each minor family."""
+
+N_MINOR_FAMILIES = 4
+"""Number of minor families."""
+
+N_CARDS = N_MAJORS + N_MINOR_FAMILIES * N_RANKS
+"""Number of cards in the game."""
+
+MAJOR_FAMILY = 0
+"""Family index of the major cards. Minor families go from 1 to 4 in pack order."""
+
+DEATH_ID = 13
+"""ID of the Death (XIII) card."""
+
+PACKS: dict[str, CardNamesPack] = {
+    "english": EnglishCardNames(),
+    "french": FrenchCardNames(),
+}
+"""Card names pack of each supported language."""
+
+MAJOR_FAMILY_NAMES = {
+    "english": "major",
+    "french": "majeure",
+}
+"""Name of the major family in each supported language."""
+
+MAJOR_FACE_VALUES = (
+    "0", "I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X",
+    "XI", "XII", "XIII", "XIV", "XV", "XVI", "XVII", "XVIII", "XIX", "XX", "XXI"
+)
+"""Face values of the major cards, in arcana order."""
+
+
+def _build_tables() -> tuple[
+    dict[str, tuple[CardNames, ...]], dict[CardNames, int],
+    dict[type[CardNames], str], dict[str, tuple[str, ...]], dict[str, tuple[str, ...]]
+]:
+    names_by_lang = {}
+    ids = {}
+    languages = {}
+    family_names = {}
+    face_values = {}
+
+    for language, pack in PACKS.items():
+        names = [name for family in pack.families for name in family]
+        assert len(names) == N_CARDS, f"{language} pack does not have {N_CARDS} cards."
+
+        family_names[language] = (MAJOR_FAMILY_NAMES[language],) + tuple(
+            family.values()[0].split("_")[-1] for family in pack.families[1:]
+        )
+        face_values[language] = MAJOR_FACE_VALUES + tuple(
+            name.value.split("_")[0] for name in names[N_MAJORS:]
+        )
+
+        names_by_lang[language] = tuple(names)
+        for card_id, name in enumerate(names):
+            ids[name] = card_id
+
+        for family in pack.families:
+            languages[family] = language
+
+    return names_by_lang, ids, languages, family_names, face_values
+
+
+CARD_NAMES, CARD_IDS, FAMILY_LANGUAGES, FAMILY_NAMES, CARD_FACE_VALUES = _build_tables()
+"""
+CARD_NAMES: Card names by ID, for each language.
+CARD_IDS: ID of each card name, whatever its language.
+FAMILY_LANGUAGES: Language of each card names enum class. Names are string enums,
+    so names spelled the same in two languages (e.g. 'chariot') compare equal:
+    use the class of a name, not the name itself, to get its language.
+FAMILY_NAMES: Names of the families by family index, for each language.
+CARD_FACE_VALUES: Face values by ID, for each language.
+"""
+
+CARD_FAMILIES: tuple[int, ...] = tuple(
+    MAJOR_FAMILY if card_id < N_MAJORS else 1 + (card_id - N_MAJORS) // N_RANKS
+    for card_id in range(N_CARDS)
+)
+"""Family index of each card, by ID."""
+
+CARD_RANKS: tuple[int, ...] = tuple(
+    card_id if card_id < N_MAJORS else (card_id - N_MAJORS) % N_RANKS
+    for card_id in range(N_CARDS)
+)
+"""Position of each card in its family (arcana number, or 0 = ace to 13 = king), by ID."""
+
+CARD_IS_MAJOR: tuple[bool, ...] = tuple(card_id < N_MAJORS for card_id in range(N_CARDS))
+"""Whether each card is a major card, by ID."""
+
+CARD_SCORES: tuple[int, ...] = tuple(
+    0 if card_id == DEATH_ID else CARD_RANKS[card_id] + int(not CARD_IS_MAJOR[card_id])
+    for card_id in range(N_CARDS)
+)
+"""Raw score value of each card, by ID."""
+
+
+def _build_names_index() -> dict[str, CardNames]:
+    index = {}
+    for names in CARD_NAMES.values():
+        for name in names:
+            for spelling in (name.value, name.name, name.value.replace("_", " ")):
+                # Plain str keys: first language in PACKS wins for shared spellings.
+                index.setdefault(str(spelling), name)
+    return index
+
+
+CARD_NAMES_INDEX = _build_names_index()
+"""
+Card name of each accepted spelling: enum value ('ace_of_cups'), enum member name
+('ACE_OF_CUPS') or displayed name ('ace of cups'), in every language. The family of
+a name is its class. Spellings shared by several languages (e.g. 'chariot') resolve
+to the first language of `PACKS`.
+"""
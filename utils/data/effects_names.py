@@ -2,7 +2,10 @@
 All possible effects a card can have in the game.
 """
 
-from base import EffectNames
+try:
+    from .base import EffectNames
+except ImportError:
+    from base import EffectNames
 
 
 class DirectEffects(EffectNames):
@@ -250,4 +253,21 @@ class EffectNamesPack:
 
     def contains(self, name: str | EffectNames) -> bool:
         """Whether given name correspond to any effect in the game."""
-        return any(effect_type.contains(name) for effect_type in self.effects_types)
\ No newline at end of file
+        return isinstance(name, EffectNames) or name in EFFECT_NAMES_INDEX
+
+
+def _build_names_index() -> dict[str, EffectNames]:
+    index = {}
+    for effect_type in EffectNamesPack().effects_types:
+        for effect in effect_type:
+            for spelling in (effect.value, effect.name, effect.name.lower()):
+                index.setdefault(str(spelling), effect)
+    return index
+
+
+EFFECT_NAMES_INDEX = _build_names_index()
+"""
+Effect of each accepted spelling: description (enum value), enum member name
+('JOKER') or lowercase member name ('joker'), for all effect types. The type
+of an effect is its class.
+"""
\ No newline at end of file
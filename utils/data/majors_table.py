@@ -0,0 +1,139 @@
+"""
+Type and effects of each major card, indexed by card ID and precomputed once at
+import, so that the effects of a card are looked up instead of searched for.
+Restrictions are also compiled into bitmasks of card IDs, so that checking them
+is a matter of AND operations (see `utils.restrictions`).
+"""
+
+import typing as tp
+
+try:
+    from .base import EffectNames
+    from .cards_table import N_CARDS, N_MAJORS, DEATH_ID, CARD_RANKS
+    from .effects_names import DirectEffects, Restrictions
+except ImportError:
+    from base import EffectNames
+    from cards_table import N_CARDS, N_MAJORS, DEATH_ID, CARD_RANKS
+    from effects_names import DirectEffects, Restrictions
+
+
+class MajorType:
+    """Ways a major card is played once revealed."""
+    ACTION = "action"
+    EQUIPMENT = "equipment"
+    PERMANENT = "permanent"
+
+
+_MAJORS: dict[int, tuple[str | None, tuple[EffectNames, ...]]] = {
+    0: (MajorType.EQUIPMENT, (DirectEffects.ALL_INCLUSIVE,)),  # Le Mat
+    1: (MajorType.EQUIPMENT, (DirectEffects.JOKER, Restrictions.REPLACEABLE)),  # Le Bateleur
+    2: (MajorType.PERMANENT, (DirectEffects.FORESIGHT,)),  # La Papesse
+    3: (
+        MajorType.EQUIPMENT,
+        (DirectEffects.OUTLIER, Restrictions.ANTI_ROYALIST, Restrictions.NOT_COMPATIBLE_EMPRESS)
+    ),  # L'Impératrice
+    4: (MajorType.ACTION, (DirectEffects.ANNIHILATOR, Restrictions.POPE_COUNTERED)),  # L'Empereur
+    5: (MajorType.EQUIPMENT, (DirectEffects.PROTECTOR,)),  # Le Pape
+    6: (MajorType.EQUIPMENT, (DirectEffects.HYBRID, Restrictions.NOT_COMPATIBLE_LOVERS)),  # L'Amoureux
+    7: (MajorType.ACTION, (DirectEffects.DOUBLE_PLAY, Restrictions.DOUBLE_PLAY_LOCK)),  # Le Chariot
+    8: (MajorType.ACTION, (DirectEffects.EQUALIZER, DirectEffects.BLOCK)),  # La Justice
+    9: (MajorType.ACTION, (DirectEffects.ACCELERATE,)),  # L'Ermite
+    10: (MajorType.PERMANENT, (DirectEffects.ACCUMULATOR,)),  # La Roue de Fortune
+    11: (MajorType.ACTION, (DirectEffects.STEAL, Restrictions.POPE_COUNTERED)),  # La Force
+    12: (MajorType.ACTION, (DirectEffects.MIRROR,)),  # Le Pendu
+    DEATH_ID: (None, (DirectEffects.OLD_MAID,)),  # La Mort, never revealed
+    14: (MajorType.ACTION, (DirectEffects.REACTIVATION, Restrictions.NO_USED_ACTION)),  # La Tempérance
+    15: (
+        MajorType.EQUIPMENT,
+        (DirectEffects.DOUBLE_SCORE, Restrictions.NOT_COMPATIBLE_DEVIL, Restrictions.SACRIFICE)
+    ),  # Le Diable
+    16: (MajorType.ACTION, (DirectEffects.REDISTRIBUTION,)),  # La Maison-Dieu
+    17: (
+        MajorType.PERMANENT, (DirectEffects.MEMORY_RECALL, DirectEffects.GOD_SAVE_THE_QUEEN)
+    ),  # L'Etoile
+    18: (MajorType.ACTION, (DirectEffects.EXCHANGE,)),  # La Lune
+    19: (MajorType.ACTION, (DirectEffects.TURNOVER,)),  # Le Soleil
+    20: (MajorType.ACTION, (DirectEffects.RESURRECTION,)),  # Le Jugement
+    21: (
+        MajorType.EQUIPMENT,
+        (DirectEffects.DOUBLE_SCORE, Restrictions.NOT_ALONE, Restrictions.IMMUTABLE)
+    ),  # Le Monde
+}
+assert len(_MAJORS) == N_MAJORS
+
+
+MAJOR_TYPES: tuple[str | None, ...] = tuple(
+    _MAJORS[card_id][0] if card_id in _MAJORS else None for card_id in range(N_CARDS)
+)
+"""`MajorType` of each card by ID, None for Death and minor cards."""
+
+CARD_EFFECTS: tuple[tuple[EffectNames, ...], ...] = tuple(
+    _MAJORS[card_id][1] if card_id in _MAJORS else () for card_id in range(N_CARDS)
+)
+"""Effects and restrictions of each card by ID, empty for minor cards."""
+
+
+def _build_effect_cards() -> dict[EffectNames, tuple[int, ...]]:
+    effect_cards = {}
+    for card_id, effects in enumerate(CARD_EFFECTS):
+        for effect in effects:
+            effect_cards[effect] = effect_cards.get(effect, ()) + (card_id,)
+    return effect_cards
+
+
+EFFECT_CARDS = _build_effect_cards()
+"""IDs of the cards having each effect or restriction."""
+
+
+
+FIGURE_RANKS = (10, 11, 12, 13)
+"""Ranks of the figures: jack, knight, queen and king."""
+
+_INCOMPATIBLE_EQUIPMENT: dict[EffectNames, tuple[int, ...]] = {
+    Restrictions.NOT_COMPATIBLE_EMPRESS: (0, 6),  # Le Mat, L'Amoureux
+    Restrictions.NOT_COMPATIBLE_LOVERS: (0, 3),  # Le Mat, L'Impératrice
+    Restrictions.NOT_COMPATIBLE_DEVIL: (5,),  # Le Pape
+}
+"""IDs of the equipment cards forbidding the attachment of a card having each restriction."""
+
+
+def _mask_of_ids(card_ids: tp.Iterable[int]) -> int:
+    mask = 0
+    for card_id in card_ids:
+        mask |= 1 << card_id
+    return mask
+
+
+EFFECT_MASKS: dict[EffectNames, int] = {
+    effect: _mask_of_ids(card_ids) for effect, card_ids in EFFECT_CARDS.items()
+}
+"""Mask of the IDs of the cards having each effect or restriction."""
+
+EQUIPMENT_MASK = _mask_of_ids(
+    card_id for card_id, major_type in enumerate(MAJOR_TYPES) if major_type == MajorType.EQUIPMENT
+)
+"""Mask of the equipment cards."""
+
+FIGURES_MASK = _mask_of_ids(
+    card_id for card_id in range(N_MAJORS, N_CARDS) if CARD_RANKS[card_id] in FIGURE_RANKS
+)
+"""Mask of the figures of all minor families."""
+
+EXCLUDED_EQUIPMENT: tuple[int, ...] = tuple(
+    _mask_of_ids(
+        excluded for effect in effects for excluded in _INCOMPATIBLE_EQUIPMENT.get(effect, ())
+    )
+    for effects in CARD_EFFECTS
+)
+"""
+Per card ID, mask of the equipment cards which, once attached to a combination,
+forbid attaching the card to it (NOT_COMPATIBLE_* restrictions).
+"""
+
+EXCLUDED_CARDS: tuple[int, ...] = tuple(
+    FIGURES_MASK if Restrictions.ANTI_ROYALIST in effects else 0 for effects in CARD_EFFECTS
+)
+"""
+Per card ID, mask of the minor cards a combination must not hold for the card
+to be attached to it (ANTI_ROYALIST restriction).
+"""
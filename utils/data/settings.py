@@ -2,7 +2,10 @@
 
 from enum import auto, IntEnum, StrEnum
 
-from base import Settings, check_type
+try:
+    from .base import Settings, check_type
+except ImportError:
+    from base import Settings, check_type
 
 
 class GameLanguage(Settings, StrEnum):
@@ -63,4 +66,4 @@ def check_settings(setting: type[Settings], value: str | int | Settings) -> None
     """
     check_type(value, "value", (str, int, Settings))
     if not setting.contains(value):
-        raise ValueError(f"{setting.name}: {value!r} {setting.get_error_msg()}.")
\ No newline at end of file
+        raise ValueError(f"{setting.__name__}: {value!r} {setting.get_error_msg()}.")
\ No newline at end of file
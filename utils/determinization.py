@@ -0,0 +1,252 @@
+"""
+Determinizations of a game: complete deals of the cards a player cannot see,
+consistent with everything this player observed, to be searched as if the game
+were of perfect information.
+
+What a player sees of the table is public (combinations, equipment, permanent
+cards, discard piles, sizes of every zone) or their own (hand, major pile). On
+top of that, a player may know where some hidden cards are: cards seen with the
+FORESIGHT effect, on top of the minor pile or in an opponent's hand, and the card
+an opponent stole from them. This knowledge is kept in the `Knowledge` of each
+player and outdated as soon as the cards it is about may have moved unseen.
+
+`DeterminizationSampler` works on bitmasks of card IDs (see `utils.bitboard`):
+the constraints are computed once per game state, then each sample only shuffles
+the IDs of the free hidden cards and slices them into the hidden zones.
+"""
+
+import random as rdm
+import typing as tp
+
+from dataclasses import dataclass
+
+try:
+    from .card import Card
+    from .bitboard import DEATH_BIT, MAJORS_MASK, MINORS_MASK, ids_of, mask_of
+    from .data.cards_table import N_CARDS
+except ImportError:
+    from card import Card
+    from bitboard import DEATH_BIT, MAJORS_MASK, MINORS_MASK, ids_of, mask_of
+    from data.cards_table import N_CARDS
+
+if tp.TYPE_CHECKING:
+    from .engine import Game
+
+
+_BITS: tuple[int, ...] = tuple(1 << card_id for card_id in range(N_CARDS))
+
+
+class Knowledge:
+    """
+    Hidden cards a player has seen, with what is needed to tell whether they
+    are still where they were seen.
+
+    Attributes
+    ----------
+
+    in_hands: dict[int, tuple[int, int]]
+        Per card ID, the seat of the player holding it and their number of unseen
+        losses (`Player.n_unseen_losses`) when it was seen. The card may have left
+        the hand unseen once this number changed.
+
+    pile_top: tuple[int, ...]
+        IDs of the cards seen on top of the minor cards draw pile, top card first.
+
+    pile_length, pile_rearrangements: int
+        Size of the pile and its number of rearrangements (`DrawPile.n_rearrangements`)
+        when its top cards were seen.
+    """
+    __slots__ = ("in_hands", "pile_top", "pile_length", "pile_rearrangements")
+
+    def __init__(self) -> None:
+        self.in_hands = {}
+        self.pile_top = ()
+        self.pile_length = 0
+        self.pile_rearrangements = 0
+
+    def sees_in_hand(self, card_id: int, seat: int, n_unseen_losses: int) -> None:
+        """The player sees that the card `card_id` is in the hand of player `seat`."""
+        self.in_hands[card_id] = (seat, n_unseen_losses)
+
+    def sees_pile_top(
+        self, card_ids: tp.Sequence[int], pile_length: int, n_rearrangements: int
+    ) -> None:
+        """The player sees the cards `card_ids` (top card first) on top of the minor pile."""
+        self.pile_top = tuple(card_ids)
+        self.pile_length = pile_length
+        self.pile_rearrangements = n_rearrangements
+
+    def copy(self) -> "Knowledge":
+        """Independent copy of the knowledge, e.g. to restore it later."""
+        knowledge = Knowledge()
+        knowledge.in_hands = self.in_hands.copy()
+        knowledge.sees_pile_top(self.pile_top, self.pile_length, self.pile_rearrangements)
+        return knowledge
+
+    def clear(self) -> None:
+        """Forget everything."""
+        self.in_hands.clear()
+        self.pile_top = ()
+
+
+@dataclass(frozen=True, slots=True)
+class World:
+    """
+    One complete deal of the hidden cards.
+
+    Attributes
+    ----------
+
+    hands, major_piles: tuple[int, ...]
+        Mask of the hand and of the major pile of each player, in seat order.
+
+    minor_draw, major_draw: tuple[int, ...]
+        IDs of the cards of the draw piles, bottom card first.
+    """
+    hands: tuple[int, ...]
+    major_piles: tuple[int, ...]
+    minor_draw: tuple[int, ...]
+    major_draw: tuple[int, ...]
+
+
+class DeterminizationSampler:
+    """
+    Sampler of the worlds consistent with what a player observed of a game,
+    all of them equally likely.
+
+    The constraints are read from the game when the sampler is created: create
+    a new sampler once the game changed.
+
+    Attributes
+    ----------
+
+    seat: int
+        Seat index of the observing player.
+
+    n_samples: int
+        Number of worlds sampled so far.
+    """
+    def __init__(self, game: "Game", seat: int, rng: rdm.Random | None = None) -> None:
+        """
+        Parameters
+        ----------
+        game: Game
+            Game to sample worlds of. Only what the player `seat` can see of it is used.
+
+        seat: int
+            Seat index of the observing player.
+
+        rng: random.Random, optional
+            Random generator used to sample. Defaults to a new generator
+            seeded from the `random` module.
+        """
+        self.seat = seat
+        self.rng = rng if rng is not None else rdm.Random(rdm.getrandbits(64))
+        self.n_samples = 0
+        self._cards = Card.all_by_id(game.language)
+
+        observer = game.players[seat]
+        seen = mask_of(observer.hand) | mask_of(observer.major_pile)
+        seen |= mask_of(game.minor_discard) | mask_of(game.action_discard)
+        for player in game.players:
+            seen |= mask_of(player.active_permanents) | mask_of(player.inactive_permanents)
+            for combination, equipment in zip(player.combinations, player.equipments):
+                seen |= mask_of(combination) | mask_of(equipment)
+        hidden_minors = (MINORS_MASK | DEATH_BIT) & ~seen
+        hidden_majors = MAJORS_MASK & ~DEATH_BIT & ~seen
+
+        self._others = [idx for idx in range(game.n_players) if idx != seat]
+        self._hand_sizes = [len(game.players[idx].hand) for idx in self._others]
+        self._major_sizes = [len(game.players[idx].major_pile) for idx in self._others]
+        self._minor_draw_size = len(game.minor_draw_pile)
+        self._major_draw_size = len(game.major_draw_pile)
+        assert hidden_minors.bit_count() == self._minor_draw_size + sum(self._hand_sizes), (
+            "Hidden minor cards do not match the hidden zones sizes."
+        )
+        assert hidden_majors.bit_count() == self._major_draw_size + sum(self._major_sizes), (
+            "Hidden major cards do not match the hidden zones sizes."
+        )
+
+        knowledge = observer.knowledge
+        self._known_hands = [0] * game.n_players
+        for card_id, (idx, n_unseen_losses) in knowledge.in_hands.items():
+            if (
+                idx != seat and hidden_minors >> card_id & 1
+                and game.players[idx].n_unseen_losses == n_unseen_losses
+            ):
+                self._known_hands[idx] |= _BITS[card_id]
+        self._known_top = self._valid_pile_top(game, knowledge, hidden_minors)
+
+        known = 0
+        for card_id in self._known_top:
+            known |= _BITS[card_id]
+        for mask in self._known_hands:
+            known |= mask
+        self._free_minors = list(ids_of(hidden_minors & ~known))
+        self._free_majors = list(ids_of(hidden_majors))
+        self._hands = [0] * game.n_players
+        self._hands[seat] = observer.hand_index.mask
+        self._major_piles = [0] * game.n_players
+        self._major_piles[seat] = mask_of(observer.major_pile)
+
+    @staticmethod
+    def _valid_pile_top(game: "Game", knowledge: Knowledge, hidden_minors: int) -> tuple[int, ...]:
+        """IDs of the cards still known to be on top of the minor pile, top card first."""
+        pile = game.minor_draw_pile
+        n_drawn = knowledge.pile_length - len(pile)
+        if pile.n_rearrangements != knowledge.pile_rearrangements or n_drawn < 0:
+            return ()
+        top = knowledge.pile_top[n_drawn:]
+        return top if all(hidden_minors >> card_id & 1 for card_id in top) else ()
+
+    def sample(self) -> World:
+        """A world consistent with the observations of the player, drawn uniformly."""
+        shuffle = self.rng.shuffle
+        bits = _BITS
+
+        minors = self._free_minors.copy()
+        shuffle(minors)
+        start = self._minor_draw_size - len(self._known_top)
+        minor_draw = tuple(minors[:start]) + self._known_top[::-1]
+        hands = self._hands.copy()
+        for idx, size in zip(self._others, self._hand_sizes):
+            mask = self._known_hands[idx]
+            stop = start + size - mask.bit_count()
+            for card_id in minors[start:stop]:
+                mask |= bits[card_id]
+            hands[idx] = mask
+            start = stop
+
+        majors = self._free_majors.copy()
+        shuffle(majors)
+        start = self._major_draw_size
+        major_draw = tuple(majors[:start])
+        major_piles = self._major_piles.copy()
+        for idx, size in zip(self._others, self._major_sizes):
+            mask = 0
+            for card_id in majors[start:start + size]:
+                mask |= bits[card_id]
+            major_piles[idx] = mask
+            start += size
+
+        self.n_samples += 1
+        return World(tuple(hands), tuple(major_piles), minor_draw, major_draw)
+
+    def samples(self, n_samples: int) -> tp.Iterator[World]:
+        """`n_samples` independent worlds."""
+        for _ in range(n_samples):
+            yield self.sample()
+
+    def deals(self, world: World, game: "Game") -> None:
+        """
+        Put the hidden cards of `game` where `world` says. `game` must be in the
+        state the sampler was created from, or a copy of it.
+        """
+        cards = self._cards
+        for idx in self._others:
+            player = game.players[idx]
+            player.replaces_hand([cards[card_id] for card_id in ids_of(world.hands[idx])])
+            player.major_pile = [cards[card_id] for card_id in ids_of(world.major_piles[idx])]
+        game.minor_draw_pile.cards_left = [cards[card_id] for card_id in world.minor_draw]
+        game.major_draw_pile.cards_left = [cards[card_id] for card_id in world.major_draw]
+        game.rehash()
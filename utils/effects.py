@@ -1,11 +1,418 @@
 """
 Class handling card effects resolution during the game.
+
+Each effect or restriction is mapped to a handler in `EFFECT_HANDLERS`, and the
+effects of each card are built once in `CARD_SPECIAL_EFFECTS`, so that resolving
+an effect is a single call to its stored handler.
+
+Handlers return an `Undo` record putting back what they changed, so that moves
+resolving effects are undone field by field (see `utils.moves`). Undo records
+must be called in reverse order of resolution, and do not rewind the random
+generators.
 """
 
+import functools
 import typing as tp
 
-from utils.data.effects_names import EffectNamesPack, EffectNames
-from player import Player
+try:
+    from .data.effects_names import (
+        EffectNamesPack, EffectNames, EFFECT_NAMES_INDEX, DirectEffects, Restrictions
+    )
+    from .data.majors_table import CARD_EFFECTS, MAJOR_TYPES, MajorType
+    from .combinations import HandIndex, find_combinations
+except ImportError:
+    from data.effects_names import (
+        EffectNamesPack, EffectNames, EFFECT_NAMES_INDEX, DirectEffects, Restrictions
+    )
+    from data.majors_table import CARD_EFFECTS, MAJOR_TYPES, MajorType
+    from combinations import HandIndex, find_combinations
+
+if tp.TYPE_CHECKING:
+    from .card import Card
+    from .card_piles import DrawPile
+    from .engine import Game
+    from .player import Player
+
+
+Undo = tp.Callable[[], None]
+"""Puts back what a resolved effect changed."""
+
+EffectHandler = tp.Callable[["Player", "Game | None", tp.Any, tp.Any], Undo]
+"""Signature of effect handlers: (player, game, target, choice) -> undo record."""
+
+EFFECT_HANDLERS: dict[EffectNames, EffectHandler] = {}
+"""Handler of each effect and restriction."""
+
+
+def handles(*effects: EffectNames) -> tp.Callable[[EffectHandler], EffectHandler]:
+    """Register the decorated function as the handler of given effects."""
+    def register(handler: EffectHandler) -> EffectHandler:
+        for effect in effects:
+            assert effect not in EFFECT_HANDLERS, f"{effect.name} already has a handler."
+            EFFECT_HANDLERS[effect] = handler
+        return handler
+    return register
+
+
+def chain_undos(undos: tp.Sequence[Undo]) -> Undo:
+    """Undo record calling `undos`, records of successive changes, in reverse order."""
+    def undo() -> None:
+        for step in reversed(undos):
+            step()
+    return undo
+
+
+def _nothing_to_undo() -> None:
+    pass
+
+
+def _keeps_length(cards: list) -> Undo:
+    """Undo record of cards appended to `cards`."""
+    length = len(cards)
+    def undo() -> None:
+        del cards[length:]
+    return undo
+
+
+def _keeps_pile(pile: "DrawPile") -> Undo:
+    cards, n_rearrangements = pile.cards_left.copy(), pile.n_rearrangements
+    def undo() -> None:
+        pile.cards_left[:] = cards
+        pile.n_rearrangements = n_rearrangements
+    return undo
+
+
+def _keeps_knowledge(player: "Player") -> Undo:
+    knowledge = player.knowledge.copy()
+    def undo() -> None:
+        player.knowledge = knowledge
+    return undo
+
+
+def _require_game(game: "Game | None", effect: EffectNames) -> "Game":
+    if game is None:
+        raise ValueError(f"The effect {effect.name} needs the game to be resolved.")
+    return game
+
+
+def _takes_hand(player: "Player") -> list["Card"]:
+    cards = list(player.hand)
+    player.removes_from_hand(cards, unseen=True)
+    return cards
+
+
+def _next_player(game: "Game", player: "Player") -> "Player":
+    return game.players[(game.players.index(player) + 1) % game.n_players]
+
+
+def _players_from(game: "Game", player: "Player") -> list["Player"]:
+    start = game.players.index(player)
+    return game.players[start:] + game.players[:start]
+
+
+# ===== Passive effects =====
+@handles(
+    DirectEffects.ALL_INCLUSIVE, DirectEffects.JOKER, DirectEffects.OUTLIER,
+    DirectEffects.PROTECTOR, DirectEffects.HYBRID, DirectEffects.DOUBLE_SCORE,
+    DirectEffects.OLD_MAID, DirectEffects.BLOCK, DirectEffects.MIRROR,
+    DirectEffects.GOD_SAVE_THE_QUEEN, *Restrictions
+)
+def _passive(player: "Player", game: "Game | None", target: tp.Any, choice: tp.Any) -> Undo:
+    """
+    Nothing happens when resolved: the effect applies while the card is in play,
+    through combination rules, scoring and attach legality, or in reaction to
+    another effect.
+    """
+    return _nothing_to_undo
+
+
+# ===== Effects changing the turn =====
+@handles(DirectEffects.DOUBLE_PLAY)
+def _double_play(player: "Player", game: "Game | None", target: tp.Any, choice: tp.Any) -> Undo:
+    """The player may play a second combination this turn."""
+    player.active_effects.append(CardEffect(DirectEffects.DOUBLE_PLAY))
+    return player.active_effects.pop
+
+
+@handles(DirectEffects.MEMORY_RECALL)
+def _memory_recall(player: "Player", game: "Game | None", target: tp.Any, choice: "Card") -> Undo:
+    """The player takes `choice` from the minor discard pile instead of drawing."""
+    game = _require_game(game, DirectEffects.MEMORY_RECALL)
+    position = game.minor_discard.index(choice)
+    del game.minor_discard[position]
+    player.adds_to_hand([choice])
+    player.active_effects.append(CardEffect(DirectEffects.MEMORY_RECALL))
+
+    def undo() -> None:
+        player.active_effects.pop()
+        player.removes_from_hand([choice])
+        game.minor_discard.insert(position, choice)
+    return undo
+
+
+@handles(DirectEffects.FORESIGHT)
+def _foresight(
+    player: "Player", game: "Game | None",
+    target: tuple[tuple["Player", "Card"], tuple["Player", "Card"]] | None,
+    choice: tp.Any
+) -> Undo:
+    """
+    While the minor pile is not empty, put its two top cards back in the order
+    `choice` (top first, unchanged if None). Afterwards, look at the cards of
+    `target` ((opponent, card), (opponent, card)) and swap them if `choice`.
+    """
+    game = _require_game(game, DirectEffects.FORESIGHT)
+    pile = game.minor_draw_pile
+    if len(pile) > 0:
+        undos = [_keeps_knowledge(player)]
+        if choice is not None:
+            undos.append(_keeps_pile(pile))
+            pile.reorder(list(choice))
+        player.knowledge.sees_pile_top(
+            [card.card_id for card in pile.peek(2)], len(pile), pile.n_rearrangements
+        )
+        return chain_undos(undos)
+
+    if target is None:
+        return _nothing_to_undo
+    (owner_a, card_a), (owner_b, card_b) = target
+    undos = [_keeps_knowledge(player)]
+    if choice:
+        undos.append(owner_a.saves_hand())
+        undos.append(owner_b.saves_hand())
+        owner_a.removes_from_hand([card_a], unseen=True)
+        owner_b.removes_from_hand([card_b], unseen=True)
+        owner_a.adds_to_hand([card_b])
+        owner_b.adds_to_hand([card_a])
+    for owner in (owner_a, owner_b):
+        seen = card_a if owner.hand_index.mask >> card_a.card_id & 1 else card_b
+        player.knowledge.sees_in_hand(
+            seen.card_id, game.players.index(owner), owner.n_unseen_losses
+        )
+    return chain_undos(undos)
+
+
+@handles(DirectEffects.ACCUMULATOR)
+def _accumulator(
+    player: "Player", game: "Game | None", target: "Player | None", choice: tp.Any
+) -> Undo:
+    """
+    Draw a minor card (from `target`'s hand once the minor pile is empty), add
+    its value to the player's bonus and discard it.
+    """
+    game = _require_game(game, DirectEffects.ACCUMULATOR)
+    pile = game.minor_draw_pile
+    if len(pile) > 0:
+        card = pile.draw(1)[0]
+        take_back = functools.partial(pile.puts_on_top, [card])
+    elif target is not None and not target.has_empty_hand():
+        card = player.rng.choice(target.hand)
+        take_back = target.saves_hand()
+        target.removes_from_hand([card], unseen=True)
+    else:
+        return _nothing_to_undo
+    player.score_sheet.bonus += card.score_value
+    game.minor_discard.append(card)
+
+    def undo() -> None:
+        game.minor_discard.pop()
+        player.score_sheet.bonus -= card.score_value
+        take_back()
+    return undo
+
+
+# ===== Effects on hands =====
+@handles(DirectEffects.EQUALIZER)
+def _equalizer(
+    player: "Player", game: "Game | None", target: tuple["Player", "Player"], choice: tp.Any
+) -> Undo:
+    """Shuffle the hands of the two `target` players and deal them back evenly."""
+    first, second = target
+    undos = [first.saves_hand(), second.saves_hand()]
+    if len(first.hand) > len(second.hand):
+        first, second = second, first
+    cards = _takes_hand(first) + _takes_hand(second)
+    player.rng.shuffle(cards)
+    half = len(cards) // 2
+    # The extra card goes to the player who had the fewest cards.
+    first.adds_to_hand(cards[half:])
+    second.adds_to_hand(cards[:half])
+    return chain_undos(undos)
+
+
+@handles(DirectEffects.ACCELERATE)
+def _accelerate(player: "Player", game: "Game | None", target: tp.Any, choice: tp.Any) -> Undo:
+    """
+    Every player, starting with this one, draws a minor card, or a random card
+    from their next neighbour's hand once the minor pile is empty.
+    """
+    game = _require_game(game, DirectEffects.ACCELERATE)
+    undos = [_keeps_pile(game.minor_draw_pile)]
+    undos.extend(other.saves_hand() for other in game.players)
+    for drawer in _players_from(game, player):
+        if len(game.minor_draw_pile) > 0:
+            drawer.draws_from(game.minor_draw_pile)
+        else:
+            neighbour = _next_player(game, drawer)
+            if neighbour is not drawer and not neighbour.has_empty_hand():
+                drawer.draws_from(neighbour)
+    return chain_undos(undos)
+
+
+@handles(DirectEffects.REDISTRIBUTION)
+def _redistribution(player: "Player", game: "Game | None", target: tp.Any, choice: tp.Any) -> Undo:
+    """
+    Every player shuffles their hand into the minor pile, then draws back as many
+    cards, starting with this player.
+    """
+    game = _require_game(game, DirectEffects.REDISTRIBUTION)
+    undos = [_keeps_pile(game.minor_draw_pile)]
+    undos.extend(other.saves_hand() for other in game.players)
+    players = _players_from(game, player)
+    counts = [len(other.hand) for other in players]
+    game.minor_draw_pile.puts_back([card for other in players for card in _takes_hand(other)])
+    for other, count in zip(players, counts):
+        if count:
+            other.draws_from(game.minor_draw_pile, count)
+    return chain_undos(undos)
+
+
+@handles(DirectEffects.EXCHANGE)
+def _exchange(player: "Player", game: "Game | None", target: "Player", choice: tp.Any) -> Undo:
+    """Swap the hands of the player and of the `target` opponent."""
+    undos = [player.saves_hand(), target.saves_hand()]
+    own, other = _takes_hand(player), _takes_hand(target)
+    player.adds_to_hand(other)
+    target.adds_to_hand(own)
+    return chain_undos(undos)
+
+
+@handles(DirectEffects.TURNOVER)
+def _turnover(player: "Player", game: "Game | None", target: tp.Any, choice: tp.Any) -> Undo:
+    """Every player passes their hand to their next neighbour."""
+    game = _require_game(game, DirectEffects.TURNOVER)
+    undos = [other.saves_hand() for other in game.players]
+    hands = [_takes_hand(other) for other in game.players]
+    for idx, hand in enumerate(hands):
+        game.players[(idx + 1) % game.n_players].adds_to_hand(hand)
+    return chain_undos(undos)
+
+
+# ===== Effects on cards in play =====
+@handles(DirectEffects.STEAL)
+def _steal(
+    player: "Player", game: "Game | None", target: tuple["Player", int], choice: tp.Any
+) -> Undo:
+    """Take the combination `target` (owner, combination index) with its equipment."""
+    owner, idx = target
+    if owner.is_protected(idx):
+        raise ValueError(f"The combination {owner.combinations[idx]} is protected by the Pope.")
+    undos = [owner.saves_combinations(), player.saves_combinations()]
+    cards, equipment = owner.removes_combination(idx)
+    player.receives_combination(cards, equipment)
+    return chain_undos(undos)
+
+
+@handles(DirectEffects.ANNIHILATOR)
+def _annihilator(
+    player: "Player", game: "Game | None", target: tuple["Player", "Card"], choice: tp.Any
+) -> Undo:
+    """
+    Cancel the major card `target` (owner, card). A permanent card becomes
+    inactive. An equipment card is discarded, and if the combination it equipped
+    is no longer valid, its owner replays the best combination of its cards,
+    without drawing a major card, and the rest is discarded.
+    """
+    game = _require_game(game, DirectEffects.ANNIHILATOR)
+    owner, card = target
+    if card in owner.active_permanents:
+        position = owner.active_permanents.index(card)
+        del owner.active_permanents[position]
+        owner.inactive_permanents.append(card)
+
+        def undo() -> None:
+            owner.inactive_permanents.pop()
+            owner.active_permanents.insert(position, card)
+        return undo
+
+    idx = owner.equipment_index(card)
+    if owner.is_protected(idx):
+        raise ValueError(f"The combination {owner.combinations[idx]} is protected by the Pope.")
+    undos = [
+        owner.saves_combinations(), _keeps_length(game.action_discard),
+        _keeps_length(game.minor_discard)
+    ]
+    owner.detaches_equipment(card, idx)
+    game.action_discard.append(card)
+    if owner.combination_at(idx) is not None:
+        return chain_undos(undos)
+
+    cards, equipment = owner.removes_combination(idx)
+    game.action_discard.extend(equipment)
+    best = max(
+        find_combinations(HandIndex(card.card_id for card in cards)),
+        key=lambda combination: combination.size, default=None
+    )
+    if best is not None:
+        kept = [card for card in cards if best.mask >> card.card_id & 1]
+        owner.receives_combination(kept, [])
+        cards = [card for card in cards if not best.mask >> card.card_id & 1]
+    game.minor_discard.extend(cards)
+    return chain_undos(undos)
+
+
+@handles(DirectEffects.REACTIVATION)
+def _reactivation(
+    player: "Player", game: "Game | None", target: tp.Any, choice: tuple["Card", tp.Any]
+) -> Undo:
+    """
+    Resolve again an action card from the action discard pile, `choice` being
+    (card, choice of its effects), on `target`.
+    """
+    game = _require_game(game, DirectEffects.REACTIVATION)
+    card, inner_choice = choice
+    if card not in game.action_discard:
+        raise ValueError(f"The card {card} is not in the action cards discard pile.")
+    return chain_undos([
+        effect.resolve(player, game, target, inner_choice)
+        for effect in CARD_SPECIAL_EFFECTS[card.card_id]
+    ])
+
+
+@handles(DirectEffects.RESURRECTION)
+def _resurrection(player: "Player", game: "Game | None", target: tp.Any, choice: "Card") -> Undo:
+    """
+    Reactivate `choice`: an inactive permanent card of the player turns active
+    again, a discarded equipment card goes back to the player's major pile.
+    """
+    if choice in player.inactive_permanents:
+        position = player.inactive_permanents.index(choice)
+        del player.inactive_permanents[position]
+        player.active_permanents.append(choice)
+
+        def undo() -> None:
+            player.active_permanents.pop()
+            player.inactive_permanents.insert(position, choice)
+        return undo
+
+    game = _require_game(game, DirectEffects.RESURRECTION)
+    if choice not in game.action_discard or MAJOR_TYPES[choice.card_id] != MajorType.EQUIPMENT:
+        raise ValueError(f"The card {choice} cannot be resurrected.")
+    position = game.action_discard.index(choice)
+    del game.action_discard[position]
+    player.adds_to_major_pile([choice])
+
+    def undo() -> None:
+        player.major_pile.pop()
+        game.action_discard.insert(position, choice)
+    return undo
+
+
+assert all(
+    effect in EFFECT_HANDLERS for effect_type in EffectNamesPack().effects_types
+    for effect in effect_type
+), "Some effects have no handler."
+
 
 class CardEffect:
     """An effect attached to a card."""
@@ -21,6 +428,18 @@ class CardEffect:
         """
         self.name: EffectNames = self._parse_name(name)
         self.description = self.name.value
+        self._handler = EFFECT_HANDLERS[self.name]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name.name!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CardEffect):
+            return NotImplemented
+        return self.name is other.name
+
+    def __hash__(self) -> int:
+        return hash(self.name)
 
     @classmethod
     def _parse_name(cls, name: str | EffectNames) -> EffectNames:
@@ -28,18 +447,21 @@ class CardEffect:
         if isinstance(name, EffectNames):
             return name
 
-        if cls.names_pack.contains(name):
-            for effect_type in cls.names_pack.effects_types:
-                if effect_type.contains(name):
-                    return effect_type(name)
+        effect_name = EFFECT_NAMES_INDEX.get(name)
+        if effect_name is not None:
+            return effect_name
 
         raise ValueError(
-                f"{cls.__name__}: {name!r} is not a valid card name."
+                f"{cls.__name__}: {name!r} is not a valid effect name."
             )
 
     def resolve(
-        self, player: Player, target: tp.Any | None = None, choice: str | None = None
-    ) -> None:
+        self,
+        player: "Player",
+        game: "Game | None" = None,
+        target: tp.Any | None = None,
+        choice: tp.Any | None = None
+    ) -> Undo:
         """
         Apply instructions of the effect.
         
@@ -47,8 +469,25 @@ class CardEffect:
         ----------
         player: Player
             Player activating the effect.
+        game: Game, optional
+            Game being played, needed by effects acting on piles or on all players.
         target: Any, optional
             Target of the effect, if needed.
-        choice: str, optional
+        choice: Any, optional
             Choice between several effect cases, if appliable.
-        """
\ No newline at end of file
+
+        Returns
+        -------
+        Undo:
+            Record putting back what the effect changed.
+
+        Random outcomes of the effect are drawn from `player.rng`, so that a game
+        only depends on its seed and on the decisions of its players.
+        """
+        return self._handler(player, game, target, choice)
+
+
+CARD_SPECIAL_EFFECTS: tuple[tuple[CardEffect, ...], ...] = tuple(
+    tuple(CardEffect(effect) for effect in effects) for effects in CARD_EFFECTS
+)
+"""Effects of each card by ID, built once. Empty for minor cards."""
@@ -0,0 +1,655 @@
+"""
+Exact solver for phase 2 endgames, and a bot playing them with it.
+
+Once the minor cards draw pile is empty, the only chance event of a turn is the
+card drawn at random from the hand of another player. With every hand known,
+the rest of the game is a tree of decisions of the players and of these draws,
+which the solver searches to the end with expectimax:
+
+- decision nodes: the active player maximizes the score margin of the player the
+  solver plays for (their score minus the best score of the others), the other
+  players minimize it (paranoid assumption, exact with two players left);
+- chance nodes: average over the cards of the robbed hand, all equally likely,
+  pruned with Star1 bounds (alpha-beta over chance nodes);
+- the value of each state reached at the start of a turn is memoized in a
+  `TranspositionTable` by Zobrist hash;
+- iterative deepening on the number of turns: each iteration gives a result,
+  exact once a search reaches the end of every line of play, and the search
+  stops at the time limit.
+
+As in `MCTSPolicy`, permanent cards are never activated, and major cards are
+revealed on the targets listed by `movegen`.
+The turn limit of the game is not part of the search: lines of play repeating
+forever are cut by the depth of the search.
+"""
+
+import math
+import random as rdm
+import time
+import typing as tp
+
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+try:
+    from .data.base import check_num_value
+    from .data.cards_table import N_CARDS, N_MAJORS, CARD_SCORES
+    from .data.effects_names import DirectEffects
+    from .card import Card
+    from .player import Player
+    from .scoring import OUTLIER_CARD_VALUE
+    from .engine import Game, GamePhase, simulate
+    from .moves import StealMove, CombinationMove, ExtensionMove, MajorDrawMove, EndTurnMove
+    from .movegen import DecisionPoint, effect_arguments, legal_actions, to_move
+    from .policies import Policy, PassivePolicy, GreedyPolicy, Decision, Activation, Reveal
+    from .zobrist import TranspositionTable, Bound
+    from .determinization import DeterminizationSampler
+except ImportError:
+    from data.base import check_num_value
+    from data.cards_table import N_CARDS, N_MAJORS, CARD_SCORES
+    from data.effects_names import DirectEffects
+    from card import Card
+    from player import Player
+    from scoring import OUTLIER_CARD_VALUE
+    from engine import Game, GamePhase, simulate
+    from moves import StealMove, CombinationMove, ExtensionMove, MajorDrawMove, EndTurnMove
+    from movegen import DecisionPoint, effect_arguments, legal_actions, to_move
+    from policies import Policy, PassivePolicy, GreedyPolicy, Decision, Activation, Reveal
+    from zobrist import TranspositionTable, Bound
+    from determinization import DeterminizationSampler
+
+if tp.TYPE_CHECKING:
+    import threading
+
+
+DEFAULT_TIME_LIMIT = 1.
+"""Default wall-clock time limit of a search, in seconds."""
+
+DEFAULT_MAX_DEPTH = 64
+"""Default maximum depth of a search, in turns."""
+
+SCORE_BOUND = 4 * OUTLIER_CARD_VALUE * (N_CARDS - N_MAJORS) + sum(CARD_SCORES)
+"""
+Bound of the score of a player: every minor card scored at the OUTLIER value
+with two DOUBLE_SCORE effects, plus every card value as bonus. Score margins
+are within plus or minus this bound.
+"""
+
+_COMPLETE = 1 << 30
+# Depth of the table entries of searches which reached the end of every line.
+
+_CHECK_PERIOD = 256
+# Number of nodes between two checks of the time limit.
+
+_PERSPECTIVE_KEYS = tuple(rdm.Random(0x5EED_E4D).getrandbits(64) for _ in range(6))
+# Mixed into the table keys: values depend on the player the solver plays for.
+
+
+class Stage(IntEnum):
+    """Decision points of a phase 2 turn the solver can start from."""
+    DRAW = 1
+    REVEAL = 2
+    COMBINATION = 3
+    SECOND_COMBINATION = 4
+    EXTENSION = 5
+
+
+class _Timeout(Exception):
+    """Raised inside the search when the time limit is reached."""
+
+
+@dataclass(frozen=True)
+class EndgameResult:
+    """
+    Outcome of a search.
+
+    Attributes
+    ----------
+
+    value: float
+        Expected score margin of the player the search was for, with the best
+        play of everyone from the searched state.
+
+    best: Decision
+        Best option of the decision the search started from, in the format of
+        the decisions log.
+
+    option_values: dict[Decision, float]
+        Value of each option of this decision.
+
+    depth: int
+        Depth of the deepest finished iteration, in turns.
+
+    exact: bool
+        Whether the search reached the end of every line of play, in which case
+        `value` is the exact value of the state.
+
+    nodes: int
+        Number of nodes searched, over all iterations.
+
+    elapsed: float
+        Wall-clock time of the search, in seconds.
+    """
+    value: float
+    best: Decision
+    option_values: dict[Decision, float] = field(default_factory=dict)
+    depth: int = 0
+    exact: bool = False
+    nodes: int = 0
+    elapsed: float = 0.
+
+
+class EndgameSolver:
+    """
+    Expectimax search of phase 2 states with every hand known.
+
+    Attributes
+    ----------
+
+    time_limit: float
+        Wall-clock time limit of a search, in seconds. The first iteration
+        always finishes, whatever its duration.
+
+    max_depth: int
+        Maximum depth of a search, in turns.
+
+    table: TranspositionTable
+        Memoized values, kept from one search to the next and possibly shared
+        with other solvers.
+
+    nodes: int
+        Number of nodes searched since the solver was created.
+    """
+    def __init__(
+        self,
+        time_limit: float = DEFAULT_TIME_LIMIT,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        table: TranspositionTable | None = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        time_limit: float
+            Wall-clock time limit of a search, in seconds. Defaults to `DEFAULT_TIME_LIMIT`.
+
+        max_depth: int
+            Maximum depth of a search, in turns. Defaults to `DEFAULT_MAX_DEPTH`.
+
+        table: TranspositionTable, optional
+            Table to memoize values in. Defaults to a new table.
+        """
+        check_num_value(time_limit, "time_limit", ">", 0)
+        check_num_value(max_depth, "max_depth", ">", 0)
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = table if table is not None else TranspositionTable()
+        self.nodes = 0
+        self._copies: dict[tuple[str, int], Game] = {}
+        self._game: Game | None = None
+        self._cards: tuple[Card, ...] = ()
+        self._seat = 0
+        self._perspective = 0
+        self._deadline = math.inf
+        self._stop_at = math.inf
+        self._stop: "threading.Event | None" = None
+        self._root_values: dict[Decision, float] | None = None
+        self._root_best: Decision = None
+
+    def __getstate__(self) -> dict[str, tp.Any]:
+        # Game copies are caches, not worth sending to other processes.
+        state = self.__dict__.copy()
+        state.update(_copies={}, _game=None, _stop=None)
+        return state
+
+    def stops_at(self, deadline: float = math.inf, stop: "threading.Event | None" = None) -> None:
+        """
+        Stop the next searches at `deadline` (`time.perf_counter` time) or once
+        `stop` is set, with the result of the last complete iteration.
+        """
+        self._stop_at = deadline
+        self._stop = stop
+
+    @property
+    def is_stopped(self) -> bool:
+        """Whether the searches were asked to stop, see `stops_at`."""
+        return time.perf_counter() >= self._stop_at or self._stop is not None and self._stop.is_set()
+
+    def solve(
+        self,
+        game: Game,
+        stage: Stage = Stage.DRAW,
+        seat: int | None = None,
+        deal: tp.Callable[[Game], None] | None = None
+    ) -> EndgameResult:
+        """
+        Search the state of `game` for the best option of the active player.
+
+        Parameters
+        ----------
+
+        game: Game
+            Game in phase 2, not changed by the search.
+
+        stage: Stage
+            Decision of the turn of the active player to start from. The earlier
+            steps of the turn must have been played. Defaults to the draw.
+
+        seat: int, optional
+            Seat index of the player the values are for. Defaults to the active player.
+
+        deal: Callable[[Game], None], optional
+            Called on the copy of the game the search runs on, e.g. to deal it
+            the hidden cards of a determinization.
+
+        Returns
+        -------
+
+        EndgameResult:
+            Value of the state and best option of the decision `stage`.
+        """
+        if game.phase is not GamePhase.PHASE_2:
+            raise ValueError(f"{self.__class__.__name__}: the game is not in phase 2.")
+
+        start = time.perf_counter()
+        copy = self._copy_of(game)
+        copy.restore(game.snapshot())
+        copy.moves.clear()
+        if deal is not None:
+            deal(copy)
+        self._game = copy
+        self._cards = Card.all_by_id(game.language)
+        self._seat = game.active_player_idx if seat is None else seat
+        self._perspective = _PERSPECTIVE_KEYS[self._seat]
+        self.table.new_search()
+
+        snapshot = copy.snapshot()
+        nodes = self.nodes
+        result = None
+        for depth in range(1, self.max_depth + 1):
+            self._deadline = (
+                math.inf if result is None else min(start + self.time_limit, self._stop_at)
+            )
+            values: dict[Decision, float] = {}
+            self._root_values, self._root_best = values, None
+            try:
+                value, complete = self._stage(stage, depth, -SCORE_BOUND, SCORE_BOUND)
+            except _Timeout:
+                copy.restore(snapshot)
+                copy.moves.clear()
+                break
+            result = EndgameResult(
+                value, self._root_best, values, depth, complete,
+                self.nodes - nodes, time.perf_counter() - start
+            )
+            if complete or time.perf_counter() >= start + self.time_limit or self.is_stopped:
+                break
+
+        assert result is not None, "type checker assertion, never triggered."
+        self._root_values = None
+        return EndgameResult(
+            result.value, result.best, result.option_values, result.depth, result.exact,
+            self.nodes - nodes, time.perf_counter() - start
+        )
+
+    def _copy_of(self, game: Game) -> Game:
+        key = (game.language, game.n_players)
+        if key not in self._copies:
+            self._copies[key] = Game(
+                game.language, [PassivePolicy()] * game.n_players,
+                max_turns=game.max_turns, seed=0
+            )
+        return self._copies[key]
+
+    # ===== Search =====
+    def _utility(self) -> float:
+        scores = [player.count_score() for player in self._game.players]
+        own = scores.pop(self._seat)
+        return own - max(scores, default=0)
+
+    def _is_over(self) -> bool:
+        return sum(not player.has_empty_hand() for player in self._game.players) < 2
+
+    def _count_node(self) -> None:
+        self.nodes += 1
+        if self.nodes % _CHECK_PERIOD == 0 and self._deadline < math.inf and (
+            time.perf_counter() >= self._deadline or self._stop is not None and self._stop.is_set()
+        ):
+            raise _Timeout
+
+    def _turn(self, depth: int, alpha: float, beta: float) -> tuple[float, bool]:
+        """Value of the state at the start of a turn, and whether it is exact."""
+        self._count_node()
+        if self._is_over():
+            return self._utility(), True
+        if depth == 0:
+            return self._utility(), False
+
+        game = self._game
+        key = game.zobrist ^ self._perspective
+        entry = self.table.get(key)
+        if entry is not None and entry.depth >= depth:
+            complete = entry.depth == _COMPLETE
+            if entry.bound == Bound.EXACT:
+                return entry.value, complete
+            if entry.bound == Bound.LOWER and entry.value >= beta:
+                return entry.value, complete
+            if entry.bound == Bound.UPPER and entry.value <= alpha:
+                return entry.value, complete
+
+        value, complete = self._stage(Stage.DRAW, depth, alpha, beta)
+        if value <= alpha:
+            bound = Bound.UPPER
+        elif value >= beta:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        self.table.store(key, _COMPLETE if complete else depth, value, bound)
+        return value, complete
+
+    def _choose(
+        self,
+        options: tp.Sequence[Decision],
+        play: tp.Callable[[Decision, float, float], tuple[float, bool]],
+        alpha: float,
+        beta: float
+    ) -> tuple[float, bool]:
+        """Decision node of the active player, `play` giving the value of each option."""
+        root_values, self._root_values = self._root_values, None
+        maximizing = self._game.active_player_idx == self._seat
+        best = -math.inf if maximizing else math.inf
+        complete = True
+        for option in options:
+            if root_values is not None:
+                # Each option of the root decision gets its exact value.
+                value, done = play(option, -SCORE_BOUND, SCORE_BOUND)
+                root_values[option] = value
+                if value > best if maximizing else value < best:
+                    self._root_best = option
+            else:
+                value, done = play(option, alpha, beta)
+            complete &= done
+            if maximizing:
+                best = max(best, value)
+                alpha = max(alpha, value)
+            else:
+                best = min(best, value)
+                beta = min(beta, value)
+            if alpha >= beta and root_values is None:
+                break
+        return best, complete
+
+    def _stage(self, stage: Stage, depth: int, alpha: float, beta: float) -> tuple[float, bool]:
+        """Value of the state at given decision of the turn of the active player."""
+        game = self._game
+        seat = game.active_player_idx
+        player = game.players[seat]
+
+        if stage == Stage.DRAW:
+            candidates = [
+                idx for idx, other in enumerate(game.players)
+                if idx != seat and not other.has_empty_hand()
+            ]
+            if player.has_active_effect(DirectEffects.MEMORY_RECALL) or not candidates:
+                return self._stage(Stage.REVEAL, depth, alpha, beta)
+            return self._choose(
+                candidates, lambda target, a, b: self._steal(target, depth, a, b), alpha, beta
+            )
+
+        if stage == Stage.REVEAL:
+            if not player.has_unused_majors():
+                return self._stage(Stage.COMBINATION, depth, alpha, beta)
+            options = [None, *legal_actions(game, DecisionPoint.REVEAL)[1:]]
+            return self._choose(
+                options, lambda option, a, b: self._reveal(option, depth, a, b), alpha, beta
+            )
+
+        if stage in (Stage.COMBINATION, Stage.SECOND_COMBINATION):
+            options = [None, *(
+                tuple(card.card_id for card in player.cards_in_hand(combination.mask))
+                for combination in player.possible_combinations()
+            )]
+            return self._choose(
+                options, lambda option, a, b: self._combination(stage, option, depth, a, b),
+                alpha, beta
+            )
+
+        options = [None, *(
+            (idx, *(card.card_id for card in player.cards_in_hand(combination.mask)))
+            for idx, combination in player.possible_extensions()
+        )]
+        return self._choose(
+            options, lambda option, a, b: self._extension(option, depth, a, b), alpha, beta
+        )
+
+    def _steal(self, target_idx: int, depth: int, alpha: float, beta: float) -> tuple[float, bool]:
+        """Chance node of the draw from the hand of `target_idx`, with Star1 pruning."""
+        self._count_node()
+        game = self._game
+        seat = game.active_player_idx
+        hand = list(game.players[target_idx].hand)
+        n_cards = len(hand)
+        total, complete = 0., True
+        for k, card in enumerate(hand):
+            left = n_cards - k - 1
+            child_alpha = max(-SCORE_BOUND, n_cards * alpha - total - left * SCORE_BOUND)
+            child_beta = min(SCORE_BOUND, n_cards * beta - total + left * SCORE_BOUND)
+            game.apply(StealMove(seat, target_idx, card))
+            value, done = self._stage(Stage.REVEAL, depth, child_alpha, child_beta)
+            game.undo()
+            total += value
+            complete &= done
+            upper = (total + left * SCORE_BOUND) / n_cards
+            if upper <= alpha:
+                return upper, complete
+            lower = (total - left * SCORE_BOUND) / n_cards
+            if lower >= beta:
+                return lower, complete
+        return total / n_cards, complete
+
+    def _reveal(
+        self, option: Decision, depth: int, alpha: float, beta: float
+    ) -> tuple[float, bool]:
+        if option is None:
+            return self._stage(Stage.COMBINATION, depth, alpha, beta)
+        game = self._game
+        move = to_move(game, tp.cast(int, option))
+        assert move is not None, "type checker assertion, never triggered."
+        game.apply(move)
+        result = self._stage(Stage.COMBINATION, depth, alpha, beta)
+        game.undo()
+        return result
+
+    def _combination(
+        self, stage: Stage, option: Decision, depth: int, alpha: float, beta: float
+    ) -> tuple[float, bool]:
+        game = self._game
+        seat = game.active_player_idx
+        player = game.players[seat]
+        if option is None:
+            if stage == Stage.COMBINATION and player.has_combinations():
+                return self._stage(Stage.EXTENSION, depth, alpha, beta)
+            return self._end_turn(depth, alpha, beta)
+
+        game.apply(CombinationMove(seat, [self._cards[card_id] for card_id in option]))
+        n_moves = 1
+        if stage == Stage.COMBINATION and player.has_active_effect(DirectEffects.DOUBLE_PLAY):
+            result = self._stage(Stage.SECOND_COMBINATION, depth, alpha, beta)
+        else:
+            if stage == Stage.SECOND_COMBINATION and len(game.major_draw_pile) > 0:
+                # Each combination played gives a major card.
+                game.apply(MajorDrawMove(seat))
+                n_moves += 1
+            result = self._end_turn(depth, alpha, beta)
+        game.undo(n_moves)
+        return result
+
+    def _extension(
+        self, option: Decision, depth: int, alpha: float, beta: float
+    ) -> tuple[float, bool]:
+        if option is None:
+            return self._end_turn(depth, alpha, beta)
+        game = self._game
+        idx, *card_ids = option
+        game.apply(ExtensionMove(
+            game.active_player_idx, idx, [self._cards[card_id] for card_id in card_ids]
+        ))
+        result = self._end_turn(depth, alpha, beta)
+        game.undo()
+        return result
+
+    def _end_turn(self, depth: int, alpha: float, beta: float) -> tuple[float, bool]:
+        """Major draw step and end of the turn, then the next turn."""
+        game = self._game
+        seat = game.active_player_idx
+        n_moves = 1
+        if game.players[seat].has_played_combination() and len(game.major_draw_pile) > 0:
+            game.apply(MajorDrawMove(seat))
+            n_moves += 1
+        game.apply(EndTurnMove(seat))
+        result = self._turn(depth - 1, alpha, beta)
+        game.undo(n_moves)
+        return result
+
+
+class EndgamePolicy(Policy):
+    """
+    Bot playing phase 2 with `EndgameSolver`, and phase 1 with another policy.
+
+    Unless omniscient, the bot does not look at the hidden cards: it solves
+    several determinizations of the game (see `DeterminizationSampler`) and
+    takes the option of best average value.
+
+    Attributes
+    ----------
+
+    solver: EndgameSolver
+        Solver of the bot. Its time limit is shared by the determinizations.
+
+    last_result: EndgameResult or None
+        Result of the last search, for the last determinization.
+    """
+    def __init__(
+        self,
+        time_limit: float = DEFAULT_TIME_LIMIT,
+        fallback: Policy | None = None,
+        omniscient: bool = False,
+        n_worlds: int = 4,
+        table: TranspositionTable | None = None,
+        rng: rdm.Random | None = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        time_limit: float
+            Wall-clock time limit of each decision, in seconds. Defaults to
+            `DEFAULT_TIME_LIMIT`.
+
+        fallback: Policy, optional
+            Policy of the phase 1 decisions. Defaults to `GreedyPolicy`.
+
+        omniscient: bool
+            Whether the bot sees the hands of the other players. Defaults to False.
+
+        n_worlds: int
+            Number of determinizations solved for each decision, when not omniscient.
+
+        table: TranspositionTable, optional
+            Table to memoize values in. Defaults to a new table.
+
+        rng: random.Random, optional
+            Random generator of the policy. Defaults to a new generator seeded
+            from the `random` module.
+        """
+        check_num_value(n_worlds, "n_worlds", ">", 0)
+        self.fallback = fallback if fallback is not None else GreedyPolicy()
+        self.omniscient = omniscient
+        self.n_worlds = 1 if omniscient else n_worlds
+        self.solver = EndgameSolver(time_limit / self.n_worlds, table=table)
+        self.rng = rng if rng is not None else rdm.Random(rdm.getrandbits(64))
+        self.last_result: EndgameResult | None = None
+
+    def reseed(self, seed: int) -> None:
+        self.rng.seed(seed)
+        self.fallback.reseed(self.rng.getrandbits(64))
+
+    def stops_at(self, deadline: float = math.inf, stop: "threading.Event | None" = None) -> None:
+        self.solver.stops_at(deadline, stop)
+
+    def _best(self, game: Game, stage: Stage) -> Decision:
+        """Best option of the decision `stage` of the active player."""
+        if self.omniscient:
+            self.last_result = self.solver.solve(game, stage)
+            return self.last_result.best
+
+        sampler = DeterminizationSampler(game, game.active_player_idx, self.rng)
+        totals: dict[Decision, float] = {}
+        for _ in range(self.n_worlds):
+            self.last_result = self.solver.solve(
+                game, stage, deal=lambda copy: sampler.deals(sampler.sample(), copy)
+            )
+            for option, value in self.last_result.option_values.items():
+                totals[option] = totals.get(option, 0.) + value
+            if self.solver.is_stopped:
+                break
+        return max(totals, key=totals.__getitem__) if totals else None
+
+    # ===== Decisions =====
+    def wants_to_activate(self, player: Player, card: Card, game: Game) -> Activation:
+        if game.phase is GamePhase.PHASE_1:
+            return self.fallback.wants_to_activate(player, card, game)
+        return False
+
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: Game
+    ) -> Player:
+        if len(candidates) == 1:
+            return candidates[0]
+        target = self._best(game, Stage.DRAW)
+        return game.players[target] if target is not None else candidates[0]
+
+    def chooses_major_to_reveal(self, player: Player, game: Game) -> Reveal | None:
+        if game.phase is GamePhase.PHASE_1:
+            return self.fallback.chooses_major_to_reveal(player, game)
+        action = self._best(game, Stage.REVEAL)
+        return None if action is None else effect_arguments(game, tp.cast(int, action))
+
+    def chooses_combination(self, player: Player, game: Game) -> list[Card] | None:
+        if game.phase is GamePhase.PHASE_1:
+            return self.fallback.chooses_combination(player, game)
+        if not player.possible_combinations():
+            return None
+        stage = Stage.SECOND_COMBINATION if player.has_played_combination() else Stage.COMBINATION
+        card_ids = self._best(game, stage)
+        cards = Card.all_by_id(game.language)
+        return None if card_ids is None else [cards[card_id] for card_id in card_ids]
+
+    def chooses_extension(
+        self, player: Player, game: Game
+    ) -> tuple[int, list[Card]] | None:
+        if game.phase is GamePhase.PHASE_1:
+            return self.fallback.chooses_extension(player, game)
+        if not player.possible_extensions():
+            return None
+        option = self._best(game, Stage.EXTENSION)
+        if option is None:
+            return None
+        idx, *card_ids = option
+        cards = Card.all_by_id(game.language)
+        return idx, [cards[card_id] for card_id in card_ids]
+
+
+if __name__ == "__main__":
+    for bot_name, bot in (("Greedy", GreedyPolicy()), ("Endgame", EndgamePolicy(time_limit=0.05))):
+        report = simulate(
+            20, "english", [bot, GreedyPolicy(), GreedyPolicy()], max_turns=150, seed=0
+        )
+        wins = sum(0 in result.winners for result in report.results)
+        margin = sum(
+            result.scores[0] - max(result.scores[1:]) for result in report.results
+        ) / report.n_games
+        print(
+            f"{bot_name} bot won {wins}/{report.n_games} games against two greedy bots, "
+            f"average score margin {margin:+.1f}."
+        )
@@ -0,0 +1,522 @@
+"""
+Headless game engine: play full games without any console input or output,
+each player being driven by a `Policy` instead of a human.
+"""
+
+import random as rdm
+import time
+import typing as tp
+
+from dataclasses import dataclass
+from enum import IntEnum
+
+try:
+    from .data.base import check_num_value
+    from .data.settings import check_settings, GameLanguage
+    from .data.effects_names import DirectEffects
+    from .card import Card
+    from .player import Player
+    from .card_piles import (
+        MajorCardsDrawPile, MinorCardsDrawPile,
+        MinorCardsDiscardPile, ActionCardsDiscardPile
+    )
+    from .policies import Policy, PassivePolicy, ScriptedPolicy, Decision
+    from .game_state import GameState
+    from .zobrist import hash_game
+    from .movegen import activation_action, reveal_action
+    from .moves import (
+        Move, DrawMove, MajorDrawMove, StealMove, CombinationMove, ExtensionMove,
+        RevealMove, ActivationMove, EndTurnMove
+    )
+except ImportError:
+    from data.base import check_num_value
+    from data.settings import check_settings, GameLanguage
+    from data.effects_names import DirectEffects
+    from card import Card
+    from player import Player
+    from card_piles import (
+        MajorCardsDrawPile, MinorCardsDrawPile,
+        MinorCardsDiscardPile, ActionCardsDiscardPile
+    )
+    from policies import Policy, PassivePolicy, ScriptedPolicy, Decision
+    from game_state import GameState
+    from zobrist import hash_game
+    from movegen import activation_action, reveal_action
+    from moves import (
+        Move, DrawMove, MajorDrawMove, StealMove, CombinationMove, ExtensionMove,
+        RevealMove, ActivationMove, EndTurnMove
+    )
+
+
+DEFAULT_MAX_TURNS = 500
+"""Turn limit after which a game is stopped, as phase 2 may otherwise never end."""
+
+
+class GamePhase(IntEnum):
+    """Phases of a game."""
+    PHASE_1 = 1
+    PHASE_2 = 2
+
+
+class TurnStep(IntEnum):
+    """Steps of a turn, in order."""
+    ACTIVATION = 1
+    DRAW = 2
+    REVEAL = 3
+    COMBINATION = 4
+    MAJOR_DRAW = 5
+
+
+@dataclass(frozen=True)
+class GameResult:
+    """
+    Outcome of one finished game.
+
+    Attributes
+    ----------
+
+    scores: tuple[int, ...]
+        Final score of each player, in seat order.
+
+    winners: tuple[int, ...]
+        Seat indices of the players having the best score.
+
+    n_turns: int
+        Total number of turns played.
+
+    n_phase_1_turns: int
+        Number of turns played before the minor cards draw pile was depleted.
+
+    truncated: bool
+        Whether the game was stopped by the turn limit instead of ending normally.
+
+    seed: int
+        Seed of the game, to replay it with `Game.replay`.
+    """
+    scores: tuple[int, ...]
+    winners: tuple[int, ...]
+    n_turns: int
+    n_phase_1_turns: int
+    truncated: bool
+    seed: int
+
+
+class Game:
+    """
+    One game, run turn by turn following the steps of `main.play_game`.
+
+    A game is fully defined by its settings, its seed and the decisions of its
+    players: every random event (shuffles, draws in other players' hands,
+    effects outcomes) comes from the game generator, and every decision is
+    recorded, so that any game can be replayed exactly with `Game.replay`.
+
+    Attributes
+    ----------
+
+    players: list[Player]
+        Players in seat order.
+
+    policies: list[Policy]
+        Decision maker of each player, in seat order.
+
+    phase: GamePhase
+        Current phase of the game.
+
+    turn: int
+        Number of turns played so far.
+
+    seed: int
+        Seed of the game random generator `rng`.
+
+    decisions: list[Decision]
+        Every decision taken by the players so far, in game order.
+
+    moves: list[Move]
+        Every move applied to the game and not undone, in game order. Doubles as
+        the move log of the game and as the undo stack of searches.
+    """
+    def __init__(
+        self,
+        language: str,
+        policies: tp.Sequence[Policy],
+        names: tp.Sequence[str] | None = None,
+        max_turns: int = DEFAULT_MAX_TURNS,
+        seed: int | None = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        language: str
+            Language setting for the cards names.
+
+        policies: Sequence[Policy]
+            One policy per player, in seat order (6 players max).
+
+        names: Sequence[str], optional
+            Names of the players. Defaults to 'Player 1', 'Player 2', ...
+
+        max_turns: int
+            Number of turns after which the game is stopped. Defaults to
+            `DEFAULT_MAX_TURNS`.
+
+        seed: int, optional
+            Seed of the game. Defaults to a seed drawn from the `random` module.
+        """
+        check_settings(GameLanguage, language)
+        check_num_value(len(policies), "len(policies)", ">=", 1)
+        check_num_value(len(policies), "len(policies)", "<=", 6)
+        check_num_value(max_turns, "max_turns", ">", 0)
+
+        if names is None:
+            names = [f"Player {idx}" for idx in range(1, len(policies) + 1)]
+        check_num_value(len(names), "len(names)", "==", len(policies))
+
+        self.language = language
+        self.seed = seed if seed is not None else rdm.getrandbits(64)
+        self.rng = rdm.Random(self.seed)
+        self.policies = list(policies)
+        self.players = [Player(name, language, rng=self.rng) for name in names]
+        self.max_turns = max_turns
+        self.decisions: list[Decision] = []
+        self.moves: list[Move] = []
+
+        # 1.1) Generate a full, randomly shuffled card pile for minor cards.
+        self.minor_draw_pile = MinorCardsDrawPile(language, rng=self.rng)
+        self.minor_discard = MinorCardsDiscardPile(language)
+        # 1.2) Generate a full, randomly shuffled card pile for major cards.
+        self.major_draw_pile = MajorCardsDrawPile(language, rng=self.rng)
+        self.action_discard = ActionCardsDiscardPile(language)
+        # 1.3) Distribute 5 minor cards to each player.
+        init_hands = self.minor_draw_pile.distribute(self.n_players, 5)
+        # 1.4) Distribute 1 major card to each player.
+        init_majors = self.major_draw_pile.distribute(self.n_players, 1)
+
+        for idx, player in enumerate(self.players):
+            player.adds_to_hand(init_hands[idx])
+            player.adds_to_major_pile(init_majors[idx])
+
+        self.phase = GamePhase.PHASE_1
+        self.active_player_idx = 0
+        self.turn = 0
+        self.n_phase_1_turns = 0
+        # Zobrist hash of the state, kept up to date by `apply` and `undo`.
+        self.zobrist = hash_game(self)
+
+    @classmethod
+    def replay(
+        cls,
+        language: str,
+        n_players: int,
+        seed: int,
+        decisions: tp.Iterable[Decision],
+        max_turns: int = DEFAULT_MAX_TURNS
+    ) -> tp.Self:
+        """
+        Rebuild a game from its settings, its seed and its recorded decisions.
+        The returned game is not played yet: call `play` or `play_turn` on it to
+        go through the recorded game again.
+        """
+        policy = ScriptedPolicy(decisions)
+        return cls(language, [policy] * n_players, max_turns=max_turns, seed=seed)
+
+    @property
+    def n_players(self) -> int:
+        """Number of players in the game."""
+        return len(self.players)
+
+    @property
+    def active_player(self) -> Player:
+        """Player whose turn it is."""
+        return self.players[self.active_player_idx]
+
+    def snapshot(self, include_rng: bool = False) -> bytes:
+        """
+        Compact encoding of the current state of the game (see `GameState`).
+        Include the state of the random generator to resume the game exactly.
+        """
+        return GameState.from_game(self, include_rng).to_bytes()
+
+    def restore(self, snapshot: bytes) -> None:
+        """Put the game back in the state encoded by `snapshot`."""
+        GameState.from_bytes(snapshot).restore(self)
+        self.rehash()
+
+    def rehash(self) -> None:
+        """
+        Recompute the Zobrist hash of the game, after its state was changed
+        otherwise than with moves.
+        """
+        self.zobrist = hash_game(self)
+
+    def is_over(self) -> bool:
+        """
+        Whether the game is finished: in phase 2, when less than two players
+        still have cards in hand, or when the turn limit is reached.
+        """
+        if self.turn >= self.max_turns:
+            return True
+
+        if self.phase is GamePhase.PHASE_2:
+            return sum(not player.has_empty_hand() for player in self.players) < 2
+
+        return False
+
+    def play(self) -> GameResult:
+        """Play turns until the game is over and return its result."""
+        while not self.is_over():
+            self.play_turn()
+
+        return self.result()
+
+    def play_turn(self, from_step: TurnStep = TurnStep.ACTIVATION) -> None:
+        """
+        Play the turn of the active player and pass to the next one. Starting
+        from a later step resumes a turn whose first steps were already played,
+        e.g. in a copy of a game taken in the middle of a turn.
+        """
+        player = self.active_player
+        policy = self.policies[self.active_player_idx]
+
+        if from_step <= TurnStep.ACTIVATION:
+            self._activation_step(player, policy)
+        if from_step <= TurnStep.DRAW:
+            self._draw_step(player, policy)
+        if from_step <= TurnStep.REVEAL:
+            self._reveal_step(player, policy)
+        if from_step <= TurnStep.COMBINATION:
+            self._combination_step(player, policy)
+        self._major_draw_step(player)
+
+        self.apply(EndTurnMove(self.active_player_idx))
+
+    def end_turn(self) -> None:
+        """End the turn of the active player and pass to the next one."""
+        self.active_player.ends_turn()
+        self.turn += 1
+
+        # 2.6) If all minor cards have been drawn, pass to phase 2.
+        if self.phase is GamePhase.PHASE_1 and len(self.minor_draw_pile) == 0:
+            self.phase = GamePhase.PHASE_2
+            self.n_phase_1_turns = self.turn
+
+        self._pass_to_next_player()
+
+    def apply(self, move: Move) -> None:
+        """Apply a move to the game and push it on the move stack."""
+        before = self.zobrist
+        move.apply(self)
+        delta = move.hash_delta(self)
+        if delta is None:
+            delta = before ^ hash_game(self)
+        move._hash_delta = delta
+        self.zobrist = before ^ delta
+        self.moves.append(move)
+
+    def undo(self, n_moves: int = 1) -> None:
+        """Undo the last moves applied to the game, most recent first."""
+        for _ in range(n_moves):
+            move = self.moves.pop()
+            zobrist = self.zobrist ^ move._hash_delta
+            move.undo(self)
+            self.zobrist = zobrist
+
+    def result(self) -> GameResult:
+        """Scores and statistics of the game in its current state."""
+        scores = tuple(player.count_score() for player in self.players)
+        best = max(scores)
+
+        return GameResult(
+            scores=scores,
+            winners=tuple(idx for idx, score in enumerate(scores) if score == best),
+            n_turns=self.turn,
+            n_phase_1_turns=(
+                self.n_phase_1_turns if self.phase is GamePhase.PHASE_2 else self.turn
+            ),
+            truncated=self.turn >= self.max_turns,
+            seed=self.seed
+        )
+
+    # 2.1) Turn step 1: Activation of revealed Permanent cards.
+    # 3.1) Turn step 1: Activation of revealed Permanent cards (possible alternative drawing effect).
+    def _activation_step(self, player: Player, policy: Policy) -> None:
+        for active_perm in list(player.active_permanents):
+            activation = policy.wants_to_activate(player, active_perm, self)
+            if not activation:
+                self.decisions.append(False)
+                continue
+            target, choice = (None, None) if activation is True else activation
+            self.decisions.append(activation_action(self, active_perm, target, choice))
+            self.apply(ActivationMove(self.active_player_idx, active_perm, target, choice))
+
+    # 2.2) Turn step 2: Draw a minor card.
+    # 3.2) Turn step 2: Draw a random card in a player hand.
+    def _draw_step(self, player: Player, policy: Policy) -> None:
+        # L'Etoile (XVII) already took a card from the minor discard pile instead.
+        if player.has_active_effect(DirectEffects.MEMORY_RECALL):
+            return
+
+        if self.phase is GamePhase.PHASE_1:
+            # The pile may have been emptied by an activated permanent card.
+            if len(self.minor_draw_pile) > 0:
+                self.apply(DrawMove(self.active_player_idx))
+            return
+
+        candidates = [
+            other for other in self.players
+            if other is not player and not other.has_empty_hand()
+        ]
+        if candidates:
+            target = policy.chooses_steal_target(player, candidates, self)
+            target_idx = self.players.index(target)
+            self.decisions.append(target_idx)
+            self.apply(StealMove(self.active_player_idx, target_idx))
+
+    # 2.3) Turn step 3: Reveal a new major card if wanted.
+    # 3.3) Turn step 3: Reveal a new major card if wanted.
+    def _reveal_step(self, player: Player, policy: Policy) -> None:
+        if not player.has_unused_majors():
+            return
+
+        reveal = policy.chooses_major_to_reveal(player, self)
+        if reveal is None:
+            self.decisions.append(None)
+            return
+        major_card, target, choice = reveal
+        self.decisions.append(reveal_action(self, major_card, target, choice))
+        self.apply(RevealMove(self.active_player_idx, major_card, target, choice))
+
+    # 2.4) Turn step 4: Create a new combination or complete an existing one.
+    # 3.4) Turn step 4: Create a new combination or complete an existing one.
+    def _combination_step(self, player: Player, policy: Policy) -> None:
+        cards = policy.chooses_combination(player, self)
+        self.decisions.append(tuple(card.card_id for card in cards) if cards else None)
+        if cards:
+            self.apply(self._combination_move(cards))
+            # Le Chariot (VII) allows a second combination this turn.
+            if player.has_active_effect(DirectEffects.DOUBLE_PLAY):
+                cards = policy.chooses_combination(player, self)
+                self.decisions.append(tuple(card.card_id for card in cards) if cards else None)
+                if cards:
+                    self.apply(self._combination_move(cards))
+                    # Each combination played gives a major card.
+                    self._major_draw_step(player)
+            return
+
+        if not player.has_combinations():
+            return
+
+        extension = policy.chooses_extension(player, self)
+        self.decisions.append(
+            None if extension is None
+            else (extension[0], *(card.card_id for card in extension[1]))
+        )
+        if extension is not None:
+            idx, cards = extension
+            self.apply(ExtensionMove(self.active_player_idx, idx, cards))
+
+    def _combination_move(self, cards: list[Card]) -> CombinationMove:
+        # Major cards chosen with the combination are equipment attached to it at once.
+        return CombinationMove(
+            self.active_player_idx,
+            [card for card in cards if not card.is_major_any()],
+            [card for card in cards if card.is_major_any()]
+        )
+
+    # 2.5) Turn step 5: If a combination has been created or completed, draw a major card.
+    # 3.5) Turn step 5: If major cards are not depleted yet, and a combination was created or completed, draw a major card.
+    def _major_draw_step(self, player: Player) -> None:
+        if player.has_played_combination() and len(self.major_draw_pile) > 0:
+            self.apply(MajorDrawMove(self.active_player_idx))
+
+    def _pass_to_next_player(self) -> None:
+        # 3.0) From now on, any player not having any card left in hand is out of game.
+        for _ in range(self.n_players):
+            self.active_player_idx = (self.active_player_idx + 1) % self.n_players
+            if self.phase is GamePhase.PHASE_1 or not self.active_player.has_empty_hand():
+                return
+
+
+@dataclass(frozen=True)
+class SimulationReport:
+    """
+    Results of a batch of headless games.
+
+    Attributes
+    ----------
+
+    results: list[GameResult]
+        Result of each game, in the order they were played.
+
+    elapsed: float
+        Wall-clock time spent playing the games, in seconds.
+    """
+    results: list[GameResult]
+    elapsed: float
+
+    @property
+    def n_games(self) -> int:
+        """Number of games played."""
+        return len(self.results)
+
+    @property
+    def games_per_second(self) -> float:
+        """Simulation throughput."""
+        return self.n_games / self.elapsed if self.elapsed > 0 else float("inf")
+
+
+def simulate(
+    n_games: int,
+    language: str,
+    policies: tp.Sequence[Policy],
+    max_turns: int = DEFAULT_MAX_TURNS,
+    seed: int | None = None
+) -> SimulationReport:
+    """
+    Play given number of headless games one after the other.
+
+    Parameters
+    ----------
+
+    n_games: int
+        Number of games to play.
+
+    language: str
+        Language setting for the cards names.
+
+    policies: Sequence[Policy]
+        One policy per player, in seat order, shared by all games.
+
+    max_turns: int
+        Turn limit of each game. Defaults to `DEFAULT_MAX_TURNS`.
+
+    seed: int, optional
+        Seed from which the seed of each game is drawn. Defaults to a seed drawn
+        from the `random` module.
+
+    Returns
+    -------
+
+    SimulationReport
+        Results of the games and simulation throughput.
+    """
+    check_num_value(n_games, "n_games", ">=", 0)
+
+    seeds_rng = rdm.Random(seed if seed is not None else rdm.getrandbits(64))
+
+    start = time.perf_counter()
+    results = [
+        Game(language, policies, max_turns=max_turns, seed=seeds_rng.getrandbits(64)).play()
+        for _ in range(n_games)
+    ]
+    elapsed = time.perf_counter() - start
+
+    return SimulationReport(results=results, elapsed=elapsed)
+
+
+if __name__ == "__main__":
+    report = simulate(1_000, "english", [PassivePolicy() for _ in range(4)])
+    print(
+        f"{report.n_games} games played in {report.elapsed:.2f}s "
+        f"({report.games_per_second:.1f} games/s)."
+    )
@@ -0,0 +1,523 @@
+"""
+Gym-style reinforcement learning environments: one game seen by a learning
+player (`BattleEnv`), and a batch of games stepped together (`VectorBattleEnv`).
+
+The learning player takes every decision of their turns (see
+`movegen.turn_steps`), the other seats are played by policies between two
+decisions of the learner. Decisions with a single legal action are taken
+automatically, so each step is a real choice.
+
+Observations are dicts of NumPy arrays, from the point of view of the learner
+(seat 0 of the arrays is the learner, the next seats follow in playing order):
+
+- `planes` (`N_PLANES`, `N_CARDS`) uint8: zones the learner can see unpacked
+  to one 0/1 plane per zone, see `Plane`;
+- `scalars` (`N_SCALARS`,) float32: sizes of the hidden zones, scores, flags
+  and the decision to take, see `Scalar`;
+- `action_mask` (`max_actions`,) bool: which action slots are legal;
+- `action_kinds` (`max_actions`,) int8: `ActionKind` of each slot, -1 if empty;
+- `action_cards` (`max_actions`, `N_CARDS`) uint8: cards each action reveals,
+  activates or plays;
+- `action_fields` (`max_actions`, 4) int16: targeted seat, second targeted
+  seat (relative to the learner), targeted combination or card, each -1 if
+  the action has no such target, and choice (0 if none).
+
+Actions are slots: action `i` picks the `i`-th legal action of the decision,
+slot 0 being `SKIP` when the decision is optional. Legal actions beyond
+`max_actions` are left out.
+
+Bitmasks of the whole batch are unpacked at once with `numpy.unpackbits`, so
+that building observations costs a few array operations per step, whatever
+the number of games. This module needs NumPy (see `requirements.txt`), unlike
+the rest of the package.
+"""
+
+import copy
+import random as rdm
+import typing as tp
+
+from enum import IntEnum
+
+import numpy as np
+
+try:
+    from .data.base import check_num_value
+    from .data.cards_table import N_CARDS
+    from .engine import Game, DEFAULT_MAX_TURNS
+    from .policies import Policy, PassivePolicy, GreedyPolicy
+    from .bitboard import mask_of
+    from .zobrist import MAX_PLAYERS
+    from .movegen import (
+        ActionKind, DecisionPoint, MoveGenerator, TurnSteps, action_targets, decode_action,
+        turn_steps
+    )
+except ImportError:
+    from data.base import check_num_value
+    from data.cards_table import N_CARDS
+    from engine import Game, DEFAULT_MAX_TURNS
+    from policies import Policy, PassivePolicy, GreedyPolicy
+    from bitboard import mask_of
+    from zobrist import MAX_PLAYERS
+    from movegen import (
+        ActionKind, DecisionPoint, MoveGenerator, TurnSteps, action_targets, decode_action,
+        turn_steps
+    )
+
+
+DEFAULT_MAX_ACTIONS = 128
+"""Default number of action slots."""
+
+
+class Plane(IntEnum):
+    """
+    Card planes of an observation. Seat zones of relative seat `seat` are at
+    `SEATS + seat * N_SEAT_PLANES + zone`.
+    """
+    HAND = 0
+    MAJOR_PILE = 1
+    MINOR_DISCARD = 2
+    ACTION_DISCARD = 3
+    SEATS = 4
+
+
+class SeatPlane(IntEnum):
+    """Card planes of each seat, visible to every player."""
+    ACTIVE_PERMANENTS = 0
+    INACTIVE_PERMANENTS = 1
+    COMBINATIONS = 2
+    EQUIPMENT = 3
+
+
+N_SEAT_PLANES = len(SeatPlane)
+"""Number of card planes of each seat."""
+
+N_PLANES = Plane.SEATS + MAX_PLAYERS * N_SEAT_PLANES
+"""Number of card planes of an observation."""
+
+
+class Scalar(IntEnum):
+    """
+    Scalar features of an observation. Seat features of relative seat `seat`
+    are at `SEATS + seat * N_SEAT_SCALARS + feature`, the decision to take is
+    one-hot from `DECISION`.
+    """
+    MINOR_DRAW_SIZE = 0
+    MAJOR_DRAW_SIZE = 1
+    PHASE_2 = 2
+    TURN = 3
+    SEATS = 4
+
+
+class SeatScalar(IntEnum):
+    """Scalar features of each seat."""
+    HAND_SIZE = 0
+    MAJOR_PILE_SIZE = 1
+    N_COMBINATIONS = 2
+    SCORE = 3
+    IN_GAME = 4
+    REVEALED_MAJOR = 5
+    PLAYED_COMBINATION = 6
+
+
+N_SEAT_SCALARS = len(SeatScalar)
+"""Number of scalar features of each seat."""
+
+DECISION_SCALARS = Scalar.SEATS + MAX_PLAYERS * N_SEAT_SCALARS
+"""Index of the first scalar of the one-hot decision."""
+
+N_SCALARS = DECISION_SCALARS + len(DecisionPoint)
+"""Number of scalar features of an observation."""
+
+_N_MASK_BYTES = (N_CARDS + 7) // 8
+
+Observation = dict[str, np.ndarray]
+"""Arrays of an observation, see the module documentation."""
+
+
+def unpack_masks(masks: tp.Sequence[int]) -> np.ndarray:
+    """
+    Bitmasks of card IDs unpacked to 0/1 rows.
+
+    Parameters
+    ----------
+
+    masks: Sequence[int]
+        Masks to unpack.
+
+    Returns
+    -------
+
+    numpy.ndarray
+        Array of shape (len(masks), N_CARDS) and type uint8, whose element
+        [i, card_id] is bit `card_id` of mask `i`.
+    """
+    raw = b"".join(mask.to_bytes(_N_MASK_BYTES, "little") for mask in masks)
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(masks), _N_MASK_BYTES)
+    return np.unpackbits(packed, axis=1, count=N_CARDS, bitorder="little")
+
+
+class BattleEnv:
+    """
+    One game played by a learning player against policies, with the Gym API
+    (`reset`, `step`).
+
+    Attributes
+    ----------
+
+    n_players: int
+        Number of players of each game.
+
+    seat: int
+        Seat index of the learning player.
+
+    max_actions: int
+        Number of action slots.
+
+    game: Game
+        Current game.
+
+    point: DecisionPoint | None
+        Decision the learner takes next, None once the game is over.
+
+    legal: tuple[int, ...]
+        Codes of the actions of the slots (see `movegen.encode_action`).
+    """
+    def __init__(
+        self,
+        n_players: int = 3,
+        opponents: tp.Sequence[Policy] | None = None,
+        seat: int = 0,
+        language: str = "english",
+        max_turns: int = DEFAULT_MAX_TURNS,
+        max_actions: int = DEFAULT_MAX_ACTIONS,
+        generator: MoveGenerator | None = None,
+        seed: int | None = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+        n_players: int
+            Number of players of each game. Defaults to 3.
+
+        opponents: Sequence[Policy], optional
+            Policies of the other seats, in seat order. Defaults to `GreedyPolicy`.
+
+        seat: int
+            Seat index of the learning player. Defaults to 0.
+
+        language: str
+            Language setting for the cards names. Defaults to 'english'.
+
+        max_turns: int
+            Turn limit of each game. Defaults to `DEFAULT_MAX_TURNS`.
+
+        max_actions: int
+            Number of action slots. Defaults to `DEFAULT_MAX_ACTIONS`.
+
+        generator: MoveGenerator, optional
+            Cache of legal actions, which may be shared between environments.
+            Defaults to a new cache.
+
+        seed: int, optional
+            Seed of the seeds of the games. Defaults to a random seed.
+        """
+        check_num_value(n_players, "n_players", ">=", 2)
+        check_num_value(n_players, "n_players", "<=", MAX_PLAYERS)
+        check_num_value(seat, "seat", ">=", 0)
+        check_num_value(seat, "seat", "<", n_players)
+        check_num_value(max_actions, "max_actions", ">", 0)
+        if opponents is None:
+            opponents = [GreedyPolicy() for _ in range(n_players - 1)]
+        check_num_value(len(opponents), "len(opponents)", "==", n_players - 1)
+
+        self.n_players = n_players
+        self.seat = seat
+        self.language = language
+        self.max_turns = max_turns
+        self.max_actions = max_actions
+        self.generator = generator if generator is not None else MoveGenerator()
+        self.policies = list(opponents)
+        self.policies.insert(seat, PassivePolicy())
+        self.rng = rdm.Random(seed)
+        self.game: Game | None = None
+        self.point: DecisionPoint | None = None
+        self.legal: tuple[int, ...] = ()
+        self._steps: TurnSteps | None = None
+
+    # ===== Gym API =====
+    def reset(self, seed: int | None = None) -> tuple[Observation, dict[str, tp.Any]]:
+        """
+        Start a new game and play until the first decision of the learner.
+
+        Returns
+        -------
+
+        tuple[Observation, dict]
+            Observation and information (see `step`).
+        """
+        self._new_game(seed)
+        return self.observe(), self.info()
+
+    def step(self, action: int) -> tuple[Observation, float, bool, bool, dict[str, tp.Any]]:
+        """
+        Take the action of slot `action` and play until the next decision of the
+        learner or the end of the game.
+
+        Returns
+        -------
+
+        tuple[Observation, float, bool, bool, dict]
+            Observation, reward, whether the game ended, whether it was stopped
+            by the turn limit, and information: legal actions and decision to
+            take, result of the game once over.
+        """
+        reward, terminated, truncated = self._step(action)
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def info(self) -> dict[str, tp.Any]:
+        """Information about the current state, see `step`."""
+        if self.point is None:
+            return {"result": self.game.result()}
+        return {"point": self.point, "legal_actions": self.legal}
+
+    def action_mask(self) -> np.ndarray:
+        """Which action slots are legal."""
+        mask = np.zeros(self.max_actions, dtype=bool)
+        mask[:len(self.legal)] = True
+        return mask
+
+    def observe(self) -> Observation:
+        """Observation of the current state, from the point of view of the learner."""
+        masks, scalars, fields, kinds, actions = self._features()
+        planes = unpack_masks(masks + actions)
+        return {
+            "planes": planes[:N_PLANES],
+            "scalars": np.array(scalars, dtype=np.float32),
+            "action_mask": self.action_mask(),
+            "action_kinds": np.array(kinds, dtype=np.int8),
+            "action_cards": planes[N_PLANES:],
+            "action_fields": np.array(fields, dtype=np.int16).reshape(self.max_actions, 4),
+        }
+
+    # ===== Game flow =====
+    def _new_game(self, seed: int | None) -> None:
+        seed = seed if seed is not None else self.rng.getrandbits(64)
+        for idx, policy in enumerate(self.policies):
+            policy.reseed(seed + idx + 1)
+        self.game = Game(
+            self.language, self.policies, max_turns=self.max_turns, seed=seed
+        )
+        self._steps = None
+        self._advance(None)
+
+    def _step(self, action: int) -> tuple[float, bool, bool]:
+        """Take the action of slot `action`: reward, terminated and truncated."""
+        if self.point is None:
+            raise RuntimeError("The game is over, call `reset` to start a new one.")
+        check_num_value(action, "action", ">=", 0)
+        check_num_value(action, "action", "<", len(self.legal))
+        self._advance(self.legal[action])
+        if self.point is not None:
+            return 0., False, False
+
+        result = self.game.result()
+        reward = 1. if self.seat in result.winners else -1.
+        return reward, not result.truncated, result.truncated
+
+    def _advance(self, action: int | None) -> None:
+        """Send `action` to the turn of the learner, then play until their next decision."""
+        game = self.game
+        while True:
+            try:
+                if self._steps is None:
+                    if game.is_over():
+                        self.point, self.legal = None, ()
+                        return
+                    if game.active_player_idx != self.seat:
+                        game.play_turn()
+                        continue
+                    self._steps = turn_steps(game, self.generator)
+                    self.point, legal = next(self._steps)
+                else:
+                    self.point, legal = self._steps.send(action)
+                self.legal = legal[:self.max_actions]
+                return
+            except StopIteration:
+                self._steps = None
+
+    # ===== Observations =====
+    def _relative(self, seat: int) -> int:
+        return (seat - self.seat) % self.n_players
+
+    def _features(self) -> tuple[list[int], list[float], list[int], list[int], list[int]]:
+        """
+        Python parts of the observation: card masks of the planes, scalars,
+        action fields, action kinds and card masks of the actions, padded.
+        """
+        game = self.game
+        learner = game.players[self.seat]
+        masks = [0] * N_PLANES
+        masks[Plane.HAND] = learner.hand_index.mask
+        masks[Plane.MAJOR_PILE] = mask_of(learner.major_pile)
+        masks[Plane.MINOR_DISCARD] = mask_of(game.minor_discard)
+        masks[Plane.ACTION_DISCARD] = mask_of(game.action_discard)
+
+        scalars = [0.] * N_SCALARS
+        scalars[Scalar.MINOR_DRAW_SIZE] = len(game.minor_draw_pile)
+        scalars[Scalar.MAJOR_DRAW_SIZE] = len(game.major_draw_pile)
+        scalars[Scalar.PHASE_2] = float(len(game.minor_draw_pile) == 0)
+        scalars[Scalar.TURN] = game.turn / game.max_turns
+        if self.point is not None:
+            scalars[DECISION_SCALARS + self.point] = 1.
+
+        for seat, player in enumerate(game.players):
+            relative = self._relative(seat)
+            base = Plane.SEATS + relative * N_SEAT_PLANES
+            masks[base + SeatPlane.ACTIVE_PERMANENTS] = mask_of(player.active_permanents)
+            masks[base + SeatPlane.INACTIVE_PERMANENTS] = mask_of(player.inactive_permanents)
+            combinations = equipment = 0
+            for cards, equipped in zip(player.combinations, player.equipments):
+                combinations |= mask_of(cards)
+                equipment |= mask_of(equipped)
+            masks[base + SeatPlane.COMBINATIONS] = combinations
+            masks[base + SeatPlane.EQUIPMENT] = equipment
+
+            base = Scalar.SEATS + relative * N_SEAT_SCALARS
+            scalars[base + SeatScalar.HAND_SIZE] = len(player.hand)
+            scalars[base + SeatScalar.MAJOR_PILE_SIZE] = len(player.major_pile)
+            scalars[base + SeatScalar.N_COMBINATIONS] = len(player.combinations)
+            scalars[base + SeatScalar.SCORE] = player.count_score()
+            scalars[base + SeatScalar.IN_GAME] = float(
+                not game.is_over() and (len(game.minor_draw_pile) > 0 or not player.has_empty_hand())
+            )
+            scalars[base + SeatScalar.REVEALED_MAJOR] = float(player.has_revealed_major())
+            scalars[base + SeatScalar.PLAYED_COMBINATION] = float(player.has_played_combination())
+
+        n_empty = self.max_actions - len(self.legal)
+        fields, kinds, actions = [], [], []
+        for action in self.legal:
+            decoded = decode_action(action)
+            kinds.append(decoded.kind)
+            cards = decoded.cards
+            if decoded.kind in (ActionKind.ACTIVATE, ActionKind.REVEAL):
+                cards |= 1 << decoded.card
+            actions.append(cards)
+            seat, seat_b, index = action_targets(game, action)
+            fields += (
+                -1 if seat is None else self._relative(seat),
+                -1 if seat_b is None else self._relative(seat_b),
+                -1 if index is None else index,
+                decoded.choice
+            )
+        kinds += [-1] * n_empty
+        actions += [0] * n_empty
+        fields += [-1] * (4 * n_empty)
+        return masks, scalars, fields, kinds, actions
+
+
+class VectorBattleEnv:
+    """
+    `n_envs` games stepped together, with observations batched along a first
+    axis. A game which ends is reset at once: the observation returned for it
+    is the first one of the new game, and its information holds the result of
+    the finished game.
+
+    Attributes
+    ----------
+
+    envs: list[BattleEnv]
+        Environment of each game.
+    """
+    def __init__(self, n_envs: int, seed: int | None = None, **kwargs: tp.Any) -> None:
+        """
+        Parameters
+        ----------
+        n_envs: int
+            Number of games.
+
+        seed: int, optional
+            Seed of the seeds of the games. Defaults to a random seed.
+
+        **kwargs:
+            Other arguments of each `BattleEnv`. Each environment gets its own
+            copy of the opponents. Legal actions are cached by one
+            `MoveGenerator` shared by all environments.
+        """
+        check_num_value(n_envs, "n_envs", ">", 0)
+        opponents = kwargs.pop("opponents", None)
+        kwargs.setdefault("generator", MoveGenerator())
+        rng = rdm.Random(seed)
+        self.envs = [
+            BattleEnv(
+                opponents=copy.deepcopy(opponents),
+                seed=rng.getrandbits(64), **kwargs
+            )
+            for _ in range(n_envs)
+        ]
+
+    @property
+    def n_envs(self) -> int:
+        """Number of games."""
+        return len(self.envs)
+
+    def reset(
+        self, seed: int | None = None
+    ) -> tuple[Observation, list[dict[str, tp.Any]]]:
+        """Start new games, seeded `seed`, `seed + 1`... if a seed is given."""
+        for idx, env in enumerate(self.envs):
+            env._new_game(None if seed is None else seed + idx)
+        return self.observe(), [env.info() for env in self.envs]
+
+    def step(
+        self, actions: tp.Sequence[int] | np.ndarray
+    ) -> tuple[Observation, np.ndarray, np.ndarray, np.ndarray, list[dict[str, tp.Any]]]:
+        """
+        Take one action slot per game, see `BattleEnv.step`.
+
+        Returns
+        -------
+
+        tuple[Observation, numpy.ndarray, numpy.ndarray, numpy.ndarray, list[dict]]
+            Batched observations, rewards, terminated and truncated flags, and
+            information of each game.
+        """
+        check_num_value(len(actions), "len(actions)", "==", self.n_envs)
+        rewards = np.zeros(self.n_envs, dtype=np.float32)
+        terminated = np.zeros(self.n_envs, dtype=bool)
+        truncated = np.zeros(self.n_envs, dtype=bool)
+        infos = []
+        for idx, (env, action) in enumerate(zip(self.envs, actions)):
+            rewards[idx], terminated[idx], truncated[idx] = env._step(int(action))
+            info = env.info()
+            if env.point is None:
+                env._new_game(None)
+                info = {**env.info(), **info}
+            infos.append(info)
+        return self.observe(), rewards, terminated, truncated, infos
+
+    def action_masks(self) -> np.ndarray:
+        """Legal action slots of each game, shape (n_envs, max_actions)."""
+        return np.stack([env.action_mask() for env in self.envs])
+
+    def observe(self) -> Observation:
+        """Observations of every game, stacked, with all bitmasks unpacked at once."""
+        n_envs = self.n_envs
+        max_actions = self.envs[0].max_actions
+        masks, scalars, fields, kinds, actions = [], [], [], [], []
+        for env in self.envs:
+            env_masks, env_scalars, env_fields, env_kinds, env_actions = env._features()
+            masks += env_masks
+            actions += env_actions
+            scalars += env_scalars
+            fields += env_fields
+            kinds += env_kinds
+        planes = unpack_masks(masks + actions)
+        split = n_envs * N_PLANES
+        return {
+            "planes": planes[:split].reshape(n_envs, N_PLANES, N_CARDS),
+            "scalars": np.array(scalars, dtype=np.float32).reshape(n_envs, N_SCALARS),
+            "action_mask": self.action_masks(),
+            "action_kinds": np.array(kinds, dtype=np.int8).reshape(n_envs, max_actions),
+            "action_cards": planes[split:].reshape(n_envs, max_actions, N_CARDS),
+            "action_fields": np.array(fields, dtype=np.int16).reshape(n_envs, max_actions, 4),
+        }
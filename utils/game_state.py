@@ -0,0 +1,365 @@
+"""
+Snapshots of a whole game: every zone, counter and flag needed to resume it,
+stored as card IDs and encoded to a compact `bytes` string.
+
+Unlike the Zobrist hash, a snapshot keeps the order of the cards (draw piles, hands),
+which is part of the game: the next card drawn from a pile or from a hand depends
+on it. It also keeps what the players observed (their `Knowledge`, their unseen
+losses, the rearrangements of the piles), which searches read to sample hidden
+cards. Every card ID fits in one byte, so a whole game encodes in a few hundred
+bytes, plus 2.5 kB when the state of the random generator is included.
+"""
+
+import struct
+import typing as tp
+
+from dataclasses import dataclass
+
+try:
+    from .card import Card
+    from .determinization import Knowledge
+    from .effects import CardEffect
+    from .data.effects_names import EffectNamesPack
+    from .data.base import EffectNames
+except ImportError:
+    from card import Card
+    from determinization import Knowledge
+    from effects import CardEffect
+    from data.effects_names import EffectNamesPack
+    from data.base import EffectNames
+
+if tp.TYPE_CHECKING:
+    from .engine import Game
+    from .player import Player
+
+
+SNAPSHOT_VERSION = 2
+"""Version of the binary encoding, first byte of every snapshot."""
+
+_EFFECTS: tuple[EffectNames, ...] = tuple(
+    effect for effect_type in EffectNamesPack().effects_types for effect in effect_type
+)
+_EFFECT_IDS = {effect: idx for idx, effect in enumerate(_EFFECTS)}
+
+# version, n_players, phase, turn, n_phase_1_turns, active player, whether the rng follows
+_HEADER = struct.Struct("<BBBHHBB")
+# number of rearrangements of the minor and major draw piles
+_REARRANGEMENTS = struct.Struct("<II")
+# score bonus, mask of the cancelled combinations, turn flags (revealed major, played combination),
+# number of unseen losses
+_PLAYER_HEADER = struct.Struct("<iIBI")
+# card seen in a hand: card ID, seat of its holder, their number of unseen losses then
+_KNOWN_CARD = struct.Struct("<BBI")
+# size and number of rearrangements of the minor pile when its top cards were seen
+_PILE_SEEN = struct.Struct("<BI")
+# random.Random state: version, 625 words, whether gauss_next is set, gauss_next
+_RNG_STATE = struct.Struct("<B625I?d")
+
+
+def _ids(cards: tp.Iterable[Card]) -> bytes:
+    return bytes([card.card_id for card in cards])
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerState:
+    """
+    Zones and counters of one player, as strings of card IDs in zone order.
+
+    Attributes
+    ----------
+
+    hand, major_pile, active_permanents, inactive_permanents: bytes
+        IDs of the cards of each zone.
+
+    combinations, equipments: tuple[bytes, ...]
+        IDs of the cards of each combination and of the equipment attached to it.
+
+    active_effects: bytes
+        Indices of the effects applying to the player this turn.
+
+    bonus: int
+        Score bonus earned outside combinations.
+
+    cancelled: int
+        Mask of the indices of the cancelled combinations.
+
+    flags: int
+        Bit 0 set if the player revealed a major card this turn, bit 1 if they
+        played a combination.
+
+    n_unseen_losses: int
+        Number of times cards left the hand unseen (see `Player.n_unseen_losses`).
+
+    known_cards: tuple[tuple[int, int, int], ...]
+        Cards the player saw in hands, as (card ID, seat, number of unseen losses),
+        see `Knowledge.in_hands`.
+
+    pile_top: bytes
+        IDs of the cards the player saw on top of the minor pile, top card first.
+
+    pile_length, pile_rearrangements: int
+        Size of the minor pile and its number of rearrangements when its top
+        cards were seen.
+    """
+    hand: bytes
+    major_pile: bytes
+    active_permanents: bytes
+    inactive_permanents: bytes
+    combinations: tuple[bytes, ...]
+    equipments: tuple[bytes, ...]
+    active_effects: bytes
+    bonus: int
+    cancelled: int
+    flags: int
+    n_unseen_losses: int
+    known_cards: tuple[tuple[int, int, int], ...]
+    pile_top: bytes
+    pile_length: int
+    pile_rearrangements: int
+
+    @classmethod
+    def from_player(cls, player: "Player") -> tp.Self:
+        """State of a player."""
+        sheet = player.score_sheet
+        knowledge = player.knowledge
+        return cls(
+            hand=_ids(player.hand),
+            major_pile=_ids(player.major_pile),
+            active_permanents=_ids(player.active_permanents),
+            inactive_permanents=_ids(player.inactive_permanents),
+            combinations=tuple(_ids(combination) for combination in player.combinations),
+            equipments=tuple(_ids(equipment) for equipment in player.equipments),
+            active_effects=bytes([_EFFECT_IDS[effect.name] for effect in player.active_effects]),
+            bonus=sheet.bonus,
+            cancelled=sum(1 << idx for idx, cancelled in enumerate(sheet.cancelled) if cancelled),
+            flags=player.has_revealed_major() | player.has_played_combination() << 1,
+            n_unseen_losses=player.n_unseen_losses,
+            known_cards=tuple(
+                (card_id, seat, n_unseen_losses)
+                for card_id, (seat, n_unseen_losses) in knowledge.in_hands.items()
+            ),
+            pile_top=bytes(knowledge.pile_top),
+            pile_length=knowledge.pile_length,
+            pile_rearrangements=knowledge.pile_rearrangements
+        )
+
+    def restore(self, player: "Player", cards: tuple[Card, ...]) -> None:
+        """Put a player back in this state. `cards` are the cards of the game by ID."""
+        player.hand = [cards[card_id] for card_id in self.hand]
+        player.major_pile = [cards[card_id] for card_id in self.major_pile]
+        player.active_permanents = [cards[card_id] for card_id in self.active_permanents]
+        player.inactive_permanents = [cards[card_id] for card_id in self.inactive_permanents]
+        player.combinations = [
+            [cards[card_id] for card_id in combination] for combination in self.combinations
+        ]
+        player.equipments = [
+            [cards[card_id] for card_id in equipment] for equipment in self.equipments
+        ]
+        player.active_effects = [CardEffect(_EFFECTS[idx]) for idx in self.active_effects]
+        player.sets_turn_flags(bool(self.flags & 1), bool(self.flags & 2))
+        player.rebuilds_indexes()
+        player.score_sheet.bonus = self.bonus
+        for idx in range(len(self.combinations)):
+            if self.cancelled >> idx & 1:
+                player.score_sheet.cancel(idx)
+        player.n_unseen_losses = self.n_unseen_losses
+        player.knowledge = Knowledge()
+        for card_id, seat, n_unseen_losses in self.known_cards:
+            player.knowledge.sees_in_hand(card_id, seat, n_unseen_losses)
+        player.knowledge.sees_pile_top(
+            tuple(self.pile_top), self.pile_length, self.pile_rearrangements
+        )
+
+    def _encode(self, out: bytearray) -> None:
+        out += _PLAYER_HEADER.pack(self.bonus, self.cancelled, self.flags, self.n_unseen_losses)
+        for ids in (
+            self.hand, self.major_pile, self.active_permanents,
+            self.inactive_permanents, self.active_effects
+        ):
+            out.append(len(ids))
+            out += ids
+        out.append(len(self.combinations))
+        for combination, equipment in zip(self.combinations, self.equipments):
+            out.append(len(combination))
+            out += combination
+            out.append(len(equipment))
+            out += equipment
+        out.append(len(self.known_cards))
+        for known_card in self.known_cards:
+            out += _KNOWN_CARD.pack(*known_card)
+        out.append(len(self.pile_top))
+        out += self.pile_top
+        out += _PILE_SEEN.pack(self.pile_length, self.pile_rearrangements)
+
+    @classmethod
+    def _decode(cls, data: bytes, offset: int) -> tuple[tp.Self, int]:
+        bonus, cancelled, flags, n_unseen_losses = _PLAYER_HEADER.unpack_from(data, offset)
+        offset += _PLAYER_HEADER.size
+        zones = []
+        for _ in range(5):
+            size = data[offset]
+            zones.append(data[offset + 1:offset + 1 + size])
+            offset += 1 + size
+        combinations, equipments = [], []
+        for _ in range(data[offset]):
+            size = data[offset + 1]
+            combinations.append(data[offset + 2:offset + 2 + size])
+            offset += 1 + size
+            size = data[offset + 1]
+            equipments.append(data[offset + 2:offset + 2 + size])
+            offset += 1 + size
+        offset += 1
+        known_cards = []
+        for _ in range(data[offset]):
+            known_cards.append(_KNOWN_CARD.unpack_from(data, offset + 1))
+            offset += _KNOWN_CARD.size
+        offset += 1
+        size = data[offset]
+        pile_top = bytes(data[offset + 1:offset + 1 + size])
+        offset += 1 + size
+        pile_length, pile_rearrangements = _PILE_SEEN.unpack_from(data, offset)
+        offset += _PILE_SEEN.size
+        hand, major_pile, active_permanents, inactive_permanents, active_effects = zones
+        state = cls(
+            hand, major_pile, active_permanents, inactive_permanents,
+            tuple(combinations), tuple(equipments), active_effects, bonus, cancelled, flags,
+            n_unseen_losses, tuple(known_cards), pile_top, pile_length, pile_rearrangements
+        )
+        return state, offset
+
+
+@dataclass(frozen=True, slots=True)
+class GameState:
+    """
+    Everything needed to resume a game, apart from its settings and its policies.
+
+    Attributes
+    ----------
+
+    phase, turn, n_phase_1_turns, active_player_idx: int
+        Counters of the game (see `Game`).
+
+    minor_draw, major_draw: bytes
+        IDs of the cards of the draw piles, bottom card first.
+
+    minor_discard, action_discard: bytes
+        IDs of the cards of the discard piles, in the order they were discarded.
+
+    minor_rearrangements, major_rearrangements: int
+        Number of rearrangements of the draw piles (see `DrawPile.n_rearrangements`).
+
+    players: tuple[PlayerState, ...]
+        State of each player, in seat order.
+
+    rng_state: tuple, optional
+        State of the game random generator, as returned by `random.Random.getstate`.
+        Not needed to explore the game from this state, needed to resume it exactly.
+    """
+    phase: int
+    turn: int
+    n_phase_1_turns: int
+    active_player_idx: int
+    minor_draw: bytes
+    major_draw: bytes
+    minor_discard: bytes
+    action_discard: bytes
+    minor_rearrangements: int
+    major_rearrangements: int
+    players: tuple[PlayerState, ...]
+    rng_state: tuple | None = None
+
+    @classmethod
+    def from_game(cls, game: "Game", include_rng: bool = False) -> tp.Self:
+        """State of a game, with the state of its random generator if `include_rng`."""
+        return cls(
+            phase=int(game.phase),
+            turn=game.turn,
+            n_phase_1_turns=game.n_phase_1_turns,
+            active_player_idx=game.active_player_idx,
+            minor_draw=_ids(game.minor_draw_pile.cards_left),
+            major_draw=_ids(game.major_draw_pile.cards_left),
+            minor_discard=_ids(game.minor_discard),
+            action_discard=_ids(game.action_discard),
+            minor_rearrangements=game.minor_draw_pile.n_rearrangements,
+            major_rearrangements=game.major_draw_pile.n_rearrangements,
+            players=tuple(PlayerState.from_player(player) for player in game.players),
+            rng_state=game.rng.getstate() if include_rng else None
+        )
+
+    def restore(self, game: "Game") -> None:
+        """
+        Put a game back in this state. The game must have the same number of
+        players. Its random generator is only restored if the state holds one.
+        """
+        if len(self.players) != game.n_players:
+            raise ValueError(
+                f"{self.__class__.__name__}: the state holds {len(self.players)} players, "
+                f"the game has {game.n_players}."
+            )
+        cards = Card.all_by_id(game.language)
+
+        game.phase = type(game.phase)(self.phase)
+        game.turn = self.turn
+        game.n_phase_1_turns = self.n_phase_1_turns
+        game.active_player_idx = self.active_player_idx
+        game.minor_draw_pile.cards_left = [cards[card_id] for card_id in self.minor_draw]
+        game.major_draw_pile.cards_left = [cards[card_id] for card_id in self.major_draw]
+        game.minor_discard[:] = [cards[card_id] for card_id in self.minor_discard]
+        game.action_discard[:] = [cards[card_id] for card_id in self.action_discard]
+        game.minor_draw_pile.n_rearrangements = self.minor_rearrangements
+        game.major_draw_pile.n_rearrangements = self.major_rearrangements
+        for player_state, player in zip(self.players, game.players):
+            player_state.restore(player, cards)
+        if self.rng_state is not None:
+            game.rng.setstate(self.rng_state)
+
+    def to_bytes(self) -> bytes:
+        """Compact binary encoding of the state."""
+        out = bytearray(_HEADER.pack(
+            SNAPSHOT_VERSION, len(self.players), self.phase, self.turn,
+            self.n_phase_1_turns, self.active_player_idx, self.rng_state is not None
+        ))
+        for ids in (self.minor_draw, self.major_draw, self.minor_discard, self.action_discard):
+            out.append(len(ids))
+            out += ids
+        out += _REARRANGEMENTS.pack(self.minor_rearrangements, self.major_rearrangements)
+        for player in self.players:
+            player._encode(out)
+        if self.rng_state is not None:
+            version, words, gauss_next = self.rng_state
+            out += _RNG_STATE.pack(
+                version, *words, gauss_next is not None, gauss_next or 0.
+            )
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> tp.Self:
+        """Decode a state encoded with `to_bytes`."""
+        version, n_players, phase, turn, n_phase_1_turns, active_idx, has_rng = (
+            _HEADER.unpack_from(data)
+        )
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"{cls.__name__}: unsupported snapshot version {version}, "
+                f"expected {SNAPSHOT_VERSION}."
+            )
+        offset = _HEADER.size
+        piles = []
+        for _ in range(4):
+            size = data[offset]
+            piles.append(bytes(data[offset + 1:offset + 1 + size]))
+            offset += 1 + size
+        rearrangements = _REARRANGEMENTS.unpack_from(data, offset)
+        offset += _REARRANGEMENTS.size
+        players = []
+        for _ in range(n_players):
+            player, offset = PlayerState._decode(data, offset)
+            players.append(player)
+        rng_state = None
+        if has_rng:
+            version, *words, has_gauss, gauss_next = _RNG_STATE.unpack_from(data, offset)
+            rng_state = (version, tuple(words), gauss_next if has_gauss else None)
+        return cls(
+            phase, turn, n_phase_1_turns, active_idx, *piles, *rearrangements,
+            tuple(players), rng_state
+        )
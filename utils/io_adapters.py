@@ -0,0 +1,365 @@
+"""
+I/O adapters: every prompt and message of a human seat goes through one of them,
+so that the game loops never read stdin nor write to stdout themselves.
+
+- `ConsoleAdapter`: prompts on stdin, messages on stdout, optionally recording
+  the answers;
+- `ScriptedAdapter`: answers read from a recorded script, to replay sessions;
+- `NullAdapter`: discards messages and always takes the first option;
+- `AsyncSocketAdapter`: JSON lines on an asyncio stream, awaited by the server
+  (an `AsyncIOAdapter`, whose choices are awaited).
+
+Adapters whose `renders` is False ignore messages and option labels: game loops
+check it before formatting them, so that headless games do not pay for rendering.
+"""
+
+import asyncio
+import json
+import time
+import typing as tp
+
+from abc import ABC, abstractmethod
+
+try:
+    from .movegen import DecisionPoint, MoveGenerator, describe_action, turn_steps
+except ImportError:
+    from movegen import DecisionPoint, MoveGenerator, describe_action, turn_steps
+
+if tp.TYPE_CHECKING:
+    from .engine import Game
+
+
+QUESTIONS: dict[DecisionPoint, str] = {
+    DecisionPoint.ACTIVATION: "do you want to activate a permanent card?",
+    DecisionPoint.STEAL: "which player do you draw a card from?",
+    DecisionPoint.REVEAL: "do you want to reveal a major card?",
+    DecisionPoint.COMBINATION: "do you want to play a new combination?",
+    DecisionPoint.SECOND_COMBINATION: "do you want to play a second combination?",
+    DecisionPoint.EXTENSION: "do you want to complete one of your combinations?",
+}
+"""Prompt of each decision of a turn, after the name of the player."""
+
+
+class IOAdapter(ABC):
+    """
+    Base class of the I/O of a human seat. Do not call directly.
+
+    Attributes
+    ----------
+
+    renders: bool
+        Whether messages are shown at all. If not, options are given to `chooses`
+        without labels (empty strings).
+    """
+    renders = True
+
+    @abstractmethod
+    def shows(self, message: str) -> None:
+        """Show a message to the player."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def asks(self, question: str) -> str:
+        """Free answer of the player to `question`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def chooses(self, question: str, options: tp.Sequence[str]) -> int:
+        """Index of the option of `options` the player chooses."""
+        raise NotImplementedError
+
+
+class ConsoleAdapter(IOAdapter):
+    """
+    Prompts on the standard input, messages on the standard output.
+
+    Attributes
+    ----------
+
+    record: list[str] | None
+        Answers of the player, in order, to replay them with `ScriptedAdapter`.
+    """
+    def __init__(self, record: list[str] | None = None) -> None:
+        """
+        Parameters
+        ----------
+        record: list[str], optional
+            List the answers are appended to. Defaults to not recording.
+        """
+        self.record = record
+
+    def shows(self, message: str) -> None:
+        print(message)
+
+    def asks(self, question: str) -> str:
+        answer = input(f"{question}\n")
+        if self.record is not None:
+            self.record.append(answer)
+        return answer
+
+    def chooses(self, question: str, options: tp.Sequence[str]) -> int:
+        menu = "\n".join(f"{idx} - {option}" for idx, option in enumerate(options, start=1))
+        while True:
+            answer = input(f"{question}\n{menu}\n")
+            if answer.isdigit() and 1 <= int(answer) <= len(options):
+                if self.record is not None:
+                    self.record.append(answer)
+                return int(answer) - 1
+            print(f"Please answer a number between 1 and {len(options)}.")
+
+
+class ScriptedAdapter(IOAdapter):
+    """
+    Answers read from a script, as recorded by `ConsoleAdapter`: free answers
+    as given, choices as option numbers starting at 1.
+
+    Attributes
+    ----------
+
+    messages: list[str] | None
+        Messages shown, if kept.
+    """
+    def __init__(self, answers: tp.Iterable[str | int], keep_messages: bool = False) -> None:
+        """
+        Parameters
+        ----------
+        answers: Iterable[str | int]
+            Answers of the player, in order.
+
+        keep_messages: bool
+            Whether to keep the messages shown in `messages`. Defaults to False,
+            which renders nothing.
+        """
+        self._answers = iter(answers)
+        self.messages: list[str] | None = [] if keep_messages else None
+        self.renders = keep_messages
+
+    def shows(self, message: str) -> None:
+        if self.messages is not None:
+            self.messages.append(message)
+
+    def asks(self, question: str) -> str:
+        return str(self._next(question))
+
+    def chooses(self, question: str, options: tp.Sequence[str]) -> int:
+        choice = int(self._next(question)) - 1
+        if not 0 <= choice < len(options):
+            raise ValueError(f"Scripted answer {choice + 1} is not an option of {question!r}.")
+        return choice
+
+    def _next(self, question: str) -> str | int:
+        try:
+            return next(self._answers)
+        except StopIteration:
+            raise ValueError(f"The script has no answer left for {question!r}.") from None
+
+
+class NullAdapter(IOAdapter):
+    """Shows nothing and always takes the first option, skipping optional decisions."""
+    renders = False
+
+    def shows(self, message: str) -> None:
+        return None
+
+    def asks(self, question: str) -> str:
+        return ""
+
+    def chooses(self, question: str, options: tp.Sequence[str]) -> int:
+        return 0
+
+
+class AsyncIOAdapter(ABC):
+    """
+    Base class of the I/O of a human seat played from an event loop, whose
+    choices are awaited. Do not call directly.
+
+    Attributes
+    ----------
+
+    renders: bool
+        Whether messages are shown at all (see `IOAdapter`).
+    """
+    renders = True
+
+    @abstractmethod
+    def shows(self, message: str) -> None:
+        """Show a message to the player."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def chooses(self, question: str, options: tp.Sequence[str], **view: tp.Any) -> int:
+        """
+        Index of the option of `options` the player chooses, `view` being what
+        they see of the table, as JSON-compatible values.
+        """
+        raise NotImplementedError
+
+
+class AsyncSocketAdapter(AsyncIOAdapter):
+    """
+    I/O of a human seat connected to the server, in JSON lines on an asyncio
+    stream. The connection handler feeds the answers of the player with
+    `receives`, and the table awaits them in `chooses`.
+
+    Attributes
+    ----------
+
+    name: str
+        Name of the player.
+
+    writer: asyncio.StreamWriter | None
+        Connection of the player, None once closed.
+
+    latency: object with a `record(seconds)` method, optional
+        Gets the time from the reception of each answer to the next message sent.
+    """
+    def __init__(
+        self, name: str, writer: asyncio.StreamWriter, latency: tp.Any | None = None
+    ) -> None:
+        self.name = name
+        self.writer: asyncio.StreamWriter | None = writer
+        self.latency = latency
+        self._answers: asyncio.Queue[tuple[int | None, float]] = asyncio.Queue()
+        self._received: float | None = None
+
+    @property
+    def is_closed(self) -> bool:
+        """Whether the player left."""
+        return self.writer is None
+
+    def sends(self, event: dict[str, tp.Any]) -> None:
+        """Send an event to the player, if still connected."""
+        if self._received is not None and self.latency is not None:
+            self.latency.record(time.perf_counter() - self._received)
+        self._received = None
+        if self.writer is None or self.writer.is_closing():
+            return
+        self.writer.write(json.dumps(event).encode() + b"\n")
+
+    def shows(self, message: str) -> None:
+        self.sends({"event": "message", "text": message})
+
+    def receives(self, answer: int) -> None:
+        """Queue an answer of the player, as soon as it is received."""
+        self._answers.put_nowait((answer, time.perf_counter()))
+
+    def closes(self) -> None:
+        """The connection closed: the pending and next choices take the first option."""
+        self.writer = None
+        self._answers.put_nowait((None, time.perf_counter()))
+
+    async def chooses(
+        self, question: str, options: tp.Sequence[str], **view: tp.Any
+    ) -> int:
+        """
+        Send a decision with its options and what the player sees of the table
+        (`view`), and await the index of the chosen option.
+        """
+        self.sends({"event": "decision", "question": question, "actions": list(options), **view})
+        while self.writer is not None:
+            answer, self._received = await self._answers.get()
+            if answer is None:
+                break
+            if 0 <= answer < len(options):
+                return answer
+            self.sends({"event": "error", "message": f"No action {answer}."})
+        return 0
+
+
+# ===== Game loops =====
+def _labels(game: "Game", legal: tp.Sequence[int], renders: bool) -> list[str]:
+    """Labels of the legal actions, empty for adapters which do not render them."""
+    if not renders:
+        return [""] * len(legal)
+    return [describe_action(game, action) for action in legal]
+
+
+def human_turn(
+    game: "Game",
+    io: IOAdapter,
+    generator: MoveGenerator | None = None,
+    record: list[int] | None = None
+) -> None:
+    """
+    Play the turn of the active player of `game`, a human answering through `io`.
+    The actions chosen are appended to `record`, if given.
+    """
+    player = game.active_player
+    steps = turn_steps(game, generator)
+    try:
+        point, legal = next(steps)
+        while True:
+            options = _labels(game, legal, io.renders)
+            if io.renders:
+                io.shows(render_table(game, game.active_player_idx))
+            choice = io.chooses(f"{player.name}, {QUESTIONS[point]}", options)
+            if record is not None:
+                record.append(legal[choice])
+            point, legal = steps.send(legal[choice])
+    except StopIteration:
+        pass
+
+
+async def async_human_turn(
+    game: "Game",
+    io: AsyncIOAdapter,
+    generator: MoveGenerator | None = None,
+    **view: tp.Any
+) -> None:
+    """
+    Play the turn of the active player of `game`, a connected human answering
+    through `io`. `view` is added to every decision sent.
+    """
+    player = game.active_player
+    steps = turn_steps(game, generator)
+    try:
+        point, legal = next(steps)
+        while True:
+            options = _labels(game, legal, io.renders)
+            choice = await io.chooses(
+                f"{player.name}, {QUESTIONS[point]}", options,
+                point=point.name, **table_view(game, game.active_player_idx), **view
+            )
+            point, legal = steps.send(legal[choice])
+    except StopIteration:
+        pass
+
+
+def table_view(game: "Game", seat: int) -> dict[str, tp.Any]:
+    """What the player `seat` sees of the table, as JSON-compatible values."""
+    player = game.players[seat]
+    return {
+        "hand": [str(card) for card in player.hand],
+        "majors": [str(card) for card in player.major_pile],
+        "players": [
+            {
+                "name": other.name,
+                "hand_size": len(other.hand),
+                "combinations": [
+                    [str(card) for card in combination + equipment]
+                    for combination, equipment in zip(other.combinations, other.equipments)
+                ],
+                "permanents": [str(card) for card in other.active_permanents],
+                "score": other.count_score(),
+            }
+            for other in game.players
+        ],
+        "minor_draw_size": len(game.minor_draw_pile),
+    }
+
+
+def render_table(game: "Game", seat: int) -> str:
+    """What the player `seat` sees of the table, as text."""
+    view = table_view(game, seat)
+    lines = [
+        f"Minor cards left: {view['minor_draw_size']}.",
+        f"Your hand: {', '.join(view['hand']) or '-'}.",
+        f"Your major cards: {', '.join(view['majors']) or '-'}.",
+    ]
+    for other in view["players"]:
+        combinations = " | ".join(", ".join(cards) for cards in other["combinations"]) or "-"
+        lines.append(
+            f"{other['name']}: {other['hand_size']} cards in hand, score {other['score']}, "
+            f"combinations: {combinations}."
+        )
+    return "\n".join(lines)
@@ -0,0 +1,430 @@
+"""
+Monte Carlo tree search bot for imperfect information (single-observer ISMCTS).
+
+Each playout starts from a copy of the game, whose hidden cards (other players'
+hands and major piles, draw piles order) are redealt at random among themselves:
+a determinization. The playout then goes down the search tree, every seat of the
+copy choosing its decisions with UCB1, adds one node, and finishes with a few
+turns of a fast rollout policy. Nodes are keyed by decisions, in the format of
+the `Game.decisions` log, so the tree is shared by all determinizations and can
+be followed along the decisions actually taken to be reused at the next turn.
+"""
+
+import math
+import random as rdm
+import time
+import typing as tp
+
+from collections import deque
+
+try:
+    from .data.base import check_num_value
+    from .card import Card
+    from .player import Player
+    from .engine import Game, TurnStep, simulate
+    from .determinization import DeterminizationSampler
+    from .movegen import DecisionPoint, decode_action, effect_arguments, legal_actions
+    from .policies import Policy, GreedyPolicy, Decision, Activation, Reveal
+except ImportError:
+    from data.base import check_num_value
+    from card import Card
+    from player import Player
+    from engine import Game, TurnStep, simulate
+    from determinization import DeterminizationSampler
+    from movegen import DecisionPoint, decode_action, effect_arguments, legal_actions
+    from policies import Policy, GreedyPolicy, Decision, Activation, Reveal
+
+if tp.TYPE_CHECKING:
+    import threading
+
+
+DEFAULT_TIME_BUDGET = 0.2
+"""Wall-clock time spent searching each decision, in seconds."""
+
+DEFAULT_EXPLORATION = 0.7
+"""Exploration constant of UCB1."""
+
+DEFAULT_ROLLOUT_TURNS = 8
+"""Number of turns played by the rollout policy after leaving the tree."""
+
+SCORE_SCALE = 40
+"""Score lead, in points, worth a full win when evaluating a playout."""
+
+
+class _Node:
+    """
+    Node of the search tree: one decision taken by one player.
+
+    `reward` sums the rewards of the player who took the decision, and
+    `availability` counts, for each child decision, the playouts in which it
+    was legal, which replaces the parent visit count in UCB1 when options
+    depend on the determinization.
+    """
+    __slots__ = ("visits", "reward", "children", "availability")
+
+    def __init__(self) -> None:
+        self.visits = 0
+        self.reward = 0.
+        self.children: dict[Decision, _Node] = {}
+        self.availability: dict[Decision, int] = {}
+
+
+def _reward(scores: list[int], seat: int) -> float:
+    """Reward of a seat at the end of a playout, between 0 and 1."""
+    best_other = max(score for idx, score in enumerate(scores) if idx != seat)
+    return min(1., max(0., 0.5 + (scores[seat] - best_other) / (2 * SCORE_SCALE)))
+
+
+def _cards_by_id(cards: list[Card], card_ids: tp.Iterable[int]) -> list[Card]:
+    by_id = {card.card_id: card for card in cards}
+    return [by_id[card_id] for card_id in card_ids]
+
+
+class _SearchPolicy(Policy):
+    """
+    Policy of every seat of the game copies during a playout: forced decisions
+    first, then UCB1 selection in the tree, then the rollout policy.
+    """
+    def __init__(self, search: "MCTSPolicy") -> None:
+        self.search = search
+        self.node: _Node | None = None
+        self.path: list[tuple[_Node, int]] = []
+        self.forced: deque[Decision] = deque()
+
+    def start(self, root: _Node, forced: tp.Iterable[Decision]) -> None:
+        self.node = root
+        self.path.clear()
+        self.forced.clear()
+        self.forced.extend(forced)
+
+    def _select(self, game: Game, options: list[Decision]) -> Decision:
+        """Choose among `options` in the tree, expanding it by one node at most."""
+        node = self.node
+        assert node is not None, "type checker assertion, never triggered."
+        for option in options:
+            node.availability[option] = node.availability.get(option, 0) + 1
+
+        untried = [option for option in options if option not in node.children]
+        if untried:
+            decision = self.search.rng.choice(untried)
+            child = node.children[decision] = _Node()
+            self.node = None
+        else:
+            exploration = self.search.exploration
+            decision = max(options, key=lambda option: (
+                node.children[option].reward / node.children[option].visits
+                + exploration * math.sqrt(
+                    math.log(node.availability[option]) / node.children[option].visits
+                )
+            ))
+            child = self.node = node.children[decision]
+        self.path.append((child, game.active_player_idx))
+        return decision
+
+    def wants_to_activate(self, player: Player, card: Card, game: Game) -> Activation:
+        if self.forced:
+            decision = self.forced.popleft()
+        elif self.node is None:
+            return self.search.rollout_policy.wants_to_activate(player, card, game)
+        else:
+            decision = self._select(game, self.search.activation_options(card, game))
+        if isinstance(decision, bool):
+            return decision
+        _, target, choice = effect_arguments(game, tp.cast(int, decision))
+        return target, choice
+
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: Game
+    ) -> Player:
+        if self.forced:
+            return game.players[tp.cast(int, self.forced.popleft())]
+        if self.node is None:
+            return self.search.rollout_policy.chooses_steal_target(player, candidates, game)
+        options: list[Decision] = [game.players.index(candidate) for candidate in candidates]
+        return game.players[tp.cast(int, self._select(game, options))]
+
+    def chooses_major_to_reveal(self, player: Player, game: Game) -> Reveal | None:
+        if self.forced:
+            decision = self.forced.popleft()
+        elif self.node is None:
+            return self.search.rollout_policy.chooses_major_to_reveal(player, game)
+        else:
+            decision = self._select(game, self.search.reveal_options(player, game))
+        return None if decision is None else effect_arguments(game, tp.cast(int, decision))
+
+    def chooses_combination(self, player: Player, game: Game) -> list[Card] | None:
+        if self.forced:
+            decision = self.forced.popleft()
+        elif self.node is None or player.has_played_combination():
+            return self.search.rollout_policy.chooses_combination(player, game)
+        else:
+            decision = self._select(game, self.search.combination_options(player))
+        return None if decision is None else _cards_by_id(player.hand, decision)
+
+    def chooses_extension(
+        self, player: Player, game: Game
+    ) -> tuple[int, list[Card]] | None:
+        if self.forced:
+            decision = self.forced.popleft()
+        elif self.node is None:
+            return self.search.rollout_policy.chooses_extension(player, game)
+        else:
+            decision = self._select(game, self.search.extension_options(player))
+        if decision is None:
+            return None
+        idx, *card_ids = decision
+        return idx, _cards_by_id(player.hand, card_ids)
+
+
+class MCTSPolicy(Policy):
+    """
+    Search bot: for each decision, run determinized playouts for a fixed
+    wall-clock budget (or number of playouts) and choose the most visited option.
+    Activations of permanent cards are only searched inside the playouts: the
+    policy leaves its own ones to the rollout policy.
+
+    Attributes
+    ----------
+
+    n_playouts: int
+        Number of playouts run since the policy was created.
+
+    search_time: float
+        Wall-clock time spent searching since the policy was created, in seconds.
+
+    last_playouts: int
+        Number of playouts run for the last decision.
+    """
+    def __init__(
+        self,
+        time_budget: float = DEFAULT_TIME_BUDGET,
+        max_playouts: int | None = None,
+        exploration: float = DEFAULT_EXPLORATION,
+        rollout_turns: int = DEFAULT_ROLLOUT_TURNS,
+        rollout_policy: Policy | None = None,
+        rng: rdm.Random | None = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        time_budget: float
+            Wall-clock time spent on each decision, in seconds. Defaults to
+            `DEFAULT_TIME_BUDGET`.
+
+        max_playouts: int, optional
+            Maximum number of playouts per decision. With a budget of playouts
+            and no time limit (`time_budget=math.inf`), games are reproducible.
+
+        exploration: float
+            Exploration constant of UCB1. Defaults to `DEFAULT_EXPLORATION`.
+
+        rollout_turns: int
+            Turns played by the rollout policy at the end of each playout, after
+            which the playout is scored. Defaults to `DEFAULT_ROLLOUT_TURNS`.
+
+        rollout_policy: Policy, optional
+            Policy of all seats outside the tree. Defaults to `GreedyPolicy`.
+
+        rng: random.Random, optional
+            Random generator of the policy. Defaults to a new generator seeded
+            from the `random` module.
+        """
+        check_num_value(time_budget, "time_budget", ">", 0)
+        check_num_value(rollout_turns, "rollout_turns", ">=", 0)
+        if max_playouts is not None:
+            check_num_value(max_playouts, "max_playouts", ">", 0)
+
+        self.time_budget = time_budget
+        self.max_playouts = max_playouts
+        self.exploration = exploration
+        self.rollout_turns = rollout_turns
+        self.rollout_policy = rollout_policy if rollout_policy is not None else GreedyPolicy()
+        self.rng = rng if rng is not None else rdm.Random(rdm.getrandbits(64))
+        self.n_playouts = 0
+        self.search_time = 0.
+        self.last_playouts = 0
+        self._root: _Node | None = None
+        self._root_index = 0
+        self._game_key: tuple[int, int] | None = None
+        self._copy: Game | None = None
+        self._search_policy = _SearchPolicy(self)
+        self._stop_at = math.inf
+        self._stop: "threading.Event | None" = None
+
+    def __getstate__(self) -> dict[str, tp.Any]:
+        # The tree and the game copy are caches, not worth sending to other processes.
+        state = self.__dict__.copy()
+        state.update(_root=None, _game_key=None, _copy=None, _stop=None)
+        return state
+
+    def stops_at(self, deadline: float = math.inf, stop: "threading.Event | None" = None) -> None:
+        self._stop_at = deadline
+        self._stop = stop
+
+    def reseed(self, seed: int) -> None:
+        self.rng.seed(seed)
+        self.rollout_policy.reseed(self.rng.getrandbits(64))
+
+    @property
+    def playouts_per_second(self) -> float:
+        """Search throughput since the policy was created."""
+        return self.n_playouts / self.search_time if self.search_time > 0 else 0.
+
+    # ===== Options of each decision, in the format of the decisions log =====
+    @staticmethod
+    def activation_options(card: Card, game: Game) -> list[Decision]:
+        """Leave `card` unused, or activate it on one of its legal targets."""
+        return [False, *(
+            action for action in legal_actions(game, DecisionPoint.ACTIVATION)[1:]
+            if decode_action(action).card == card.card_id
+        )]
+
+    @staticmethod
+    def reveal_options(player: Player, game: Game) -> list[Decision]:
+        """Skip, or reveal a major card on one of its legal targets."""
+        return [None, *legal_actions(game, DecisionPoint.REVEAL)[1:]]
+
+    @staticmethod
+    def combination_options(player: Player) -> list[Decision]:
+        """Skip, or play one of the possible combinations."""
+        options: list[Decision] = [None]
+        for combination in player.possible_combinations():
+            options.append(tuple(card.card_id for card in player.cards_in_hand(combination.mask)))
+        return options
+
+    @staticmethod
+    def extension_options(player: Player) -> list[Decision]:
+        """Skip, or complete one of the combinations in play."""
+        options: list[Decision] = [None]
+        for idx, combination in player.possible_extensions():
+            options.append(
+                (idx, *(card.card_id for card in player.cards_in_hand(combination.mask)))
+            )
+        return options
+
+    # ===== Search =====
+    def _tree_root(self, game: Game) -> _Node:
+        """Root for the current decision, reusing the tree along the decisions taken since."""
+        key = (id(game), game.seed)
+        node = None
+        if self._game_key == key and self._root is not None:
+            node = self._root
+            for decision in game.decisions[self._root_index:]:
+                node = node.children.get(decision)
+                if node is None:
+                    break
+        if self._game_key != key or self._copy is None:
+            self._copy = Game(
+                game.language, [self._search_policy] * game.n_players,
+                max_turns=game.max_turns, seed=0
+            )
+        self._game_key = key
+        self._root = node if node is not None else _Node()
+        self._root_index = len(game.decisions)
+        return self._root
+
+    def _search(
+        self,
+        game: Game,
+        step: TurnStep,
+        options: list[Decision],
+        forced: tuple[Decision, ...] = ()
+    ) -> Decision:
+        """Run playouts from the current decision and return the most visited of `options`."""
+        root = self._tree_root(game)
+        copy = self._copy
+        assert copy is not None, "type checker assertion, never triggered."
+        seat = game.active_player_idx
+        snapshot = game.snapshot()
+        sampler = DeterminizationSampler(game, seat, self.rng)
+        policy = self._search_policy
+
+        start = time.perf_counter()
+        deadline = min(start + self.time_budget, self._stop_at)
+        playouts = 0
+        while True:
+            copy.restore(snapshot)
+            copy.decisions.clear()
+            copy.moves.clear()
+            sampler.deals(sampler.sample(), copy)
+            # Random effects of the playout draw from the policy, not from what the copy went through.
+            copy.rng.seed(self.rng.getrandbits(64))
+            policy.start(root, forced)
+
+            copy.play_turn(step)
+            for _ in range(self.rollout_turns):
+                if copy.is_over():
+                    break
+                copy.play_turn()
+
+            scores = [player.count_score() for player in copy.players]
+            for node, player_idx in policy.path:
+                node.visits += 1
+                node.reward += _reward(scores, player_idx)
+
+            playouts += 1
+            if self.max_playouts is not None and playouts >= self.max_playouts:
+                break
+            if time.perf_counter() >= deadline or self._stop is not None and self._stop.is_set():
+                break
+
+        self.last_playouts = playouts
+        self.n_playouts += playouts
+        self.search_time += time.perf_counter() - start
+
+        # A reused root may hold options of other deals, illegal in the actual one.
+        return max(options, key=lambda option: (
+            root.children[option].visits if option in root.children else -1
+        ))
+
+    # ===== Decisions =====
+    def wants_to_activate(self, player: Player, card: Card, game: Game) -> Activation:
+        return self.rollout_policy.wants_to_activate(player, card, game)
+
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: Game
+    ) -> Player:
+        if len(candidates) == 1:
+            return candidates[0]
+        options: list[Decision] = [game.players.index(candidate) for candidate in candidates]
+        return game.players[tp.cast(int, self._search(game, TurnStep.DRAW, options))]
+
+    def chooses_major_to_reveal(self, player: Player, game: Game) -> Reveal | None:
+        options = self.reveal_options(player, game)
+        if len(options) == 1:
+            return None
+        decision = self._search(game, TurnStep.REVEAL, options)
+        return None if decision is None else effect_arguments(game, tp.cast(int, decision))
+
+    def chooses_combination(self, player: Player, game: Game) -> list[Card] | None:
+        if player.has_played_combination():
+            return self.rollout_policy.chooses_combination(player, game)
+        options = self.combination_options(player)
+        if len(options) == 1:
+            return None
+        decision = self._search(game, TurnStep.COMBINATION, options)
+        return None if decision is None else _cards_by_id(player.hand, decision)
+
+    def chooses_extension(
+        self, player: Player, game: Game
+    ) -> tuple[int, list[Card]] | None:
+        options = self.extension_options(player)
+        if len(options) == 1:
+            return None
+        # The copy resumes at the combination step, where no combination was played.
+        decision = self._search(game, TurnStep.COMBINATION, options, forced=(None,))
+        if decision is None:
+            return None
+        idx, *card_ids = decision
+        return idx, _cards_by_id(player.hand, card_ids)
+
+
+if __name__ == "__main__":
+    bot = MCTSPolicy(time_budget=0.05)
+    report = simulate(10, "english", [bot, GreedyPolicy(), GreedyPolicy()], max_turns=150, seed=0)
+    wins = sum(0 in result.winners for result in report.results)
+    print(
+        f"MCTS won {wins}/{report.n_games} games against two greedy bots, "
+        f"{bot.n_playouts} playouts at {bot.playouts_per_second:.0f} playouts/s."
+    )
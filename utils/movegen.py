@@ -0,0 +1,768 @@
+"""
+Legal-move generator: every legal action of the active player at each decision
+of a turn, coded as one integer, and the move applying each action.
+
+An action packs its fields in the bits of an int:
+
+======== ====== ============================================================
+bits     field  meaning
+======== ====== ============================================================
+0-2      kind   `ActionKind`
+3-9      card   ID of the major card activated or revealed
+10-12    seat   seat index of the targeted player (draw, effects)
+13-15    seat_b seat index of the second targeted player (EQUALIZER)
+16-20    index  index of the targeted combination (equipment, steal, extension),
+                ID of the targeted major card (ANNIHILATOR) or of the card
+                resurrected by a reactivated RESURRECTION
+21-27    choice chosen card ID + 1, or sacrificed combination index + 1, 0 if none
+28-      cards  mask of the cards played (combination, extension), equipment included
+======== ====== ============================================================
+
+Effects whose targets the player cannot see (FORESIGHT on the hands of the
+opponents in phase 2) are only listed without target. A reactivated action card
+(REACTIVATION) is listed with the targets and choices of its own effects.
+
+Activations and reveals are recorded in `Game.decisions` as their action code:
+`activation_action` and `reveal_action` code the answers of a policy, and
+`effect_arguments` turns a code back into them.
+
+`MoveGenerator` caches the actions by state: Zobrist hash of the game for the
+decisions depending on the whole table, masks of the hand and of the player's
+major cards for new combinations, which are the most expensive to list. Moves
+change the game hash incrementally, so a cached entry is only left when its
+state changes, and the combinations of a player stay cached as long as their
+hand and major pile do.
+"""
+
+import itertools
+import typing as tp
+
+from dataclasses import dataclass
+from enum import IntEnum
+
+try:
+    from .data.base import check_num_value
+    from .data.effects_names import DirectEffects
+    from .data.majors_table import CARD_EFFECTS, MajorType, MAJOR_TYPES
+    from .card import Card
+    from .combinations import HandIndex, classify, find_combinations
+    from .restrictions import can_attach, can_reveal, can_target, SACRIFICE_MASK
+    from .bitboard import ids_of, mask_of
+    from .moves import (
+        Move, DrawMove, MajorDrawMove, ActivationMove, StealMove, RevealMove,
+        CombinationMove, ExtensionMove, EndTurnMove
+    )
+except ImportError:
+    from data.base import check_num_value
+    from data.effects_names import DirectEffects
+    from data.majors_table import CARD_EFFECTS, MajorType, MAJOR_TYPES
+    from card import Card
+    from combinations import HandIndex, classify, find_combinations
+    from restrictions import can_attach, can_reveal, can_target, SACRIFICE_MASK
+    from bitboard import ids_of, mask_of
+    from moves import (
+        Move, DrawMove, MajorDrawMove, ActivationMove, StealMove, RevealMove,
+        CombinationMove, ExtensionMove, EndTurnMove
+    )
+
+if tp.TYPE_CHECKING:
+    from .engine import Game
+    from .player import Player
+
+
+class ActionKind(IntEnum):
+    """What an action does."""
+    SKIP = 0
+    ACTIVATE = 1
+    STEAL = 2
+    REVEAL = 3
+    COMBINATION = 4
+    EXTENSION = 5
+
+
+class DecisionPoint(IntEnum):
+    """Decisions of a turn, in order."""
+    ACTIVATION = 0
+    STEAL = 1
+    REVEAL = 2
+    COMBINATION = 3
+    SECOND_COMBINATION = 4
+    EXTENSION = 5
+
+
+SKIP = int(ActionKind.SKIP)
+"""Action declining the current decision."""
+
+_CARD_SHIFT, _SEAT_SHIFT, _SEAT_B_SHIFT, _INDEX_SHIFT, _CHOICE_SHIFT, _CARDS_SHIFT = (
+    3, 10, 13, 16, 21, 28
+)
+
+# Action cards resolving without target nor choice.
+_UNTARGETED_EFFECTS = frozenset((
+    DirectEffects.DOUBLE_PLAY, DirectEffects.ACCELERATE, DirectEffects.REDISTRIBUTION,
+    DirectEffects.TURNOVER, DirectEffects.MIRROR,
+))
+
+
+@dataclass(frozen=True, slots=True)
+class ActionFields:
+    """Fields of an action, see the table of the module documentation."""
+    kind: ActionKind
+    card: int = 0
+    seat: int = 0
+    seat_b: int = 0
+    index: int = 0
+    choice: int = 0
+    cards: int = 0
+
+
+def encode_action(
+    kind: ActionKind,
+    card: int = 0,
+    seat: int = 0,
+    seat_b: int = 0,
+    index: int = 0,
+    choice: int = 0,
+    cards: int = 0
+) -> int:
+    """Integer code of an action. `choice` is a card ID or combination index plus one."""
+    return (
+        kind | card << _CARD_SHIFT | seat << _SEAT_SHIFT | seat_b << _SEAT_B_SHIFT
+        | index << _INDEX_SHIFT | choice << _CHOICE_SHIFT | cards << _CARDS_SHIFT
+    )
+
+
+def decode_action(action: int) -> ActionFields:
+    """Fields of an action code."""
+    return ActionFields(
+        ActionKind(action & 0x7),
+        action >> _CARD_SHIFT & 0x7F,
+        action >> _SEAT_SHIFT & 0x7,
+        action >> _SEAT_B_SHIFT & 0x7,
+        action >> _INDEX_SHIFT & 0x1F,
+        action >> _CHOICE_SHIFT & 0x7F,
+        action >> _CARDS_SHIFT
+    )
+
+
+# ===== Generation =====
+def _equipment_mask(player: "Player", idx: int) -> int:
+    return mask_of(player.equipments[idx])
+
+
+def _effect_targets(
+    card_id: int, game: "Game", seat: int
+) -> tp.Iterator[dict[str, int]] | None:
+    """
+    Fields of the targets of an action card, None if the card needs targets this
+    generator does not list.
+    """
+    effect = CARD_EFFECTS[card_id][0]
+    others = [idx for idx in range(game.n_players) if idx != seat]
+    if effect in _UNTARGETED_EFFECTS:
+        return iter(({},))
+    if effect is DirectEffects.EXCHANGE:
+        return ({"seat": idx} for idx in others)
+    if effect is DirectEffects.EQUALIZER:
+        return (
+            {"seat": first, "seat_b": second}
+            for first, second in itertools.combinations(range(game.n_players), 2)
+        )
+    if effect is DirectEffects.STEAL:
+        return (
+            {"seat": idx, "index": comb_idx}
+            for idx in others
+            for comb_idx in range(len(game.players[idx].combinations))
+            if can_target(card_id, _equipment_mask(game.players[idx], comb_idx))
+        )
+    if effect is DirectEffects.ANNIHILATOR:
+        return itertools.chain(
+            (
+                {"seat": idx, "index": card.card_id}
+                for idx in others for card in game.players[idx].active_permanents
+            ),
+            (
+                {"seat": idx, "index": card.card_id}
+                for idx in others
+                for equipment in game.players[idx].equipments
+                if can_target(card_id, mask_of(equipment))
+                for card in equipment
+            ),
+        )
+    return None
+
+
+def _resurrection_choices(game: "Game", player: "Player") -> list[Card]:
+    """Cards the player can bring back with RESURRECTION."""
+    return list(player.inactive_permanents) + [
+        used for used in game.action_discard if MAJOR_TYPES[used.card_id] == MajorType.EQUIPMENT
+    ]
+
+
+def _reveal_actions(game: "Game", seat: int) -> list[int]:
+    player = game.players[seat]
+    playable = player.possible_combinations()
+    action_discard = mask_of(game.action_discard)
+    n_combinations = len(player.combinations)
+    actions = []
+    for card in player.major_pile:
+        card_id = card.card_id
+        if not can_reveal(card_id, playable, n_combinations, action_discard):
+            continue
+        major_type = MAJOR_TYPES[card_id]
+        if major_type == MajorType.PERMANENT:
+            actions.append(encode_action(ActionKind.REVEAL, card_id))
+
+        elif major_type == MajorType.EQUIPMENT:
+            for idx, combination in enumerate(player.combinations):
+                if not can_attach(card_id, mask_of(combination), _equipment_mask(player, idx)):
+                    continue
+                if SACRIFICE_MASK >> card_id & 1:
+                    actions.extend(
+                        encode_action(ActionKind.REVEAL, card_id, index=idx, choice=other + 1)
+                        for other in range(n_combinations) if other != idx
+                    )
+                else:
+                    actions.append(encode_action(ActionKind.REVEAL, card_id, index=idx))
+
+        elif DirectEffects.REACTIVATION in CARD_EFFECTS[card_id]:
+            for used in game.action_discard:
+                if DirectEffects.RESURRECTION in CARD_EFFECTS[used.card_id]:
+                    actions.extend(
+                        encode_action(
+                            ActionKind.REVEAL, card_id, index=choice.card_id,
+                            choice=used.card_id + 1
+                        )
+                        for choice in _resurrection_choices(game, player)
+                    )
+                    continue
+                targets = _effect_targets(used.card_id, game, seat)
+                if targets is None:
+                    continue
+                actions.extend(
+                    encode_action(ActionKind.REVEAL, card_id, choice=used.card_id + 1, **fields)
+                    for fields in targets
+                )
+
+        elif DirectEffects.RESURRECTION in CARD_EFFECTS[card_id]:
+            actions.extend(
+                encode_action(ActionKind.REVEAL, card_id, choice=choice.card_id + 1)
+                for choice in _resurrection_choices(game, player)
+            )
+
+        else:
+            targets = _effect_targets(card_id, game, seat)
+            if targets is not None:
+                actions.extend(encode_action(ActionKind.REVEAL, card_id, **fields) for fields in targets)
+    return actions
+
+
+def _activation_actions(game: "Game", seat: int) -> list[int]:
+    player = game.players[seat]
+    phase_1 = len(game.minor_draw_pile) > 0
+    actions = []
+    for card in player.active_permanents:
+        card_id = card.card_id
+        effects = CARD_EFFECTS[card_id]
+        if DirectEffects.MEMORY_RECALL in effects:
+            actions.extend(
+                encode_action(ActionKind.ACTIVATE, card_id, choice=used.card_id + 1)
+                for used in game.minor_discard
+            )
+        elif DirectEffects.ACCUMULATOR in effects and not phase_1:
+            actions.extend(
+                encode_action(ActionKind.ACTIVATE, card_id, seat=idx)
+                for idx, other in enumerate(game.players)
+                if idx != seat and not other.has_empty_hand()
+            )
+        else:
+            actions.append(encode_action(ActionKind.ACTIVATE, card_id))
+            if DirectEffects.FORESIGHT in effects and len(game.minor_draw_pile) > 1:
+                # Swap the two top cards of the minor pile.
+                actions.append(encode_action(ActionKind.ACTIVATE, card_id, choice=1))
+    return actions
+
+
+def _steal_actions(game: "Game", seat: int) -> list[int]:
+    return [
+        encode_action(ActionKind.STEAL, seat=idx)
+        for idx, other in enumerate(game.players)
+        if idx != seat and not other.has_empty_hand()
+    ]
+
+
+def combination_actions(hand_mask: int, majors_mask: int) -> list[int]:
+    """
+    New combinations which can be played from a hand, with every legal set of
+    equipment cards of the major pile attached at once.
+
+    Parameters
+    ----------
+
+    hand_mask: int
+        Mask of the cards of the hand.
+
+    majors_mask: int
+        Mask of the major cards of the major pile.
+
+    Returns
+    -------
+
+    list[int]
+        Codes of the COMBINATION actions, cards and equipment in the cards mask.
+    """
+    index = HandIndex(ids_of(hand_mask))
+    equipment_ids = [
+        card_id for card_id in ids_of(majors_mask)
+        if MAJOR_TYPES[card_id] == MajorType.EQUIPMENT and not SACRIFICE_MASK >> card_id & 1
+    ]
+    actions = {}
+    for size in range(len(equipment_ids) + 1):
+        for subset in itertools.combinations(equipment_ids, size):
+            modifiers = [effect for card_id in subset for effect in CARD_EFFECTS[card_id]]
+            jokers = modifiers.count(DirectEffects.JOKER)
+            hybrid = DirectEffects.HYBRID in modifiers
+            for combination in find_combinations(index, jokers > 0, hybrid):
+                mask = combination.mask
+                equipment_mask = 0
+                for card_id in subset:
+                    if not can_attach(card_id, mask, equipment_mask, new_combination=True):
+                        break
+                    equipment_mask |= 1 << card_id
+                else:
+                    if classify(mask, jokers, hybrid) is not None:
+                        action = encode_action(ActionKind.COMBINATION, cards=mask | equipment_mask)
+                        actions[action] = None
+    return list(actions)
+
+
+def _extension_actions(game: "Game", seat: int) -> list[int]:
+    player = game.players[seat]
+    return [
+        encode_action(ActionKind.EXTENSION, index=idx, cards=combination.mask)
+        for idx, combination in player.possible_extensions()
+    ]
+
+
+def legal_actions(game: "Game", point: DecisionPoint) -> tuple[int, ...]:
+    """
+    Every legal action of the active player of `game` at the decision `point`
+    of their turn, skipping (`SKIP`) first when the decision is optional.
+    """
+    seat = game.active_player_idx
+    player = game.players[seat]
+    if point == DecisionPoint.ACTIVATION:
+        return (SKIP, *_activation_actions(game, seat))
+    if point == DecisionPoint.STEAL:
+        return tuple(_steal_actions(game, seat))
+    if point == DecisionPoint.REVEAL:
+        return (SKIP, *_reveal_actions(game, seat))
+    if point == DecisionPoint.EXTENSION:
+        return (SKIP, *_extension_actions(game, seat))
+    return (SKIP, *combination_actions(player.hand_index.mask, mask_of(player.major_pile)))
+
+
+# ===== Moves =====
+def to_move(game: "Game", action: int) -> Move | None:
+    """Move of the active player of `game` applying `action`, None for `SKIP`."""
+    fields = decode_action(action)
+    seat = game.active_player_idx
+    player = game.players[seat]
+    cards = Card.all_by_id(game.language)
+
+    if fields.kind is ActionKind.SKIP:
+        return None
+    if fields.kind is ActionKind.STEAL:
+        return StealMove(seat, fields.seat)
+    if fields.kind is ActionKind.COMBINATION:
+        return CombinationMove(
+            seat, player.cards_in_hand(fields.cards),
+            [card for card in player.major_pile if fields.cards >> card.card_id & 1]
+        )
+    if fields.kind is ActionKind.EXTENSION:
+        return ExtensionMove(seat, fields.index, player.cards_in_hand(fields.cards))
+
+    card = cards[fields.card]
+    choice = cards[fields.choice - 1] if fields.choice else None
+    if fields.kind is ActionKind.ACTIVATE:
+        effects = CARD_EFFECTS[fields.card]
+        if DirectEffects.FORESIGHT in effects:
+            return ActivationMove(
+                seat, card, choice=game.minor_draw_pile.peek(2)[::-1] if fields.choice else None
+            )
+        if DirectEffects.ACCUMULATOR in effects and len(game.minor_draw_pile) == 0:
+            return ActivationMove(seat, card, target=game.players[fields.seat])
+        return ActivationMove(seat, card, choice=choice)
+
+    target, choice = _reveal_target(game, fields, choice)
+    return RevealMove(seat, card, target, choice)
+
+
+def _reveal_target(
+    game: "Game", fields: ActionFields, choice: Card | None
+) -> tuple[tp.Any, tp.Any]:
+    """
+    Target and choice of the reveal of a major card, as `Player.reveals_major_card`
+    takes them. The choice of REACTIVATION is the reactivated card with its own choice.
+    """
+    if MAJOR_TYPES[fields.card] == MajorType.EQUIPMENT:
+        return fields.index, fields.choice - 1 if fields.choice else None
+
+    effects = CARD_EFFECTS[fields.card]
+    if DirectEffects.RESURRECTION in effects:
+        return None, choice
+    if DirectEffects.REACTIVATION not in effects:
+        return _effect_target(game, fields, fields.card), None
+    if DirectEffects.RESURRECTION in CARD_EFFECTS[choice.card_id]:
+        return None, (choice, Card.all_by_id(game.language)[fields.index])
+    return _effect_target(game, fields, choice.card_id), (choice, None)
+
+
+def _effect_target(game: "Game", fields: ActionFields, effect_card: int) -> tp.Any:
+    """Target of the effects of the action card `effect_card`, read from `fields`."""
+    effect = CARD_EFFECTS[effect_card][0]
+    if effect is DirectEffects.EXCHANGE:
+        return game.players[fields.seat]
+    if effect is DirectEffects.EQUALIZER:
+        return game.players[fields.seat], game.players[fields.seat_b]
+    if effect is DirectEffects.STEAL:
+        return game.players[fields.seat], fields.index
+    if effect is DirectEffects.ANNIHILATOR:
+        return game.players[fields.seat], Card.all_by_id(game.language)[fields.index]
+    return None
+
+
+def action_targets(game: "Game", action: int) -> tuple[int | None, int | None, int | None]:
+    """
+    Targeted seat, second targeted seat and targeted combination index or card
+    ID of an action of the active player of `game`, None for each field the
+    action does not use.
+    """
+    fields = decode_action(action)
+    if fields.kind is ActionKind.STEAL:
+        return fields.seat, None, None
+    if fields.kind is ActionKind.EXTENSION:
+        return None, None, fields.index
+    if fields.kind is ActionKind.ACTIVATE:
+        if DirectEffects.ACCUMULATOR in CARD_EFFECTS[fields.card] and len(game.minor_draw_pile) == 0:
+            return fields.seat, None, None
+        return None, None, None
+    if fields.kind is not ActionKind.REVEAL:
+        return None, None, None
+
+    if MAJOR_TYPES[fields.card] == MajorType.EQUIPMENT:
+        return None, None, fields.index
+    effects = CARD_EFFECTS[fields.card]
+    if DirectEffects.RESURRECTION in effects:
+        return None, None, None
+    effect_card = fields.choice - 1 if DirectEffects.REACTIVATION in effects else fields.card
+    effect = CARD_EFFECTS[effect_card][0]
+    if effect is DirectEffects.EXCHANGE:
+        return fields.seat, None, None
+    if effect is DirectEffects.EQUALIZER:
+        return fields.seat, fields.seat_b, None
+    if effect in (DirectEffects.STEAL, DirectEffects.ANNIHILATOR):
+        return fields.seat, None, fields.index
+    return None, None, None
+
+
+def effect_arguments(game: "Game", action: int) -> tuple[Card, tp.Any, tp.Any]:
+    """
+    Card, target and choice of an activation or reveal action of the active
+    player of `game`, as policies answer these decisions.
+    """
+    move = to_move(game, action)
+    assert isinstance(move, (ActivationMove, RevealMove)), (
+        f"The action {action} neither activates nor reveals a card."
+    )
+    return move.card, move.target, move.choice
+
+
+def activation_action(
+    game: "Game", card: Card, target: tp.Any = None, choice: tp.Any = None
+) -> int:
+    """
+    Action code of the activation of the permanent card `card` by the active
+    player of `game` on `target` and `choice` (see `Player.activates_permanent_card`).
+    """
+    card_id = card.card_id
+    effects = CARD_EFFECTS[card_id]
+    pile = game.minor_draw_pile
+    if DirectEffects.MEMORY_RECALL in effects:
+        return encode_action(ActionKind.ACTIVATE, card_id, choice=choice.card_id + 1)
+    if DirectEffects.ACCUMULATOR in effects and target is not None:
+        return encode_action(ActionKind.ACTIVATE, card_id, seat=game.players.index(target))
+    if DirectEffects.FORESIGHT in effects and len(pile) > 0:
+        swap = choice is not None and list(choice) != pile.peek(2)
+        return encode_action(ActionKind.ACTIVATE, card_id, choice=int(swap))
+    if DirectEffects.FORESIGHT in effects and target is not None:
+        raise ValueError(f"The targets of {card} in the hands of the opponents have no action code.")
+    return encode_action(ActionKind.ACTIVATE, card_id)
+
+
+def reveal_action(
+    game: "Game", card: Card, target: tp.Any = None, choice: tp.Any = None
+) -> int:
+    """
+    Action code of the reveal of the major card `card` by the active player of
+    `game` on `target` and `choice` (see `Player.reveals_major_card`).
+    """
+    card_id = card.card_id
+    if MAJOR_TYPES[card_id] == MajorType.PERMANENT:
+        return encode_action(ActionKind.REVEAL, card_id)
+    if MAJOR_TYPES[card_id] == MajorType.EQUIPMENT:
+        return encode_action(
+            ActionKind.REVEAL, card_id, index=target, choice=0 if choice is None else choice + 1
+        )
+
+    effects = CARD_EFFECTS[card_id]
+    if DirectEffects.RESURRECTION in effects:
+        return encode_action(ActionKind.REVEAL, card_id, choice=choice.card_id + 1)
+    fields: dict[str, int] = {}
+    effect_card = card_id
+    if DirectEffects.REACTIVATION in effects:
+        used, inner_choice = choice
+        effect_card = used.card_id
+        fields["choice"] = effect_card + 1
+        if DirectEffects.RESURRECTION in CARD_EFFECTS[effect_card]:
+            fields["index"] = inner_choice.card_id
+    effect = CARD_EFFECTS[effect_card][0]
+    players = game.players
+    if effect is DirectEffects.EXCHANGE:
+        fields["seat"] = players.index(target)
+    elif effect is DirectEffects.EQUALIZER:
+        fields["seat"], fields["seat_b"] = (players.index(other) for other in target)
+    elif effect is DirectEffects.STEAL:
+        fields["seat"], fields["index"] = players.index(target[0]), target[1]
+    elif effect is DirectEffects.ANNIHILATOR:
+        fields["seat"], fields["index"] = players.index(target[0]), target[1].card_id
+    return encode_action(ActionKind.REVEAL, card_id, **fields)
+
+
+def describe_action(game: "Game", action: int) -> str:
+    """Short description of an action of the active player of `game`, for human players."""
+    fields = decode_action(action)
+    cards = Card.all_by_id(game.language)
+    players = game.players
+
+    def names(mask: int) -> str:
+        return ", ".join(str(cards[card_id]) for card_id in ids_of(mask))
+
+    if fields.kind is ActionKind.SKIP:
+        return "Skip"
+    if fields.kind is ActionKind.STEAL:
+        return f"Draw a card from {players[fields.seat].name}"
+    if fields.kind is ActionKind.COMBINATION:
+        return f"Play {names(fields.cards)}"
+    if fields.kind is ActionKind.EXTENSION:
+        return f"Complete combination {fields.index + 1} with {names(fields.cards)}"
+
+    verb = "Activate" if fields.kind is ActionKind.ACTIVATE else "Reveal"
+    text = f"{verb} {cards[fields.card]}"
+    effects = CARD_EFFECTS[fields.card]
+    if fields.kind is ActionKind.ACTIVATE:
+        if DirectEffects.FORESIGHT in effects and fields.choice:
+            return f"{text}, swapping the two top cards"
+        if DirectEffects.ACCUMULATOR in effects and len(game.minor_draw_pile) == 0:
+            return f"{text} on {players[fields.seat].name}"
+        if fields.choice:
+            return f"{text}, taking {cards[fields.choice - 1]}"
+        return text
+    if MAJOR_TYPES[fields.card] == MajorType.EQUIPMENT:
+        text += f" on combination {fields.index + 1}"
+        if fields.choice:
+            text += f", sacrificing combination {fields.choice}"
+        return text
+    if DirectEffects.REACTIVATION in effects:
+        text += f" to play {cards[fields.choice - 1]} again"
+        effects = CARD_EFFECTS[fields.choice - 1]
+        if DirectEffects.RESURRECTION in effects:
+            return f"{text} on {cards[fields.index]}"
+    elif DirectEffects.RESURRECTION in effects:
+        return f"{text} on {cards[fields.choice - 1]}"
+    effect = effects[0]
+    if effect is DirectEffects.EXCHANGE:
+        text += f" with {players[fields.seat].name}"
+    elif effect is DirectEffects.EQUALIZER:
+        text += f" on {players[fields.seat].name} and {players[fields.seat_b].name}"
+    elif effect is DirectEffects.STEAL:
+        text += f" on combination {fields.index + 1} of {players[fields.seat].name}"
+    elif effect is DirectEffects.ANNIHILATOR:
+        text += f" on {cards[fields.index]} of {players[fields.seat].name}"
+    return text
+
+
+# ===== Turn =====
+TurnSteps = tp.Generator[tuple[DecisionPoint, tuple[int, ...]], int, None]
+"""Turn played decision by decision, see `turn_steps`."""
+
+
+def turn_steps(game: "Game", generator: "MoveGenerator | None" = None) -> TurnSteps:
+    """
+    Play the turn of the active player of `game` one decision at a time, in the
+    order of `Game.play_turn`, then end it.
+
+    The generator yields each decision with a real choice as (point, legal
+    actions), and expects the chosen action to be sent back. Decisions with a
+    single legal action are taken without yielding. Every decision is recorded
+    in `game.decisions` with its targets, choices and equipment (see `Decision`),
+    so that `Game.replay` plays the turn again.
+
+    Parameters
+    ----------
+
+    game: Game
+        Game to play the turn of, which must be at the start of a turn.
+
+    generator: MoveGenerator, optional
+        Cache to list the legal actions with. Defaults to no cache.
+
+    Returns
+    -------
+
+    TurnSteps
+        Generator of the decisions of the turn.
+    """
+    listed = generator.legal_actions if generator is not None else legal_actions
+    seat = game.active_player_idx
+    player = game.players[seat]
+
+    def decide(
+        point: DecisionPoint, actions: tuple[int, ...]
+    ) -> tp.Generator[tuple[DecisionPoint, tuple[int, ...]], int, int]:
+        if len(actions) == 1:
+            return actions[0]
+        return (yield point, actions)
+
+    # Activation, one decision per permanent card as in `Game._activation_step`.
+    for card in list(player.active_permanents):
+        actions = tuple(
+            action for action in listed(game, DecisionPoint.ACTIVATION)
+            if action == SKIP or action >> _CARD_SHIFT & 0x7F == card.card_id
+        )
+        action = yield from decide(DecisionPoint.ACTIVATION, actions)
+        game.decisions.append(action if action != SKIP else False)
+        if action != SKIP:
+            game.apply(to_move(game, action))
+
+    # Draw.
+    if not player.has_active_effect(DirectEffects.MEMORY_RECALL):
+        if game.phase is type(game.phase).PHASE_1:
+            # The pile may have been emptied by an activated permanent card.
+            if len(game.minor_draw_pile) > 0:
+                game.apply(DrawMove(seat))
+        else:
+            actions = listed(game, DecisionPoint.STEAL)
+            if actions:
+                action = yield from decide(DecisionPoint.STEAL, actions)
+                game.decisions.append(decode_action(action).seat)
+                game.apply(to_move(game, action))
+
+    # Reveal.
+    if player.has_unused_majors():
+        action = yield from decide(DecisionPoint.REVEAL, listed(game, DecisionPoint.REVEAL))
+        game.decisions.append(None if action == SKIP else action)
+        if action != SKIP:
+            game.apply(to_move(game, action))
+
+    # Combination, or extension of a combination in play.
+    action = yield from decide(DecisionPoint.COMBINATION, listed(game, DecisionPoint.COMBINATION))
+    if _plays(game, action):
+        if player.has_active_effect(DirectEffects.DOUBLE_PLAY):
+            action = yield from decide(
+                DecisionPoint.SECOND_COMBINATION,
+                listed(game, DecisionPoint.SECOND_COMBINATION)
+            )
+            if _plays(game, action) and len(game.major_draw_pile) > 0:
+                game.apply(MajorDrawMove(seat))
+    elif player.has_combinations():
+        action = yield from decide(DecisionPoint.EXTENSION, listed(game, DecisionPoint.EXTENSION))
+        _plays(game, action)
+
+    # Major draw, then next player.
+    if player.has_played_combination() and len(game.major_draw_pile) > 0:
+        game.apply(MajorDrawMove(seat))
+    game.apply(EndTurnMove(seat))
+
+
+def _plays(game: "Game", action: int) -> bool:
+    """
+    Record and apply a combination or extension action, with the IDs of the
+    cards in the order of the move, equipment last. Whether it was played.
+    """
+    move = to_move(game, action)
+    if move is None:
+        game.decisions.append(None)
+        return False
+    if isinstance(move, ExtensionMove):
+        game.decisions.append((move.combination_idx, *(card.card_id for card in move.cards)))
+    else:
+        assert isinstance(move, CombinationMove), "type checker assertion, never triggered."
+        game.decisions.append(tuple(card.card_id for card in (*move.cards, *move.equipment)))
+    game.apply(move)
+    return True
+
+
+# ===== Cache =====
+class MoveGenerator:
+    """
+    Legal actions with a bounded cache. Entries are keyed by the Zobrist hash of
+    the game and the decision, and new combinations also by the masks of the
+    hand and of the major pile, so that they survive changes of the rest of the
+    table. The oldest entries are dropped first once the cache is full.
+
+    Attributes
+    ----------
+
+    max_entries: int
+        Maximum number of entries of each cache.
+
+    hits, misses: int
+        Lookup statistics.
+    """
+    def __init__(self, max_entries: int = 1 << 16) -> None:
+        """
+        Parameters
+        ----------
+        max_entries: int
+            Maximum number of entries of each cache. Defaults to 65536.
+        """
+        check_num_value(max_entries, "max_entries", ">", 0)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._by_state: dict[tuple[int, int], tuple[int, ...]] = {}
+        self._combinations: dict[tuple[int, int], tuple[int, ...]] = {}
+
+    def legal_actions(self, game: "Game", point: DecisionPoint) -> tuple[int, ...]:
+        """Same as `legal_actions`, cached."""
+        if point in (DecisionPoint.COMBINATION, DecisionPoint.SECOND_COMBINATION):
+            player = game.active_player
+            key = (player.hand_index.mask, mask_of(player.major_pile))
+            cache = self._combinations
+        else:
+            key = (game.zobrist, point)
+            cache = self._by_state
+
+        actions = cache.get(key)
+        if actions is not None:
+            self.hits += 1
+            return actions
+        self.misses += 1
+        actions = legal_actions(game, point)
+        if len(cache) >= self.max_entries:
+            del cache[next(iter(cache))]
+        cache[key] = actions
+        return actions
+
+    def clear(self) -> None:
+        """Remove every entry and reset the statistics."""
+        self._by_state.clear()
+        self._combinations.clear()
+        self.hits = self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
@@ -0,0 +1,380 @@
+"""
+Reversible moves: every change of a game state as an object that can be applied
+to a game and undone, so that a search can go down a line of play and come back
+without copying the game.
+
+Moves record what they need to be undone when they are applied, and must be
+undone in reverse order of application: `Game.apply` and `Game.undo` take care
+of it with the move stack of the game. Moves also give the change of the Zobrist
+hash of the game they make (see `utils.zobrist`), so that the game can keep its
+hash up to date without recomputing it. Undoing a move does not rewind the random
+generators: a move drawing at random (steal) replays the same card only if it
+was given one.
+
+Moves resolving card effects (activations, reveals) are undone with the undo
+records the effects return (see `utils.effects`). Set `CHECK_UNDO` to also check,
+with snapshots of the game, that they put the game back exactly as it was.
+"""
+
+import typing as tp
+
+from abc import ABC, abstractmethod
+
+try:
+    from .card import Card
+    from .data.majors_table import MajorType
+    from .restrictions import SACRIFICE_MASK
+    from .zobrist import (
+        HashZone, MINOR_DRAW_ZONE, MAJOR_DRAW_ZONE, MINOR_DISCARD_ZONE,
+        zone_of, card_key, moves_key, flag_key, active_key, seat_turn_key
+    )
+except ImportError:
+    from card import Card
+    from data.majors_table import MajorType
+    from restrictions import SACRIFICE_MASK
+    from zobrist import (
+        HashZone, MINOR_DRAW_ZONE, MAJOR_DRAW_ZONE, MINOR_DISCARD_ZONE,
+        zone_of, card_key, moves_key, flag_key, active_key, seat_turn_key
+    )
+
+if tp.TYPE_CHECKING:
+    from .effects import Undo
+    from .engine import Game
+
+
+CHECK_UNDO = False
+"""Whether moves resolving effects check their undo against a snapshot (slow, for debugging)."""
+
+
+class Move(ABC):
+    """
+    Base class of the moves. A move is applied once, then possibly undone once,
+    after which it can be applied again.
+
+    Attributes
+    ----------
+
+    player_idx: int
+        Seat index of the player making the move.
+    """
+    __slots__ = ("player_idx", "_hash_delta")
+
+    def __init__(self, player_idx: int) -> None:
+        self.player_idx = player_idx
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self._fields()
+        )
+        return f"{self.__class__.__name__}({fields})"
+
+    @classmethod
+    def _fields(cls) -> list[str]:
+        fields = []
+        for klass in reversed(cls.__mro__):
+            fields.extend(
+                name for name in getattr(klass, "__slots__", ()) if not name.startswith("_")
+            )
+        return fields
+
+    @abstractmethod
+    def apply(self, game: "Game") -> None:
+        """Change the game state."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def undo(self, game: "Game") -> None:
+        """Put the game back in the state it had before `apply`."""
+        raise NotImplementedError
+
+    def hash_delta(self, game: "Game") -> int | None:
+        """
+        Change of the Zobrist hash of the game made by the move, called right
+        after `apply`. None if the game hash must be recomputed from scratch.
+        """
+        return None
+
+
+class _EffectMove(Move):
+    """
+    Move resolving card effects, undone with the undo record they return. With
+    `CHECK_UNDO`, the game state is saved before applying the move and compared
+    to the state undoing it gives back.
+    """
+    __slots__ = ("_undo", "_snapshot")
+
+    def apply(self, game: "Game") -> None:
+        self._snapshot = game.snapshot() if CHECK_UNDO else None
+        self._undo = self._apply(game)
+
+    def undo(self, game: "Game") -> None:
+        self._undo()
+        self._undo = None
+        if self._snapshot is not None:
+            assert game.snapshot() == self._snapshot, f"{self!r} was not undone exactly."
+            self._snapshot = None
+
+    @abstractmethod
+    def _apply(self, game: "Game") -> "Undo":
+        raise NotImplementedError
+
+
+# ===== Draws =====
+class DrawMove(Move):
+    """The player draws the top card of the minor cards draw pile."""
+    __slots__ = ("_card",)
+
+    def apply(self, game: "Game") -> None:
+        self._card = game.minor_draw_pile.draw(1)[0]
+        game.players[self.player_idx].adds_to_hand([self._card])
+
+    def undo(self, game: "Game") -> None:
+        player = game.players[self.player_idx]
+        player.removes_from_hand([self._card])
+        game.minor_draw_pile.puts_on_top([self._card])
+
+    def hash_delta(self, game: "Game") -> int:
+        card_id = self._card.card_id
+        return (
+            card_key(card_id, MINOR_DRAW_ZONE)
+            ^ card_key(card_id, zone_of(self.player_idx, HashZone.HAND))
+        )
+
+
+class MajorDrawMove(Move):
+    """The player draws the top card of the major cards draw pile."""
+    __slots__ = ("_card",)
+
+    def apply(self, game: "Game") -> None:
+        self._card = game.major_draw_pile.draw(1)[0]
+        game.players[self.player_idx].adds_to_major_pile([self._card])
+
+    def undo(self, game: "Game") -> None:
+        game.players[self.player_idx].major_pile.pop()
+        game.major_draw_pile.puts_on_top([self._card])
+
+    def hash_delta(self, game: "Game") -> int:
+        card_id = self._card.card_id
+        return (
+            card_key(card_id, MAJOR_DRAW_ZONE)
+            ^ card_key(card_id, zone_of(self.player_idx, HashZone.MAJOR_PILE))
+        )
+
+
+class StealMove(Move):
+    """
+    The player draws a card from the hand of another player: `card` if given,
+    else a random one drawn with the player's generator.
+    """
+    __slots__ = ("target_idx", "card", "_drawn", "_position", "_unseen_losses", "_seen")
+
+    def __init__(self, player_idx: int, target_idx: int, card: Card | None = None) -> None:
+        super().__init__(player_idx)
+        self.target_idx = target_idx
+        self.card = card
+
+    def apply(self, game: "Game") -> None:
+        player, target = game.players[self.player_idx], game.players[self.target_idx]
+        card = self.card if self.card is not None else player.rng.choice(target.hand)
+        self._drawn = card
+        self._position = target.hand.index(card)
+        self._unseen_losses = target.n_unseen_losses
+        self._seen = target.knowledge.in_hands.get(card.card_id)
+        target.removes_from_hand([card], unseen=True)
+        player.adds_to_hand([card])
+        # The robbed player knows which card they lost, hence who holds it now.
+        target.knowledge.sees_in_hand(card.card_id, self.player_idx, player.n_unseen_losses)
+
+    def undo(self, game: "Game") -> None:
+        player, target = game.players[self.player_idx], game.players[self.target_idx]
+        player.removes_from_hand([self._drawn])
+        order = target.hand.copy()
+        order.insert(self._position, self._drawn)
+        target.returns_to_hand([self._drawn], order)
+        target.n_unseen_losses = self._unseen_losses
+        if self._seen is None:
+            del target.knowledge.in_hands[self._drawn.card_id]
+        else:
+            target.knowledge.in_hands[self._drawn.card_id] = self._seen
+
+    def hash_delta(self, game: "Game") -> int:
+        card_id = self._drawn.card_id
+        return (
+            card_key(card_id, zone_of(self.target_idx, HashZone.HAND))
+            ^ card_key(card_id, zone_of(self.player_idx, HashZone.HAND))
+        )
+
+
+class DiscardMove(Move):
+    """The player puts cards of their hand on the minor cards discard pile."""
+    __slots__ = ("cards", "_hand")
+
+    def __init__(self, player_idx: int, cards: tp.Sequence[Card]) -> None:
+        super().__init__(player_idx)
+        self.cards = tuple(cards)
+
+    def apply(self, game: "Game") -> None:
+        player = game.players[self.player_idx]
+        self._hand = player.hand.copy()
+        player.removes_from_hand(list(self.cards))
+        game.minor_discard.extend(self.cards)
+
+    def undo(self, game: "Game") -> None:
+        del game.minor_discard[len(game.minor_discard) - len(self.cards):]
+        game.players[self.player_idx].returns_to_hand(list(self.cards), self._hand)
+
+    def hash_delta(self, game: "Game") -> int:
+        return moves_key(self.cards, zone_of(self.player_idx, HashZone.HAND), MINOR_DISCARD_ZONE)
+
+
+# ===== Combinations =====
+class CombinationMove(Move):
+    """The player puts a new combination in play, possibly with equipment attached."""
+    __slots__ = ("cards", "equipment", "_hand", "_major_pile", "_played")
+
+    def __init__(
+        self, player_idx: int, cards: tp.Sequence[Card], equipment: tp.Sequence[Card] = ()
+    ) -> None:
+        super().__init__(player_idx)
+        self.cards = tuple(cards)
+        self.equipment = tuple(equipment)
+
+    def apply(self, game: "Game") -> None:
+        player = game.players[self.player_idx]
+        self._hand = player.hand.copy()
+        self._major_pile = player.major_pile.copy()
+        self._played = player.has_played_combination()
+        player.plays_combination(list(self.cards), list(self.equipment))
+
+    def undo(self, game: "Game") -> None:
+        player = game.players[self.player_idx]
+        player.removes_combination(len(player.combinations) - 1)
+        player.returns_to_hand(list(self.cards), self._hand)
+        player.major_pile[:] = self._major_pile
+        player.sets_turn_flags(player.has_revealed_major(), self._played)
+
+    def hash_delta(self, game: "Game") -> int:
+        seat = self.player_idx
+        idx = len(game.players[seat].combinations) - 1
+        delta = moves_key(
+            self.cards, zone_of(seat, HashZone.HAND), zone_of(seat, HashZone.COMBINATION + idx)
+        ) ^ moves_key(
+            self.equipment, zone_of(seat, HashZone.MAJOR_PILE),
+            zone_of(seat, HashZone.EQUIPMENT + idx)
+        )
+        return delta if self._played else delta ^ flag_key(seat, True)
+
+
+class ExtensionMove(Move):
+    """The player completes one of their combinations with cards of their hand."""
+    __slots__ = ("combination_idx", "cards", "_hand", "_played")
+
+    def __init__(self, player_idx: int, combination_idx: int, cards: tp.Sequence[Card]) -> None:
+        super().__init__(player_idx)
+        self.combination_idx = combination_idx
+        self.cards = tuple(cards)
+
+    def apply(self, game: "Game") -> None:
+        player = game.players[self.player_idx]
+        self._hand = player.hand.copy()
+        self._played = player.has_played_combination()
+        player.adds_to_combination(list(self.cards), player.combinations[self.combination_idx])
+
+    def undo(self, game: "Game") -> None:
+        player = game.players[self.player_idx]
+        player.removes_from_combination(self.combination_idx, len(self.cards))
+        player.returns_to_hand(list(self.cards), self._hand)
+        player.sets_turn_flags(player.has_revealed_major(), self._played)
+
+    def hash_delta(self, game: "Game") -> int:
+        seat = self.player_idx
+        delta = moves_key(
+            self.cards, zone_of(seat, HashZone.HAND),
+            zone_of(seat, HashZone.COMBINATION + self.combination_idx)
+        )
+        return delta if self._played else delta ^ flag_key(seat, True)
+
+
+# ===== Major cards =====
+class RevealMove(_EffectMove):
+    """The player reveals a major card of their major pile (see `Player.reveals_major_card`)."""
+    __slots__ = ("card", "target", "choice", "_revealed")
+
+    def __init__(
+        self, player_idx: int, card: Card, target: tp.Any = None, choice: tp.Any = None
+    ) -> None:
+        super().__init__(player_idx)
+        self.card = card
+        self.target = target
+        self.choice = choice
+
+    def _apply(self, game: "Game") -> "Undo":
+        player = game.players[self.player_idx]
+        self._revealed = player.has_revealed_major()
+        return player.reveals_major_card(self.card, game, self.target, self.choice)
+
+    def hash_delta(self, game: "Game") -> int | None:
+        # Action cards and sacrifices change the game too widely to follow.
+        if self.card.major_type == MajorType.ACTION or SACRIFICE_MASK >> self.card.card_id & 1:
+            return None
+        seat = self.player_idx
+        zone = (
+            HashZone.EQUIPMENT + self.target if self.card.major_type == MajorType.EQUIPMENT
+            else HashZone.ACTIVE_PERMANENTS
+        )
+        delta = (
+            card_key(self.card.card_id, zone_of(seat, HashZone.MAJOR_PILE))
+            ^ card_key(self.card.card_id, zone_of(seat, zone))
+        )
+        return delta if self._revealed else delta ^ flag_key(seat, False)
+
+
+class ActivationMove(_EffectMove):
+    """The player activates one of their active permanent cards."""
+    __slots__ = ("card", "target", "choice")
+
+    def __init__(
+        self, player_idx: int, card: Card, target: tp.Any = None, choice: tp.Any = None
+    ) -> None:
+        super().__init__(player_idx)
+        self.card = card
+        self.target = target
+        self.choice = choice
+
+    def _apply(self, game: "Game") -> "Undo":
+        return game.players[self.player_idx].activates_permanent_card(
+            self.card, game, self.target, self.choice
+        )
+
+
+# ===== Turn =====
+class EndTurnMove(Move):
+    """
+    The player ends their turn: their per-turn flags and effects are cleared,
+    the game switches to phase 2 if the minor cards draw pile is empty, and the
+    next player still in the game becomes active.
+    """
+    __slots__ = ("_flags", "_effects", "_phase", "_n_phase_1_turns", "_active_idx", "_turn_key")
+
+    def apply(self, game: "Game") -> None:
+        player = game.players[self.player_idx]
+        self._turn_key = active_key(game) ^ seat_turn_key(self.player_idx, player)
+        self._flags = (player.has_revealed_major(), player.has_played_combination())
+        self._effects = player.active_effects.copy()
+        self._phase = game.phase
+        self._n_phase_1_turns = game.n_phase_1_turns
+        self._active_idx = game.active_player_idx
+        game.end_turn()
+
+    def undo(self, game: "Game") -> None:
+        player = game.players[self.player_idx]
+        game.active_player_idx = self._active_idx
+        game.n_phase_1_turns = self._n_phase_1_turns
+        game.phase = self._phase
+        game.turn -= 1
+        player.active_effects[:] = self._effects
+        player.sets_turn_flags(*self._flags)
+
+    def hash_delta(self, game: "Game") -> int:
+        player = game.players[self.player_idx]
+        return self._turn_key ^ active_key(game) ^ seat_turn_key(self.player_idx, player)
@@ -1,95 +1,406 @@
 """Class representing players, their status and possible actions."""
 
 import random as rdm
+import typing as tp
 
-from data.settings import check_settings, GameLanguage
-from card import Card
-from effects import CardEffect
-from card_piles import (
-    DrawPile, MajorCardsDrawPile, MinorCardsDrawPile,
-    ActionCardsDiscardPile, MinorCardsDiscardPile
-)
+try:
+    from .data.settings import check_settings, GameLanguage
+    from .card import Card
+    from .effects import CardEffect, Undo, chain_undos
+    from .combinations import Combination, HandIndex, classify, find_combinations, find_extensions
+    from .scoring import ScoreSheet
+    from .determinization import Knowledge
+    from .bitboard import mask_of
+    from .restrictions import (
+        can_attach, can_extend, can_reveal, DOUBLE_PLAY_LOCK_MASK, SACRIFICE_MASK
+    )
+    from .data.cards_table import DEATH_ID
+    from .data.effects_names import DirectEffects, EffectNames
+    from .data.majors_table import CARD_EFFECTS, MajorType
+    from .card_piles import (
+        DrawPile, MajorCardsDrawPile, MinorCardsDrawPile,
+        ActionCardsDiscardPile, MinorCardsDiscardPile
+    )
+except ImportError:
+    from data.settings import check_settings, GameLanguage
+    from card import Card
+    from effects import CardEffect, Undo, chain_undos
+    from combinations import Combination, HandIndex, classify, find_combinations, find_extensions
+    from scoring import ScoreSheet
+    from determinization import Knowledge
+    from bitboard import mask_of
+    from restrictions import (
+        can_attach, can_extend, can_reveal, DOUBLE_PLAY_LOCK_MASK, SACRIFICE_MASK
+    )
+    from data.cards_table import DEATH_ID
+    from data.effects_names import DirectEffects, EffectNames
+    from data.majors_table import CARD_EFFECTS, MajorType
+    from card_piles import (
+        DrawPile, MajorCardsDrawPile, MinorCardsDrawPile,
+        ActionCardsDiscardPile, MinorCardsDiscardPile
+    )
+
+if tp.TYPE_CHECKING:
+    from .engine import Game
 
-class MajorType:
-    ACTION = "action"
-    EQUIPMENT = "equipment"
-    PERMANENT = "permanent"
 
 class Player:
     name: str
     hand: list[Card]
+    hand_index: HandIndex
     combinations: list[list[Card]]
+    equipments: list[list[Card]]
+    score_sheet: ScoreSheet
     major_pile: list[Card]
     active_permanents: list[Card]
     inactive_permanents: list[Card]
     active_effects: list[CardEffect]
+    knowledge: Knowledge
+    n_unseen_losses: int
+    rng: rdm.Random
     _revealed_major_card: bool
     _played_combination: bool
 
-    def __init__(self, name: str, language: str) -> None:
+    def __init__(self, name: str, language: str, rng: rdm.Random | None = None) -> None:
         check_settings(GameLanguage, language)
         self.name = name
         self.language = language
+        # Random generator for the player's random draws and effects outcomes.
+        self.rng = rng if rng is not None else rdm.Random(rdm.getrandbits(64))
         self.hand = []
+        # Kept in sync with the hand to find combinations quickly.
+        self.hand_index = HandIndex()
         self.combinations = []
+        # Equipment cards attached to each combination, aligned with `combinations`.
+        self.equipments = []
+        # Kept in sync with the combinations to get the score without recounting.
+        self.score_sheet = ScoreSheet()
         self.major_pile = []
         self.active_permanents = []
         self.inactive_permanents = []
         self.active_effects = []
+        # Hidden cards the player has seen, and how many times cards left their
+        # hand without the other players seeing which ones (see `Knowledge`).
+        self.knowledge = Knowledge()
+        self.n_unseen_losses = 0
         self._revealed_major_card = False
         self._played_combination = False
 
     # 2.1) Turn step 1: Activation of revealed Permanent cards.
     # 3.1) Turn step 1: Activation of revealed Permanent cards (possible alternative drawing effect).
-    def activates_permanent_card(self, card: Card) -> None:
-        """Player activates the effects of one of the permanent cards in their permanent area."""
+    def activates_permanent_card(
+        self,
+        card: Card,
+        game: "Game | None" = None,
+        target: tp.Any | None = None,
+        choice: tp.Any | None = None
+    ) -> Undo:
+        """
+        Player activates the effects of one of the permanent cards in their permanent area.
+        `target` and `choice` are passed to the effects (see `CardEffect.resolve`).
+        Returns the record undoing the activation.
+        """
         assert card in self.active_permanents, (
             f"The card {card} is not one of {self.name}'s active permanent cards."
         )
-        for effect in card.special_effects:
-            # player = the one activating the effect
-            # target = one or several targeted entities (players, piles, areas, cards)
-            # choice = If the effect can be different depending on a choice between alternatives
-            effect.resolve(player=self, target=target, choice=(choice | None))
+        return chain_undos([
+            effect.resolve(self, game, target, choice) for effect in card.special_effects
+        ])
 
     # 2.2) Turn step 2: Draw a minor card, except if an activated Permanent card said otherwise.
     def adds_to_hand(self, cards: list[Card]):
         """Player adds cards to their hand."""
         self.hand.extend(cards)
+        for card in cards:
+            self.hand_index.add(card.card_id)
+
+    def removes_from_hand(self, cards: list[Card], unseen: bool = False) -> None:
+        """
+        Player removes cards from their hand. `unseen` tells that the other
+        players do not see which cards leave it (random steals, hands taken
+        as a whole), which outdates what they knew about the hand.
+        """
+        if unseen:
+            self.n_unseen_losses += 1
+        for card in cards:
+            self.hand.remove(card)
+            self.hand_index.remove(card.card_id)
+
+    def returns_to_hand(self, cards: list[Card], hand_order: list[Card]) -> None:
+        """
+        Player takes back cards which left their hand, `hand_order` being the
+        hand as it was before, so that the order of the cards is restored too.
+        """
+        for card in cards:
+            self.hand_index.add(card.card_id)
+        self.hand[:] = hand_order
+
+    def replaces_hand(self, cards: list[Card]) -> None:
+        """Player's hand is replaced as a whole, e.g. by a determinization of the game."""
+        self.hand = list(cards)
+        self.hand_index = HandIndex(card.card_id for card in self.hand)
+
+    def saves_hand(self) -> Undo:
+        """Record putting the hand and the number of unseen losses back as they are now."""
+        hand, n_unseen_losses = self.hand.copy(), self.n_unseen_losses
+
+        def undo() -> None:
+            self.replaces_hand(hand)
+            self.n_unseen_losses = n_unseen_losses
+        return undo
 
     # 2.3) Turn step 3: Reveal a new major card if wanted.
     # 3.3) Turn step 3: Reveal a new major card if wanted.
-    def reveals_major_card(self, card: Card) -> None:
-        """Player reveals a major card from their major cards pile and activates its effects."""
+    def reveals_major_card(
+        self,
+        card: Card,
+        game: "Game | None" = None,
+        target: tp.Any | None = None,
+        choice: tp.Any | None = None
+    ) -> Undo:
+        """
+        Player reveals a major card from their major cards pile and plays it:
+        an action card resolves its effects on `target` and `choice` and is
+        discarded, an equipment card is attached to the combination of index
+        `target`, a permanent card goes to the permanent area. Returns the
+        record undoing the reveal.
+        """
         assert card in self.major_pile, (
             f"The card {card} is not one of {self.name}'s reserved major cards."
         )
-        match card.type:
-            case MajorType.ACTION:
-                for effect in card.special_effects:
-                    # player = the one activating the effect
-                    # target = one or several targeted entities (players, piles, areas, cards)
-                    # choice = If the effect can be different depending on a choice between alternatives
-                    effect.resolve(player=self, target=target, choice=(choice | None))
-            case MajorType.EQUIPMENT:
-                raise NotImplementedError
-            case MajorType.PERMANENT:
-                raise NotImplementedError
+        playable = (
+            self.possible_combinations() if DOUBLE_PLAY_LOCK_MASK >> card.card_id & 1 else []
+        )
+        action_discard = mask_of(game.action_discard) if game is not None else 0
+        if not can_reveal(card.card_id, playable, len(self.combinations), action_discard):
+            raise ValueError(f"The restrictions of the card {card} forbid revealing it now.")
+        major_pile, revealed = self.major_pile.copy(), self._revealed_major_card
+        plays_back = self._REVEAL_HANDLERS[card.major_type](self, card, game, target, choice)
         self._revealed_major_card = True
 
+        def undo() -> None:
+            plays_back()
+            self.major_pile[:] = major_pile
+            self._revealed_major_card = revealed
+        return undo
+
+    def _plays_action(
+        self, card: Card, game: "Game | None", target: tp.Any, choice: tp.Any
+    ) -> Undo:
+        self.major_pile.remove(card)
+        undos = [effect.resolve(self, game, target, choice) for effect in card.special_effects]
+        if game is not None:
+            game.action_discard.append(card)
+            undos.append(game.action_discard.pop)
+        return chain_undos(undos)
+
+    def _plays_equipment(
+        self, card: Card, game: "Game | None", target: int, choice: int | None
+    ) -> Undo:
+        # `choice` is the index of the combination to sacrifice, for Le Diable (XV).
+        sacrifice = SACRIFICE_MASK >> card.card_id & 1
+        if sacrifice and (choice is None or choice == target or game is None):
+            raise ValueError(f"The card {card} needs another combination to sacrifice.")
+        if not can_attach(
+            card.card_id, mask_of(self.combinations[target]), mask_of(self.equipments[target])
+        ):
+            raise ValueError(
+                f"The card {card} cannot be attached to the combination {self.combinations[target]}."
+            )
+        self.major_pile.remove(card)
+        if not sacrifice:
+            self.attaches_equipment(card, target)
+            return lambda: self.detaches_equipment(card, target)
+
+        combinations = self.saves_combinations()
+        n_minors, n_majors = len(game.minor_discard), len(game.action_discard)
+        self.attaches_equipment(card, target)
+        cards, equipment = self.removes_combination(choice)
+        game.minor_discard.extend(cards)
+        game.action_discard.extend(equipment)
+
+        def undo() -> None:
+            del game.action_discard[n_majors:]
+            del game.minor_discard[n_minors:]
+            combinations()
+        return undo
+
+    def _plays_permanent(
+        self, card: Card, game: "Game | None", target: tp.Any, choice: tp.Any
+    ) -> Undo:
+        self.major_pile.remove(card)
+        self.active_permanents.append(card)
+        return self.active_permanents.pop
+
+    _REVEAL_HANDLERS = {
+        MajorType.ACTION: _plays_action,
+        MajorType.EQUIPMENT: _plays_equipment,
+        MajorType.PERMANENT: _plays_permanent,
+    }
+
     # 2.4) Turn step 4: Create a new combination or complete an existing one, if possible and wanted.
     # NOTE: authorized combinations: two/three/four of a kind, suite of 3+ cards.
     # 3.4) Turn step 4: Create a new combination or complete an existing one, if possible and wanted.
-    def plays_combination(self, cards: list[Card]) -> None:
-        """Player puts a new combination in their combination area."""
-        raise NotImplementedError
+    def plays_combination(self, cards: list[Card], equipment: list[Card] | None = None) -> None:
+        """
+        Player puts a new combination in their combination area, possibly with
+        equipment cards from their major pile attached to it at once.
+        """
+        equipment = list(equipment or [])
+        assert all(card in self.hand for card in cards), (
+            f"Some of the cards {cards} are not in {self.name}'s hand."
+        )
+        assert all(card in self.major_pile for card in equipment), (
+            f"Some of the cards {equipment} are not in {self.name}'s major pile."
+        )
+        mask = mask_of(cards)
+        equipment_mask = 0
+        for major in equipment:
+            if SACRIFICE_MASK >> major.card_id & 1 or not can_attach(
+                major.card_id, mask, equipment_mask, new_combination=True
+            ):
+                raise ValueError(f"The card {major} cannot be attached to the combination {cards}.")
+            equipment_mask |= 1 << major.card_id
+        modifiers = tuple(
+            effect for major in equipment for effect in CARD_EFFECTS[major.card_id]
+        )
+        combination = classify(
+            mask, modifiers.count(DirectEffects.JOKER), DirectEffects.HYBRID in modifiers
+        )
+        if combination is None:
+            raise ValueError(f"The cards {cards} do not form a valid combination.")
+        self.removes_from_hand(cards)
+        for major in equipment:
+            self.major_pile.remove(major)
+        self.combinations.append(list(cards))
+        self.equipments.append(equipment)
+        self.score_sheet.add(combination, modifiers)
         self._played_combination = True
 
     def adds_to_combination(self, cards: list[Card], combination: list[Card]) -> None:
         """PLayer adds cards from their hand to one of their existing combinations."""
-        raise NotImplementedError
+        assert any(combination is played for played in self.combinations), (
+            f"The combination {combination} is not one of {self.name}'s combinations."
+        )
+        assert all(card in self.hand for card in cards), (
+            f"Some of the cards {cards} are not in {self.name}'s hand."
+        )
+        idx = next(idx for idx, played in enumerate(self.combinations) if played is combination)
+        if not can_extend(mask_of(self.equipments[idx])):
+            raise ValueError(f"The combination {combination} cannot be completed anymore.")
+        modifiers = self.modifiers(idx)
+        completed = classify(
+            mask_of(combination + cards),
+            modifiers.count(DirectEffects.JOKER), DirectEffects.HYBRID in modifiers
+        )
+        if completed is None:
+            raise ValueError(f"The cards {cards} cannot complete the combination {combination}.")
+        self.removes_from_hand(cards)
+        combination.extend(cards)
+        self.score_sheet.update(idx, completed, modifiers)
         self._played_combination = True
 
+    def possible_combinations(self) -> list[Combination]:
+        """Every new combination the player can play with their hand."""
+        return find_combinations(self.hand_index)
+
+    def possible_extensions(self) -> list[tuple[int, Combination]]:
+        """
+        Every way the player can complete one of their combinations with their hand,
+        as (index of the combination, cards to add and resulting combination).
+        """
+        extensions = []
+        for idx, combination in enumerate(self.combinations):
+            if not can_extend(mask_of(self.equipments[idx])):
+                continue
+            played = self.combination_at(idx)
+            assert played is not None, f"Invalid combination {combination} in play."
+            extensions.extend((idx, extension) for extension in find_extensions(self.hand_index, played))
+        return extensions
+
+    def combination_at(self, idx: int) -> Combination | None:
+        """
+        Combination of given index, classified with its equipment (jokers, hybrid
+        suites). None if its cards no longer form a valid combination.
+        """
+        modifiers = self.modifiers(idx)
+        return classify(
+            mask_of(self.combinations[idx]),
+            modifiers.count(DirectEffects.JOKER), DirectEffects.HYBRID in modifiers
+        )
+
+    def modifiers(self, idx: int) -> tuple[EffectNames, ...]:
+        """Effects and restrictions of the equipment attached to the combination of given index."""
+        return tuple(
+            effect for card in self.equipments[idx] for effect in CARD_EFFECTS[card.card_id]
+        )
+
+    def is_protected(self, idx: int) -> bool:
+        """Whether the combination of given index is protected by the Pope (V)."""
+        return DirectEffects.PROTECTOR in self.modifiers(idx)
+
+    def equipment_index(self, card: Card) -> int:
+        """Index of the combination the equipment card is attached to."""
+        for idx, equipment in enumerate(self.equipments):
+            if card in equipment:
+                return idx
+        raise ValueError(f"The card {card} is not attached to any of {self.name}'s combinations.")
+
+    def attaches_equipment(self, card: Card, idx: int) -> None:
+        """Player attaches an equipment card to one of their combinations."""
+        self.equipments[idx].append(card)
+        self._rescores(idx)
+
+    def detaches_equipment(self, card: Card, idx: int) -> None:
+        """Player loses an equipment card attached to one of their combinations."""
+        self.equipments[idx].remove(card)
+        self._rescores(idx)
+
+    def removes_from_combination(self, idx: int, n_cards: int) -> list[Card]:
+        """Player takes back the last cards added to one of their combinations."""
+        combination = self.combinations[idx]
+        cards = combination[len(combination) - n_cards:]
+        del combination[len(combination) - n_cards:]
+        self._rescores(idx)
+        return cards
+
+    def removes_combination(self, idx: int) -> tuple[list[Card], list[Card]]:
+        """Player loses one of their combinations. Returns its cards and its equipment."""
+        self.score_sheet.remove(idx)
+        return self.combinations.pop(idx), self.equipments.pop(idx)
+
+    def receives_combination(self, cards: list[Card], equipment: list[Card]) -> None:
+        """Player gets a combination already played, with its equipment, e.g. by stealing it."""
+        self.combinations.append(list(cards))
+        self.equipments.append(list(equipment))
+        combination = self.combination_at(len(self.combinations) - 1)
+        if combination is None:
+            self.combinations.pop()
+            self.equipments.pop()
+            raise ValueError(f"The cards {cards} do not form a valid combination.")
+        self.score_sheet.add(combination, self.modifiers(len(self.combinations) - 1))
+
+    def saves_combinations(self) -> Undo:
+        """Record putting the combinations, their equipment and the score sheet back as they are now."""
+        combinations = [combination.copy() for combination in self.combinations]
+        equipments = [equipment.copy() for equipment in self.equipments]
+        score_sheet = self.score_sheet.copy()
+
+        def undo() -> None:
+            self.combinations, self.equipments = combinations, equipments
+            self.score_sheet = score_sheet
+        return undo
+
+    def _rescores(self, idx: int) -> None:
+        # An invalid combination keeps its last score until its owner removes it.
+        combination = self.combination_at(idx)
+        if combination is not None:
+            self.score_sheet.update(idx, combination, self.modifiers(idx))
+
+    def cards_in_hand(self, mask: int) -> list[Card]:
+        """Cards of the hand whose IDs are in given bitmask."""
+        return [card for card in self.hand if mask >> card.card_id & 1]
+
     # 2.5) Turn step 5: If a combination was created or completed and major pile is not empty, draw a major card.
     # 3.5) Turn step 5: If a combination was created or completed and major pile is not empty, draw a major card.
     def adds_to_major_pile(self, cards: list[Card]):
@@ -97,7 +408,7 @@ class Player:
         self.major_pile.extend(cards)
 
     # 3.2) Turn step 2: Draw a random card in a player hand, except if an activated Permanent card said otherwise.
-    def draws_from(self, source: DrawPile | list[Card], n_cards: int = 1) -> None:
+    def draws_from(self, source: "DrawPile | Player | list[Card]", n_cards: int = 1) -> None:
         """Player draws cards from a draw pile or another player's hand."""
         if isinstance(source, DrawPile): # Drawing from a pile
             cards = source.draw(n_cards)
@@ -110,10 +421,17 @@ class Player:
                 raise NotImplementedError(
                     "Player behavior for given card pile is not implemented."
                 )
-        else: # Drawing from a player's hand
+        elif isinstance(source, Player): # Drawing from a player's hand
+            drawn_cards = []
+            for _ in range(n_cards):
+                card = self.rng.choice(source.hand)
+                source.removes_from_hand([card], unseen=True)
+                drawn_cards.append(card)
+            self.adds_to_hand(drawn_cards)
+        else: # Drawing from a list of cards
             drawn_cards = []
             for _ in range(n_cards):
-                card = rdm.choice(source)
+                card = self.rng.choice(source)
                 source.remove(card)
                 drawn_cards.append(card)
             self.adds_to_hand(drawn_cards)
@@ -121,25 +439,41 @@ class Player:
     def count_score(self) -> int:
         """
         Calculate player's current score taking account of their combinations
-        and appliable major cards score modification effects.
+        and appliable major cards score modification effects. Holding Death
+        cancels the value of every unprotected combination.
+        """
+        return self.score_sheet.score(self.has_death())
+
+    def sets_turn_flags(self, revealed_major: bool, played_combination: bool) -> None:
+        """Set whether the player revealed a major card and played a combination this turn."""
+        self._revealed_major_card = revealed_major
+        self._played_combination = played_combination
+
+    def rebuilds_indexes(self) -> None:
         """
-        raise NotImplementedError
+        Rebuild the hand index and the score sheet from the hand and the combinations,
+        after they were replaced as a whole (e.g. when restoring a saved state).
+        Score bonuses and cancelled combinations are not kept.
+        """
+        self.hand_index = HandIndex(card.card_id for card in self.hand)
+        self.score_sheet.recompute(
+            (self.combination_at(idx), self.modifiers(idx)) for idx in range(len(self.combinations))
+        )
 
     def ends_turn(self) -> None:
         """Player finishes their turn."""
+        self.active_effects.clear()
         self._revealed_major_card = False
         self._played_combination = False
 
     # ===== Status check methods =====
     def has_death(self) -> bool:
         """Whether the player has the Death (XIII) card in hand."""
-        match self.language:
-            case "english": return Card(Card.names_eng.MAJORS.DEATH) in self.hand
-            case "french": return Card(Card.names_fr.MAJEURES.MORT) in self.hand
-            case _: raise ValueError(
-                f"Unsupported language {self.language} was set for the player {self.name}, "
-                "impossible to check their hand content."
-            )
+        return bool(self.hand_index.mask >> DEATH_ID & 1)
+
+    def has_active_effect(self, effect: EffectNames) -> bool:
+        """Whether an effect resolved this turn still applies to the player."""
+        return any(active.name is effect for active in self.active_effects)
 
     def has_empty_hand(self) -> bool:
         """Whether the player has any card left in hand."""
@@ -0,0 +1,281 @@
+"""
+Decision makers driving players through the turn steps of a headless game.
+"""
+
+import math
+import typing as tp
+import random as rdm
+
+from abc import ABC, abstractmethod
+
+try:
+    from .card import Card
+    from .player import Player
+    from .combinations import Combination
+    from .data.cards_table import CARD_SCORES
+    from .movegen import DecisionPoint, SKIP, decode_action, effect_arguments, legal_actions
+except ImportError:
+    from card import Card
+    from player import Player
+    from combinations import Combination
+    from data.cards_table import CARD_SCORES
+    from movegen import DecisionPoint, SKIP, decode_action, effect_arguments, legal_actions
+
+if tp.TYPE_CHECKING:
+    import threading
+
+    from .engine import Game
+
+
+Decision = bool | int | tuple[int, ...] | None
+"""
+Recorded answer to one prompt: action code of the activation of a permanent
+(int, see `movegen`) or False, seat index of the player to steal from (int),
+action code of the reveal of a major card (int or None), IDs of the cards played
+as a combination, equipment included (tuple of ints or None) or index of the
+completed combination followed by the IDs of the added cards (tuple of ints or None).
+"""
+
+Activation = bool | tuple[tp.Any, tp.Any]
+"""
+Answer to the activation of a permanent card: whether it is activated, or the
+target and choice to activate it on (see `Player.activates_permanent_card`).
+"""
+
+Reveal = tuple[Card, tp.Any, tp.Any]
+"""Major card to reveal, with the target and choice of its effects (see `Player.reveals_major_card`)."""
+
+
+class Policy(ABC):
+    """
+    Base class to be subclassed to define how a player takes decisions.
+    Each method answers one of the prompts of the interactive game.
+    Do not call directly.
+
+    Policies taking random decisions must use their own generator, never the
+    `random` module, so that games stay reproducible.
+    """
+    def reseed(self, seed: int) -> None:
+        """Reset the random generator of the policy, if it has one."""
+        return None
+
+    def stops_at(self, deadline: float = math.inf, stop: "threading.Event | None" = None) -> None:
+        """
+        Bound the thinking of the next decisions: search policies answer with their
+        best decision so far once `time.perf_counter()` reaches `deadline` or once
+        `stop` is set. Other policies answer at once and ignore it.
+        """
+        return None
+
+    # 2.1) Turn step 1: Activation of revealed Permanent cards.
+    @abstractmethod
+    def wants_to_activate(self, player: Player, card: Card, game: "Game") -> Activation:
+        """
+        Whether `player` activates the permanent card `card` this turn, or the
+        (target, choice) pair to activate it on.
+        """
+        raise NotImplementedError
+
+    # 3.2) Turn step 2: Draw a random card in a player hand.
+    @abstractmethod
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: "Game"
+    ) -> Player:
+        """Which player among `candidates` `player` draws a random card from."""
+        raise NotImplementedError
+
+    # 2.3) Turn step 3: Reveal a new major card if wanted.
+    @abstractmethod
+    def chooses_major_to_reveal(self, player: Player, game: "Game") -> Reveal | None:
+        """
+        Major card of `player`'s major pile to reveal with the target and choice
+        of its effects, or None to skip.
+        """
+        raise NotImplementedError
+
+    # 2.4) Turn step 4: Create a new combination or complete an existing one.
+    @abstractmethod
+    def chooses_combination(self, player: Player, game: "Game") -> list[Card] | None:
+        """
+        Cards of `player`'s hand to play as a new combination, possibly with
+        equipment cards of their major pile to attach to it at once, or None to skip.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def chooses_extension(
+        self, player: Player, game: "Game"
+    ) -> tuple[int, list[Card]] | None:
+        """
+        Index of one of `player`'s combinations and cards of their hand to complete
+        it with, or None to skip. Only asked when no new combination was played.
+        """
+        raise NotImplementedError
+
+
+class PassivePolicy(Policy):
+    """Decline every optional action. Useful as a baseline and for benchmarks."""
+    def wants_to_activate(self, player: Player, card: Card, game: "Game") -> Activation:
+        return False
+
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: "Game"
+    ) -> Player:
+        return candidates[0]
+
+    def chooses_major_to_reveal(self, player: Player, game: "Game") -> Reveal | None:
+        return None
+
+    def chooses_combination(self, player: Player, game: "Game") -> list[Card] | None:
+        return None
+
+    def chooses_extension(
+        self, player: Player, game: "Game"
+    ) -> tuple[int, list[Card]] | None:
+        return None
+
+
+class RandomPolicy(Policy):
+    """
+    Take every decision uniformly at random, skipping being one of the options.
+    Activations and reveals are drawn among the legal actions listed by `movegen`.
+    """
+    def __init__(self, rng: rdm.Random | None = None) -> None:
+        """
+        Parameters
+        ----------
+
+        rng: random.Random, optional
+            Random generator of the policy. Defaults to a new generator seeded
+            from the `random` module.
+        """
+        self.rng = rng if rng is not None else rdm.Random(rdm.getrandbits(64))
+
+    def reseed(self, seed: int) -> None:
+        self.rng.seed(seed)
+
+    def wants_to_activate(self, player: Player, card: Card, game: "Game") -> Activation:
+        action = self.rng.choice([
+            action for action in legal_actions(game, DecisionPoint.ACTIVATION)
+            if action == SKIP or decode_action(action).card == card.card_id
+        ])
+        if action == SKIP:
+            return False
+        _, target, choice = effect_arguments(game, action)
+        return target, choice
+
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: "Game"
+    ) -> Player:
+        return self.rng.choice(candidates)
+
+    def chooses_major_to_reveal(self, player: Player, game: "Game") -> Reveal | None:
+        action = self.rng.choice(legal_actions(game, DecisionPoint.REVEAL))
+        return None if action == SKIP else effect_arguments(game, action)
+
+    def chooses_combination(self, player: Player, game: "Game") -> list[Card] | None:
+        options: list[Combination | None] = [None, *player.possible_combinations()]
+        combination = self.rng.choice(options)
+        return None if combination is None else player.cards_in_hand(combination.mask)
+
+    def chooses_extension(
+        self, player: Player, game: "Game"
+    ) -> tuple[int, list[Card]] | None:
+        options: list[tuple[int, Combination] | None] = [None, *player.possible_extensions()]
+        extension = self.rng.choice(options)
+        if extension is None:
+            return None
+        idx, combination = extension
+        return idx, player.cards_in_hand(combination.mask)
+
+
+class GreedyPolicy(PassivePolicy):
+    """
+    Always play the combination, or else the extension, putting the most points
+    on the table this turn. Other decisions are the ones of `PassivePolicy`.
+    """
+    @staticmethod
+    def _points(combination: Combination) -> int:
+        mask = combination.mask
+        return sum(CARD_SCORES[card_id] for card_id in range(mask.bit_length()) if mask >> card_id & 1)
+
+    def chooses_combination(self, player: Player, game: "Game") -> list[Card] | None:
+        options = player.possible_combinations()
+        if not options:
+            return None
+        return player.cards_in_hand(max(options, key=self._points).mask)
+
+    def chooses_extension(
+        self, player: Player, game: "Game"
+    ) -> tuple[int, list[Card]] | None:
+        options = player.possible_extensions()
+        if not options:
+            return None
+        idx, combination = max(options, key=lambda option: self._points(option[1]))
+        return idx, player.cards_in_hand(combination.mask)
+
+
+class ScriptedPolicy(Policy):
+    """
+    Answer prompts with recorded decisions, in order, e.g. to replay a game
+    from its seed and the `Game.decisions` log. One instance can drive all
+    the players of a game, as decisions are recorded in game order.
+    """
+    def __init__(self, decisions: tp.Iterable[Decision]) -> None:
+        """
+        Parameters
+        ----------
+
+        decisions: Iterable[Decision]
+            Decisions to replay, in the order the prompts were answered.
+        """
+        self.decisions = iter(decisions)
+
+    def _next(self) -> Decision:
+        try:
+            return next(self.decisions)
+        except StopIteration as exc:
+            raise ValueError(
+                f"{self.__class__.__name__}: No recorded decision left to replay."
+            ) from exc
+
+    def wants_to_activate(self, player: Player, card: Card, game: "Game") -> Activation:
+        decision = self._next()
+        if isinstance(decision, bool):
+            return decision
+        assert isinstance(decision, int), "type checker assertion, never triggered."
+        _, target, choice = effect_arguments(game, decision)
+        return target, choice
+
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: "Game"
+    ) -> Player:
+        decision = self._next()
+        assert isinstance(decision, int), "type checker assertion, never triggered."
+        return game.players[decision]
+
+    def chooses_major_to_reveal(self, player: Player, game: "Game") -> Reveal | None:
+        decision = self._next()
+        if decision is None:
+            return None
+        assert isinstance(decision, int), "type checker assertion, never triggered."
+        return effect_arguments(game, decision)
+
+    def chooses_combination(self, player: Player, game: "Game") -> list[Card] | None:
+        decision = self._next()
+        if decision is None:
+            return None
+        assert isinstance(decision, tuple), "type checker assertion, never triggered."
+        by_id = {card.card_id: card for card in (*player.hand, *player.major_pile)}
+        return [by_id[card_id] for card_id in decision]
+
+    def chooses_extension(
+        self, player: Player, game: "Game"
+    ) -> tuple[int, list[Card]] | None:
+        decision = self._next()
+        if decision is None:
+            return None
+        assert isinstance(decision, tuple), "type checker assertion, never triggered."
+        idx, *card_ids = decision
+        by_id = {card.card_id: card for card in player.hand}
+        return idx, [by_id[card_id] for card_id in card_ids]
@@ -0,0 +1,780 @@
+"""
+Replays: every game recorded as its seed, its settings and the integer-coded
+actions of its turn loop (see `movegen`), enough to play it again exactly.
+
+Human turns record the actions chosen at each decision with a real choice, as
+sent to `movegen.turn_steps`. Bot turns record the decisions of their policy
+through a `RecordingPolicy`, coded as actions too. Both are replayed in game
+order from a single stream of codes.
+
+Replays are stored one after the other in files starting with a small header:
+
+============ ======================================================================
+size (bytes) content
+============ ======================================================================
+4            `REPLAY_MAGIC`
+1            `REPLAY_VERSION`
+============ ======================================================================
+
+then, per replay, a fixed header (`_RECORD`: size of the whole record, seed,
+turn limit, number of turns, language, number of players, mask of the human
+seats, flags, number of codes and of keyframes), the final score of each
+player as a signed 16-bit integer, the keyframe index, the action codes as
+LEB128 variable-length integers, most of which fit in one or two bytes, and
+the keyframes.
+
+Keyframes are snapshots of the game taken every few turns while recording.
+Each entry of the index (`_KEYFRAME`) gives the turn of a keyframe, where its
+snapshot lies in the record, and where the codes played after it start, so
+that seeking to a turn restores the last keyframe before it and replays only
+the few turns since (see `ReplayView.seeks`).
+
+`ReplayWriter` appends replays to rotating files from a background thread, so
+that recording never waits for the disk. `ReplayReader` memory-maps the files
+and iterates over their records as lightweight `ReplayView`s, decoding fields
+and codes only when asked.
+"""
+
+import bisect
+import itertools
+import math
+import mmap
+import os
+import queue
+import struct
+import threading
+import typing as tp
+
+from dataclasses import dataclass
+
+try:
+    from .data.base import check_num_value
+    from .data.settings import GameLanguage
+    from .card import Card
+    from .player import Player
+    from .bitboard import mask_of
+    from .engine import Game
+    from .policies import Policy, Activation, Reveal
+    from .movegen import (
+        ActionKind, SKIP, activation_action, decode_action, effect_arguments, encode_action,
+        reveal_action, turn_steps
+    )
+except ImportError:
+    from data.base import check_num_value
+    from data.settings import GameLanguage
+    from card import Card
+    from player import Player
+    from bitboard import mask_of
+    from engine import Game
+    from policies import Policy, Activation, Reveal
+    from movegen import (
+        ActionKind, SKIP, activation_action, decode_action, effect_arguments, encode_action,
+        reveal_action, turn_steps
+    )
+
+
+REPLAY_MAGIC = b"DBRP"
+"""First bytes of every replay file."""
+
+REPLAY_VERSION = 2
+"""Version of the binary encoding, stored after `REPLAY_MAGIC`."""
+
+REPLAY_SUFFIX = ".dbr"
+"""Extension of the replay files."""
+
+DEFAULT_MAX_FILE_SIZE = 64 << 20
+"""Size after which `ReplayWriter` starts a new file, in bytes."""
+
+DEFAULT_KEYFRAME_INTERVAL = 50
+"""Number of turns between two keyframes of a replay."""
+
+_LANGUAGES = tuple(GameLanguage)
+
+_FILE_HEADER = struct.Struct("<4sB")
+# record size, seed, max turns, number of turns, language, number of players,
+# human seats mask, flags (truncated), number of codes, number of keyframes
+_RECORD = struct.Struct("<IQHHBBBBIH")
+_SCORE = struct.Struct("<h")
+# turn, number of codes before, offset of the next code, offset and size of the snapshot
+_KEYFRAME = struct.Struct("<HIIIH")
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varints(data: tp.Any, offset: int, count: int) -> tp.Iterator[int]:
+    """Decode `count` LEB128 integers of `data` (any buffer indexed by int) from `offset`."""
+    for _ in range(count):
+        value = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        yield value
+
+
+# ===== Policies =====
+def _played_cards(player: Player, mask: int) -> list[Card]:
+    """Cards of a combination action: cards of the hand, then equipment of the major pile."""
+    hand = player.cards_in_hand(mask)
+    return hand + [card for card in player.major_pile if mask >> card.card_id & 1]
+
+
+class RecordingPolicy(Policy):
+    """
+    Play with another policy and record its decisions as action codes. Cards
+    played are given back in hand order, equipment last in major pile order,
+    the order a replay rebuilds them in from their mask.
+    """
+    def __init__(self, policy: Policy, codes: list[int]) -> None:
+        """
+        Parameters
+        ----------
+
+        policy: Policy
+            Policy taking the decisions.
+
+        codes: list[int]
+            List the codes of the decisions are appended to.
+        """
+        self.policy = policy
+        self.codes = codes
+
+    def reseed(self, seed: int) -> None:
+        self.policy.reseed(seed)
+
+    def stops_at(self, deadline: float = math.inf, stop: threading.Event | None = None) -> None:
+        self.policy.stops_at(deadline, stop)
+
+    def wants_to_activate(self, player: Player, card: Card, game: Game) -> Activation:
+        activation = self.policy.wants_to_activate(player, card, game)
+        if not activation:
+            self.codes.append(SKIP)
+            return activation
+        target, choice = (None, None) if activation is True else activation
+        self.codes.append(activation_action(game, card, target, choice))
+        return activation
+
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: Game
+    ) -> Player:
+        target = self.policy.chooses_steal_target(player, candidates, game)
+        self.codes.append(encode_action(ActionKind.STEAL, seat=game.players.index(target)))
+        return target
+
+    def chooses_major_to_reveal(self, player: Player, game: Game) -> Reveal | None:
+        reveal = self.policy.chooses_major_to_reveal(player, game)
+        self.codes.append(SKIP if reveal is None else reveal_action(game, *reveal))
+        return reveal
+
+    def chooses_combination(self, player: Player, game: Game) -> list[Card] | None:
+        cards = self.policy.chooses_combination(player, game)
+        if not cards:
+            self.codes.append(SKIP)
+            return cards
+        mask = mask_of(cards)
+        self.codes.append(encode_action(ActionKind.COMBINATION, cards=mask))
+        return _played_cards(player, mask)
+
+    def chooses_extension(
+        self, player: Player, game: Game
+    ) -> tuple[int, list[Card]] | None:
+        extension = self.policy.chooses_extension(player, game)
+        if extension is None:
+            self.codes.append(SKIP)
+            return None
+        idx, cards = extension
+        mask = mask_of(cards)
+        self.codes.append(encode_action(ActionKind.EXTENSION, index=idx, cards=mask))
+        return idx, player.cards_in_hand(mask)
+
+
+class ReplayPolicy(Policy):
+    """
+    Answer prompts with the action codes recorded by `RecordingPolicy`, in
+    order. One instance can drive all the bots of a game, as codes are
+    recorded in game order.
+    """
+    def __init__(self, codes: tp.Iterator[int]) -> None:
+        """
+        Parameters
+        ----------
+
+        codes: Iterator[int]
+            Codes to replay, possibly shared with the replay of human turns.
+        """
+        self.codes = codes
+
+    def _next(self) -> int:
+        try:
+            return next(self.codes)
+        except StopIteration as exc:
+            raise ValueError(
+                f"{self.__class__.__name__}: No recorded action left to replay."
+            ) from exc
+
+    def wants_to_activate(self, player: Player, card: Card, game: Game) -> Activation:
+        code = self._next()
+        if code == SKIP:
+            return False
+        _, target, choice = effect_arguments(game, code)
+        return target, choice
+
+    def chooses_steal_target(
+        self, player: Player, candidates: list[Player], game: Game
+    ) -> Player:
+        return game.players[decode_action(self._next()).seat]
+
+    def chooses_major_to_reveal(self, player: Player, game: Game) -> Reveal | None:
+        code = self._next()
+        return None if code == SKIP else effect_arguments(game, code)
+
+    def chooses_combination(self, player: Player, game: Game) -> list[Card] | None:
+        code = self._next()
+        return None if code == SKIP else _played_cards(player, decode_action(code).cards)
+
+    def chooses_extension(
+        self, player: Player, game: Game
+    ) -> tuple[int, list[Card]] | None:
+        code = self._next()
+        if code == SKIP:
+            return None
+        fields = decode_action(code)
+        return fields.index, player.cards_in_hand(fields.cards)
+
+
+# ===== Replays =====
+@dataclass(frozen=True, slots=True)
+class Keyframe:
+    """
+    State of a recorded game at the start of a turn, to resume its replay there.
+
+    Attributes
+    ----------
+
+    turn: int
+        Turn starting in this state.
+
+    n_codes: int
+        Number of action codes taken before it.
+
+    snapshot: bytes
+        Snapshot of the game, random generator included (see `Game.snapshot`).
+    """
+    turn: int
+    n_codes: int
+    snapshot: bytes
+
+
+def _plays(
+    language: str,
+    n_players: int,
+    humans: int,
+    max_turns: int,
+    seed: int,
+    codes: tp.Iterator[int],
+    keyframe: Keyframe | None = None,
+    turn: int | None = None
+) -> Game:
+    """Replay a game from its start or from `keyframe`, until the start of `turn`."""
+    policy = ReplayPolicy(codes)
+    game = Game(language, [policy] * n_players, max_turns=max_turns, seed=seed)
+    if keyframe is not None:
+        game.restore(keyframe.snapshot)
+    while not game.is_over() and (turn is None or game.turn < turn):
+        if humans >> game.active_player_idx & 1:
+            steps = turn_steps(game)
+            try:
+                next(steps)
+                while True:
+                    steps.send(policy._next())
+            except StopIteration:
+                pass
+        else:
+            game.play_turn()
+    return game
+
+
+@dataclass(frozen=True, slots=True)
+class Replay:
+    """
+    A recorded game.
+
+    Attributes
+    ----------
+
+    language: str
+        Language setting of the game.
+
+    n_players: int
+        Number of players.
+
+    humans: int
+        Mask of the human seats, whose turns were played with `movegen.turn_steps`.
+
+    max_turns: int
+        Turn limit of the game.
+
+    seed: int
+        Seed of the game.
+
+    n_turns: int
+        Number of turns played.
+
+    truncated: bool
+        Whether the game stopped at the turn limit.
+
+    scores: tuple[int, ...]
+        Final score of each player, in seat order.
+
+    codes: tuple[int, ...]
+        Action codes of the game, in the order they were taken.
+
+    keyframes: tuple[Keyframe, ...]
+        States of the game at the start of some turns, in turn order.
+    """
+    language: str
+    n_players: int
+    humans: int
+    max_turns: int
+    seed: int
+    n_turns: int
+    truncated: bool
+    scores: tuple[int, ...]
+    codes: tuple[int, ...]
+    keyframes: tuple[Keyframe, ...] = ()
+
+    @classmethod
+    def from_game(
+        cls,
+        game: Game,
+        codes: tp.Iterable[int],
+        humans: int = 0,
+        keyframes: tp.Iterable[Keyframe] = ()
+    ) -> tp.Self:
+        """Replay of a finished game, from the codes and keyframes recorded while playing it."""
+        result = game.result()
+        return cls(
+            game.language, game.n_players, humans, game.max_turns, game.seed,
+            result.n_turns, result.truncated, result.scores, tuple(codes), tuple(keyframes)
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary record of the replay, see the module documentation.
+        Raise a ValueError if a field does not fit its record (seed beyond 64
+        bits, turn limit beyond 16 bits...).
+        """
+        try:
+            return self._encodes()
+        except struct.error as exc:
+            raise ValueError(
+                f"{self.__class__.__name__}: the replay of seed {self.seed} does not fit "
+                f"a record ({exc})."
+            ) from exc
+
+    def _encodes(self) -> bytes:
+        out = bytearray(_RECORD.size)
+        for score in self.scores:
+            out += _SCORE.pack(score)
+        index_offset = len(out)
+        out += bytes(_KEYFRAME.size * len(self.keyframes))
+
+        code_offsets = {}
+        keyframe_codes = {keyframe.n_codes for keyframe in self.keyframes}
+        for idx, code in enumerate(self.codes):
+            if idx in keyframe_codes:
+                code_offsets[idx] = len(out)
+            _write_varint(out, code)
+        code_offsets.setdefault(len(self.codes), len(out))
+
+        for idx, keyframe in enumerate(self.keyframes):
+            _KEYFRAME.pack_into(
+                out, index_offset + idx * _KEYFRAME.size, keyframe.turn, keyframe.n_codes,
+                code_offsets[keyframe.n_codes], len(out), len(keyframe.snapshot)
+            )
+            out += keyframe.snapshot
+
+        _RECORD.pack_into(
+            out, 0, len(out), self.seed, self.max_turns, self.n_turns,
+            _LANGUAGES.index(GameLanguage(self.language)), self.n_players, self.humans,
+            self.truncated, len(self.codes), len(self.keyframes)
+        )
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, offset: int = 0) -> tp.Self:
+        """Decode the record encoded with `to_bytes` starting at `offset` of `data`."""
+        return ReplayView(data, offset).load()
+
+    def keyframe_before(self, turn: int) -> Keyframe | None:
+        """Last keyframe at or before the start of `turn`, None if there is none."""
+        idx = bisect.bisect_right([keyframe.turn for keyframe in self.keyframes], turn)
+        return self.keyframes[idx - 1] if idx else None
+
+    def plays(self, turn: int | None = None) -> Game:
+        """
+        Play the game again, from the last keyframe before `turn` if any, else
+        from its seed. The logs of the game (`Game.decisions`, `Game.moves`)
+        only hold what was replayed.
+
+        Parameters
+        ----------
+
+        turn: int, optional
+            Turn to stop at, before it is played. Defaults to the end of the game.
+
+        Returns
+        -------
+
+        Game
+            Game in the recorded state, with the replay policy on every seat.
+        """
+        keyframe = self.keyframe_before(turn) if turn is not None else None
+        n_codes = keyframe.n_codes if keyframe is not None else 0
+        return _plays(
+            self.language, self.n_players, self.humans, self.max_turns, self.seed,
+            itertools.islice(self.codes, n_codes, None), keyframe, turn
+        )
+
+
+class ReplayView:
+    """
+    Replay record read in place from a buffer (e.g. a memory-mapped file), its
+    fields (see `Replay`) decoded on access. Only valid as long as the buffer is.
+    """
+    __slots__ = ("data", "offset", "_header")
+
+    def __init__(self, data: tp.Any, offset: int) -> None:
+        """
+        Parameters
+        ----------
+
+        data: buffer
+            Buffer holding the record, e.g. `bytes` or `mmap.mmap`.
+
+        offset: int
+            Position of the record in `data`.
+        """
+        self.data = data
+        self.offset = offset
+        self._header = _RECORD.unpack_from(data, offset)
+
+    @property
+    def size(self) -> int:
+        """Size of the record, in bytes."""
+        return self._header[0]
+
+    @property
+    def seed(self) -> int:
+        return self._header[1]
+
+    @property
+    def max_turns(self) -> int:
+        return self._header[2]
+
+    @property
+    def n_turns(self) -> int:
+        return self._header[3]
+
+    @property
+    def language(self) -> str:
+        return str(_LANGUAGES[self._header[4]])
+
+    @property
+    def n_players(self) -> int:
+        return self._header[5]
+
+    @property
+    def humans(self) -> int:
+        return self._header[6]
+
+    @property
+    def truncated(self) -> bool:
+        return bool(self._header[7])
+
+    @property
+    def n_codes(self) -> int:
+        return self._header[8]
+
+    @property
+    def n_keyframes(self) -> int:
+        return self._header[9]
+
+    @property
+    def scores(self) -> tuple[int, ...]:
+        start = self.offset + _RECORD.size
+        return tuple(
+            _SCORE.unpack_from(self.data, start + idx * _SCORE.size)[0]
+            for idx in range(self.n_players)
+        )
+
+    @property
+    def _index_offset(self) -> int:
+        return self.offset + _RECORD.size + self.n_players * _SCORE.size
+
+    def _index_entry(self, idx: int) -> tuple[int, int, int, int, int]:
+        """Turn, number of codes before, offsets of the codes and of the snapshot, snapshot size."""
+        return _KEYFRAME.unpack_from(self.data, self._index_offset + idx * _KEYFRAME.size)
+
+    def codes(self) -> tp.Iterator[int]:
+        """Action codes of the game, decoded one at a time."""
+        start = self._index_offset + self.n_keyframes * _KEYFRAME.size
+        return _read_varints(self.data, start, self.n_codes)
+
+    def keyframe(self, idx: int) -> Keyframe:
+        """Keyframe number `idx`, in turn order."""
+        turn, n_codes, _, snapshot_offset, size = self._index_entry(idx)
+        start = self.offset + snapshot_offset
+        return Keyframe(turn, n_codes, bytes(self.data[start:start + size]))
+
+    def seeks(self, turn: int) -> Game:
+        """
+        Game at the start of `turn`, replayed from the last keyframe before it
+        (see `Replay.plays`), reading only the codes played since.
+        """
+        low, high = 0, self.n_keyframes
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_entry(middle)[0] <= turn:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return _plays(
+                self.language, self.n_players, self.humans, self.max_turns, self.seed,
+                self.codes(), turn=turn
+            )
+        _, n_codes, code_offset, _, _ = self._index_entry(low - 1)
+        codes = _read_varints(self.data, self.offset + code_offset, self.n_codes - n_codes)
+        return _plays(
+            self.language, self.n_players, self.humans, self.max_turns, self.seed,
+            codes, self.keyframe(low - 1), turn
+        )
+
+    def load(self) -> Replay:
+        """Copy of the record as a `Replay`, independent of the buffer."""
+        return Replay(
+            self.language, self.n_players, self.humans, self.max_turns, self.seed,
+            self.n_turns, self.truncated, self.scores, tuple(self.codes()),
+            tuple(self.keyframe(idx) for idx in range(self.n_keyframes))
+        )
+
+
+class ReplayRecorder:
+    """
+    Codes and keyframes of a game being played, to build its `Replay` once over.
+
+    Attributes
+    ----------
+
+    codes: list[int]
+        Action codes taken so far. Human turns append to it, bots through
+        the policies returned by `records`.
+
+    keyframes: list[Keyframe]
+        Keyframes taken so far.
+    """
+    def __init__(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> None:
+        """
+        Parameters
+        ----------
+        keyframe_interval: int
+            Number of turns between two keyframes, 0 for none. Shorter intervals
+            make seeking faster and replays bigger, about 2.6 kB per keyframe.
+            Defaults to `DEFAULT_KEYFRAME_INTERVAL`.
+        """
+        check_num_value(keyframe_interval, "keyframe_interval", ">=", 0)
+        self.keyframe_interval = keyframe_interval
+        self.codes: list[int] = []
+        self.keyframes: list[Keyframe] = []
+
+    def records(self, policy: Policy) -> RecordingPolicy:
+        """Policy playing with `policy` and recording its decisions."""
+        return RecordingPolicy(policy, self.codes)
+
+    def starts_turn(self, game: Game) -> None:
+        """A turn of `game` starts: take a keyframe if one is due."""
+        interval = self.keyframe_interval
+        if interval and game.turn and game.turn % interval == 0 and (
+            not self.keyframes or self.keyframes[-1].turn < game.turn
+        ):
+            self.keyframes.append(
+                Keyframe(game.turn, len(self.codes), game.snapshot(include_rng=True))
+            )
+
+    def replay(self, game: Game, humans: int = 0) -> Replay:
+        """Replay of `game`, finished, whose human seats are in the mask `humans`."""
+        return Replay.from_game(game, self.codes, humans, self.keyframes)
+
+
+# ===== Files =====
+class ReplayWriter:
+    """
+    Append replays to rotating files of a directory, named `<prefix>-<index>.dbr`.
+    Replays are encoded by `writes`, then written by a background thread:
+    `writes` never waits for the disk. Use as a context manager, or call `close`.
+
+    Attributes
+    ----------
+
+    keyframe_interval: int
+        Number of turns between two keyframes of the games recorded for this
+        writer (see `ReplayRecorder`).
+
+    n_written: int
+        Number of replays written so far.
+    """
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        prefix: str = "replays",
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL
+    ) -> None:
+        """
+        Parameters
+        ----------
+        directory: str | PathLike
+            Directory of the files, created if needed.
+
+        prefix: str
+            Start of the file names. Defaults to 'replays'.
+
+        max_file_size: int
+            Size after which a new file is started, in bytes. Defaults to
+            `DEFAULT_MAX_FILE_SIZE`.
+
+        keyframe_interval: int
+            Number of turns between two keyframes, 0 for none. Defaults to
+            `DEFAULT_KEYFRAME_INTERVAL`.
+        """
+        check_num_value(max_file_size, "max_file_size", ">", 0)
+        check_num_value(keyframe_interval, "keyframe_interval", ">=", 0)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = os.fspath(directory)
+        self.prefix = prefix
+        self.max_file_size = max_file_size
+        self.keyframe_interval = keyframe_interval
+        self.n_written = 0
+        # New files are numbered after the ones already there.
+        self._index = max(
+            (int(name[len(prefix) + 1:-len(REPLAY_SUFFIX)]) for name in self.paths()),
+            default=0
+        )
+        self._file: tp.BinaryIO | None = None
+        self._queue: queue.SimpleQueue[bytes | None] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._writes_queued, daemon=True)
+        self._thread.start()
+
+    def paths(self) -> list[str]:
+        """Names of the replay files of the directory with the prefix of the writer, in order."""
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith(f"{self.prefix}-") and name.endswith(REPLAY_SUFFIX)
+            and name[len(self.prefix) + 1:-len(REPLAY_SUFFIX)].isdigit()
+        )
+
+    def recorder(self) -> ReplayRecorder:
+        """Recorder of a new game, taking keyframes at the interval of the writer."""
+        return ReplayRecorder(self.keyframe_interval)
+
+    def writes(self, replay: Replay) -> None:
+        """
+        Encode a replay and queue it to be written. Encoding errors (see
+        `Replay.to_bytes`) are raised here, leaving the writer running.
+        """
+        if not self._thread.is_alive():
+            raise ValueError(f"{self.__class__.__name__}: the writer is closed.")
+        self._queue.put(replay.to_bytes())
+
+    def close(self) -> None:
+        """Write the replays still queued and close the current file."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def __enter__(self) -> tp.Self:
+        return self
+
+    def __exit__(self, *exc_info: tp.Any) -> None:
+        self.close()
+
+    def _writes_queued(self) -> None:
+        try:
+            while (record := self._queue.get()) is not None:
+                self._append(record)
+                self.n_written += 1
+                # Flush once the queue is drained, so that readers see whole records.
+                if self._queue.empty() and self._file is not None:
+                    self._file.flush()
+        finally:
+            if self._file is not None:
+                self._file.close()
+
+    def _append(self, record: bytes) -> None:
+        if self._file is not None and self._file.tell() + len(record) > self.max_file_size:
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            self._index += 1
+            path = os.path.join(self.directory, f"{self.prefix}-{self._index:06d}{REPLAY_SUFFIX}")
+            self._file = open(path, "wb")
+            self._file.write(_FILE_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION))
+        self._file.write(record)
+
+
+class ReplayReader:
+    """
+    Iterate over the replays of files, memory-mapped one at a time. The views
+    yielded are only valid until the reader moves to the next file: `load`
+    the ones to keep.
+    """
+    def __init__(self, *paths: str | os.PathLike) -> None:
+        """
+        Parameters
+        ----------
+        *paths: str | PathLike
+            Replay files, or directories whose replay files are all read.
+        """
+        self.paths: list[str] = []
+        for path in paths:
+            if os.path.isdir(path):
+                self.paths.extend(
+                    os.path.join(path, name) for name in sorted(os.listdir(path))
+                    if name.endswith(REPLAY_SUFFIX)
+                )
+            else:
+                self.paths.append(os.fspath(path))
+
+    def __iter__(self) -> tp.Iterator[ReplayView]:
+        for path in self.paths:
+            yield from self._reads(path)
+
+    @staticmethod
+    def _reads(path: str) -> tp.Iterator[ReplayView]:
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size <= _FILE_HEADER.size:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                magic, version = _FILE_HEADER.unpack_from(data)
+                if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+                    raise ValueError(
+                        f"{path}: not a replay file of version {REPLAY_VERSION}."
+                    )
+                offset = _FILE_HEADER.size
+                # A record still being written at the end of the file is skipped.
+                while offset + _RECORD.size <= size:
+                    view = ReplayView(data, offset)
+                    if offset + view.size > size:
+                        return
+                    yield view
+                    offset += view.size
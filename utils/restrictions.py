@@ -0,0 +1,179 @@
+"""
+Legality checks of the major cards restrictions, as bitmask operations on card IDs.
+
+Combinations and their equipment are given as masks of card IDs (see
+`utils.bitboard`), so that a legal-move generator can filter many candidate
+attachments without building any card object.
+"""
+
+try:
+    from .data.effects_names import DirectEffects, Restrictions
+    from .data.majors_table import (
+        EFFECT_MASKS, EQUIPMENT_MASK, EXCLUDED_CARDS, EXCLUDED_EQUIPMENT
+    )
+    from .combinations import Combination, classify
+except ImportError:
+    from data.effects_names import DirectEffects, Restrictions
+    from data.majors_table import (
+        EFFECT_MASKS, EQUIPMENT_MASK, EXCLUDED_CARDS, EXCLUDED_EQUIPMENT
+    )
+    from combinations import Combination, classify
+
+
+NOT_ALONE_MASK = EFFECT_MASKS[Restrictions.NOT_ALONE]
+"""Equipment cards that can only be attached to a combination being played."""
+
+IMMUTABLE_MASK = EFFECT_MASKS[Restrictions.IMMUTABLE]
+"""Equipment cards preventing a combination from being completed."""
+
+PROTECTOR_MASK = EFFECT_MASKS[DirectEffects.PROTECTOR]
+"""Equipment cards protecting a combination against negative effects."""
+
+POPE_COUNTERED_MASK = EFFECT_MASKS[Restrictions.POPE_COUNTERED]
+"""Cards whose effects cannot target a protected combination."""
+
+SACRIFICE_MASK = EFFECT_MASKS[Restrictions.SACRIFICE]
+"""Cards needing another combination of the player to be discarded."""
+
+DOUBLE_PLAY_LOCK_MASK = EFFECT_MASKS[Restrictions.DOUBLE_PLAY_LOCK]
+"""Cards needing the player to have two combinations to play."""
+
+NO_USED_ACTION_MASK = EFFECT_MASKS[Restrictions.NO_USED_ACTION]
+"""Cards needing at least one card in the action cards discard pile."""
+
+JOKER_MASK = EFFECT_MASKS[DirectEffects.JOKER]
+"""Equipment cards replacing the missing card of a combination."""
+
+HYBRID_MASK = EFFECT_MASKS[DirectEffects.HYBRID]
+"""Equipment cards allowing suites mixing two families."""
+
+
+def _fits_joker(combination_mask: int, equipment_mask: int) -> bool:
+    """Whether a combination in play still classifies with one more JOKER attached."""
+    jokers = (equipment_mask & JOKER_MASK).bit_count()
+    return classify(combination_mask, jokers + 1, bool(equipment_mask & HYBRID_MASK)) is not None
+
+
+def can_attach(
+    major_id: int, combination_mask: int, equipment_mask: int, new_combination: bool = False
+) -> bool:
+    """
+    Whether a major card can be attached to a combination.
+
+    Parameters
+    ----------
+
+    major_id: int
+        ID of the major card to attach.
+
+    combination_mask: int
+        Mask of the minor cards of the combination.
+
+    equipment_mask: int
+        Mask of the equipment cards already attached to the combination.
+
+    new_combination: bool
+        Whether the combination is being played, rather than already in play.
+        Defaults to False.
+
+    Returns
+    -------
+
+    bool
+        False if the card is not an equipment card, is already attached, or if
+        a restriction of the card forbids it (figures in the combination,
+        incompatible equipment, attachment to a combination already in play).
+        A JOKER is only attached to a combination in play with a missing card
+        for it to replace; combinations being played are classified with all
+        their equipment once attached.
+    """
+    bit = 1 << major_id
+    return bool(
+        EQUIPMENT_MASK & bit
+        and not equipment_mask & bit
+        and not combination_mask & EXCLUDED_CARDS[major_id]
+        and not equipment_mask & EXCLUDED_EQUIPMENT[major_id]
+        and (new_combination or not NOT_ALONE_MASK & bit)
+        and (
+            new_combination or not JOKER_MASK & bit
+            or _fits_joker(combination_mask, equipment_mask)
+        )
+    )
+
+
+def attachable_majors(
+    majors_mask: int, combination_mask: int, equipment_mask: int, new_combination: bool = False
+) -> int:
+    """Mask of the major cards of `majors_mask` that can be attached to a combination."""
+    attachable = 0
+    candidates = majors_mask & EQUIPMENT_MASK & ~equipment_mask
+    if not new_combination:
+        candidates &= ~NOT_ALONE_MASK
+    while candidates:
+        low_bit = candidates & -candidates
+        major_id = low_bit.bit_length() - 1
+        if not (
+            combination_mask & EXCLUDED_CARDS[major_id]
+            or equipment_mask & EXCLUDED_EQUIPMENT[major_id]
+            or not new_combination and JOKER_MASK & low_bit
+            and not _fits_joker(combination_mask, equipment_mask)
+        ):
+            attachable |= low_bit
+        candidates ^= low_bit
+    return attachable
+
+
+def can_extend(equipment_mask: int) -> bool:
+    """Whether a combination with given equipment can still be completed."""
+    return not equipment_mask & IMMUTABLE_MASK
+
+
+def can_target(major_id: int, equipment_mask: int) -> bool:
+    """Whether the effects of a major card can target a combination with given equipment."""
+    return not (POPE_COUNTERED_MASK >> major_id & 1 and equipment_mask & PROTECTOR_MASK)
+
+
+def can_reveal(
+    major_id: int,
+    playable_combinations: list[Combination],
+    n_combinations: int,
+    action_discard_mask: int
+) -> bool:
+    """
+    Whether the restrictions of a major card allow revealing it.
+
+    Parameters
+    ----------
+
+    major_id: int
+        ID of the major card to reveal.
+
+    playable_combinations: list[Combination]
+        Combinations the player can play with their hand.
+
+    n_combinations: int
+        Number of combinations of the player already in play.
+
+    action_discard_mask: int
+        Mask of the action cards discard pile.
+
+    Returns
+    -------
+
+    bool
+        False if the card needs two disjoint combinations to play (DOUBLE_PLAY_LOCK),
+        a used action card (NO_USED_ACTION) or a combination to sacrifice next to
+        the one it equips (SACRIFICE), and the player does not have them.
+    """
+    bit = 1 << major_id
+    if NO_USED_ACTION_MASK & bit and not action_discard_mask:
+        return False
+    if SACRIFICE_MASK & bit and n_combinations < 2:
+        return False
+    if DOUBLE_PLAY_LOCK_MASK & bit:
+        return any(
+            not first.mask & second.mask
+            for idx, first in enumerate(playable_combinations)
+            for second in playable_combinations[idx + 1:]
+        )
+    return True
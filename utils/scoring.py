@@ -0,0 +1,178 @@
+"""
+Score calculation: raw score values of the cards of each combination, modified
+by the effects of the major cards attached to it, kept up to date incrementally.
+"""
+
+import functools
+import typing as tp
+
+try:
+    from .data.cards_table import CARD_SCORES, CARD_RANKS
+    from .data.effects_names import DirectEffects, Restrictions
+    from .data.base import EffectNames
+    from .combinations import Combination, CombinationKind
+except ImportError:
+    from data.cards_table import CARD_SCORES, CARD_RANKS
+    from data.effects_names import DirectEffects, Restrictions
+    from data.base import EffectNames
+    from combinations import Combination, CombinationKind
+
+
+OUTLIER_CARD_VALUE = 10
+"""Value of each card of a combination equipped with L'Impératrice (OUTLIER)."""
+
+
+def _joker_value(combination: Combination) -> int:
+    """Raw score value of the missing card replaced by a joker."""
+    if not combination.jokers:
+        return 0
+    if combination.kind is CombinationKind.SAME_FACE:
+        return combination.low + 1
+    held_ranks = 0
+    mask = combination.mask
+    while mask:
+        low_bit = mask & -mask
+        held_ranks |= 1 << CARD_RANKS[low_bit.bit_length() - 1]
+        mask ^= low_bit
+    for rank in range(combination.low, combination.high + 1):
+        if not held_ranks >> rank & 1:
+            return rank + 1
+    return 0
+
+
+@functools.lru_cache(maxsize=8192)
+def combination_score(combination: Combination, modifiers: tuple[EffectNames, ...] = ()) -> int:
+    """
+    Points scored by a combination. Results are cached, so that scoring the same
+    combination again costs a dict lookup.
+
+    Parameters
+    ----------
+
+    combination: Combination
+        The combination to score.
+
+    modifiers: tuple[EffectNames, ...]
+        Effects of the major cards attached to the combination, one entry per
+        attached card effect. Order does not matter.
+
+    Returns
+    -------
+
+    int
+        Raw score values of the cards (missing cards replaced by a joker included)
+        with OUTLIER, DOUBLE_SCORE and VALUE_LOSS effects applied.
+    """
+    if DirectEffects.OUTLIER in modifiers:
+        points = OUTLIER_CARD_VALUE * combination.size
+    else:
+        points = _joker_value(combination)
+        mask = combination.mask
+        while mask:
+            low_bit = mask & -mask
+            points += CARD_SCORES[low_bit.bit_length() - 1]
+            mask ^= low_bit
+
+    for modifier in modifiers:
+        if modifier is DirectEffects.DOUBLE_SCORE:
+            points *= 2
+        elif modifier is Restrictions.VALUE_LOSS:
+            points //= 2
+
+    return points
+
+
+class ScoreSheet:
+    """
+    Running score of one player, updated as their combinations change instead
+    of being recomputed from scratch.
+
+    Entries are aligned with the player's combinations: entry `idx` is the
+    subtotal of combination `idx`.
+
+    Attributes
+    ----------
+
+    subtotals: list[int]
+        Points of each combination, 0 for cancelled ones.
+
+    protected: list[bool]
+        Whether each combination is protected (PROTECTOR) against negative effects,
+        Death included.
+
+    bonus: int
+        Points earned outside combinations, e.g. by permanent cards. Never
+        cancelled by Death.
+    """
+    __slots__ = ("subtotals", "protected", "cancelled", "total", "protected_total", "bonus")
+
+    def __init__(self) -> None:
+        self.subtotals: list[int] = []
+        self.protected: list[bool] = []
+        self.cancelled: list[bool] = []
+        self.total = 0
+        self.protected_total = 0
+        self.bonus = 0
+
+    def score(self, has_death: bool = False) -> int:
+        """
+        Current score. If the player holds Death, only protected combinations
+        and bonuses count.
+        """
+        if has_death:
+            return self.protected_total + self.bonus
+        return self.total + self.bonus
+
+    def _apply(self, idx: int, sign: int) -> None:
+        self.total += sign * self.subtotals[idx]
+        if self.protected[idx]:
+            self.protected_total += sign * self.subtotals[idx]
+
+    def add(self, combination: Combination, modifiers: tuple[EffectNames, ...] = ()) -> int:
+        """Record a new combination and return its index."""
+        self.subtotals.append(combination_score(combination, modifiers))
+        self.protected.append(DirectEffects.PROTECTOR in modifiers)
+        self.cancelled.append(False)
+        self._apply(len(self.subtotals) - 1, 1)
+        return len(self.subtotals) - 1
+
+    def update(
+        self, idx: int, combination: Combination, modifiers: tuple[EffectNames, ...] = ()
+    ) -> None:
+        """Record a combination that was completed or whose attached cards changed."""
+        self._apply(idx, -1)
+        self.protected[idx] = DirectEffects.PROTECTOR in modifiers
+        self.subtotals[idx] = 0 if self.cancelled[idx] else combination_score(combination, modifiers)
+        self._apply(idx, 1)
+
+    def remove(self, idx: int) -> int:
+        """Forget a combination that left the player (stolen, discarded) and return its points."""
+        self._apply(idx, -1)
+        self.protected.pop(idx)
+        self.cancelled.pop(idx)
+        return self.subtotals.pop(idx)
+
+    def cancel(self, idx: int) -> None:
+        """Cancel the value of a combination: it scores 0 until removed."""
+        self._apply(idx, -1)
+        self.cancelled[idx] = True
+        self.subtotals[idx] = 0
+
+    def copy(self) -> "ScoreSheet":
+        """Independent copy of the sheet, e.g. to put it back after undoing changes."""
+        sheet = ScoreSheet()
+        sheet.subtotals = self.subtotals.copy()
+        sheet.protected = self.protected.copy()
+        sheet.cancelled = self.cancelled.copy()
+        sheet.total, sheet.protected_total, sheet.bonus = (
+            self.total, self.protected_total, self.bonus
+        )
+        return sheet
+
+    def recompute(
+        self, combinations: tp.Iterable[tuple[Combination, tuple[EffectNames, ...]]]
+    ) -> None:
+        """Rebuild the sheet from scratch, e.g. after restoring a saved state."""
+        self.__init__()
+        for combination, modifiers in combinations:
+            self.add(combination, modifiers)
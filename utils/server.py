@@ -0,0 +1,415 @@
+"""
+Asyncio game server hosting many tables at once on local TCP or Unix sockets.
+
+Each table is a task playing one `Game`. Human seats play through a connection
+through an `AsyncSocketAdapter` and take their decisions one by one (see
+`movegen.turn_steps`): the table waits for their answer without blocking the
+other tables. Bot seats play their whole
+turn with their policy, inline in the event loop or in a `BotPool` of workers
+bounded by a deadline per turn.
+
+Clients talk in JSON lines. Requests (`op`):
+
+- `join`: {"op": "join", "name": str, "table": int?, "players": int?,
+  "humans": int?, "seed": int?} takes a free human seat of the table `table`,
+  of any table waiting for players, or of a new table of `players` seats among
+  which `humans` human seats. The game starts once every human seat is taken.
+- `act`: {"op": "act", "action": int} answers the last decision with the index
+  of the chosen action.
+- `stats`: {"op": "stats"} asks for the server statistics.
+
+Events sent by the server (`event`): `joined` (table and seat), `decision`
+(decision point, view of the table and descriptions of the legal actions),
+`turn` (end of each turn), `over` (result), `stats` and `error`.
+
+A human leaving the game is replaced by a bot. The server measures the latency
+of each action, from the reception of a human answer to the next message it
+sends to the table, and of each bot turn.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import typing as tp
+
+from collections import deque
+
+try:
+    from .data.base import check_num_value
+    from .engine import Game, DEFAULT_MAX_TURNS
+    from .policies import Policy, PassivePolicy, GreedyPolicy
+    from .zobrist import MAX_PLAYERS
+    from .movegen import MoveGenerator
+    from .io_adapters import AsyncSocketAdapter, async_human_turn
+    from .bot_pool import BotPool, DEFAULT_DEADLINE
+except ImportError:
+    from data.base import check_num_value
+    from engine import Game, DEFAULT_MAX_TURNS
+    from policies import Policy, PassivePolicy, GreedyPolicy
+    from zobrist import MAX_PLAYERS
+    from movegen import MoveGenerator
+    from io_adapters import AsyncSocketAdapter, async_human_turn
+    from bot_pool import BotPool, DEFAULT_DEADLINE
+
+
+DEFAULT_PORT = 8765
+"""Default TCP port of the server."""
+
+DEFAULT_N_PLAYERS = 3
+"""Default number of seats of a new table."""
+
+class LatencyStats:
+    """
+    Durations of the last actions, to report their distribution.
+
+    Attributes
+    ----------
+
+    count: int
+        Number of durations recorded since the start.
+    """
+    def __init__(self, window: int = 10_000) -> None:
+        """
+        Parameters
+        ----------
+        window: int
+            Number of most recent durations kept. Defaults to 10000.
+        """
+        check_num_value(window, "window", ">", 0)
+        self.count = 0
+        self._durations: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Record the duration of one action."""
+        self.count += 1
+        self._durations.append(seconds)
+
+    def percentile(self, percent: float) -> float:
+        """Duration under which `percent` % of the recent actions took, 0 if none."""
+        if not self._durations:
+            return 0.
+        durations = sorted(self._durations)
+        return durations[min(len(durations) - 1, int(len(durations) * percent / 100))]
+
+    def summary(self) -> dict[str, float]:
+        """Count, mean, median and 99th percentile of the recent durations, in milliseconds."""
+        recent = len(self._durations)
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * sum(self._durations) / recent if recent else 0.,
+            "p50_ms": 1000 * self.percentile(50),
+            "p99_ms": 1000 * self.percentile(99),
+        }
+
+
+class Table:
+    """
+    One game of the server.
+
+    Attributes
+    ----------
+
+    table_id: int
+        Identifier of the table.
+
+    n_players, n_humans: int
+        Number of seats and of human seats, the first ones.
+
+    seats: dict[int, AsyncSocketAdapter]
+        Human seats taken, by seat index.
+
+    game: Game | None
+        Game of the table, None until every human seat is taken.
+    """
+    def __init__(
+        self,
+        server: "GameServer",
+        table_id: int,
+        n_players: int,
+        n_humans: int,
+        seed: int | None = None
+    ) -> None:
+        check_num_value(n_players, "n_players", ">=", 2)
+        check_num_value(n_players, "n_players", "<=", MAX_PLAYERS)
+        check_num_value(n_humans, "n_humans", ">=", 1)
+        check_num_value(n_humans, "n_humans", "<=", n_players)
+        self.server = server
+        self.table_id = table_id
+        self.n_players = n_players
+        self.n_humans = n_humans
+        self.seed = seed
+        self.seats: dict[int, AsyncSocketAdapter] = {}
+        self.game: Game | None = None
+        self._full = asyncio.Event()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether human seats are still free."""
+        return len(self.seats) < self.n_humans
+
+    def sits(self, seat: AsyncSocketAdapter) -> int:
+        """Give the next free human seat to `seat` and return its index."""
+        idx = len(self.seats)
+        self.seats[idx] = seat
+        if not self.is_open:
+            self._full.set()
+        return idx
+
+    def broadcast(self, message: dict[str, tp.Any]) -> None:
+        """Send a message to every human seat."""
+        for seat in self.seats.values():
+            seat.sends(message)
+
+    async def run(self) -> None:
+        """Wait for the players, then play the game to its end."""
+        await self._full.wait()
+        policies = [
+            PassivePolicy() if idx < self.n_humans else self.server.bot_factory()
+            for idx in range(self.n_players)
+        ]
+        names = [
+            self.seats[idx].name if idx in self.seats else f"Bot {idx + 1}"
+            for idx in range(self.n_players)
+        ]
+        self.game = game = Game(
+            self.server.language, policies, names=names,
+            max_turns=self.server.max_turns, seed=self.seed
+        )
+
+        while not game.is_over():
+            seat = self.seats.get(game.active_player_idx)
+            if seat is None:
+                start = time.perf_counter()
+                await self.server.plays_bot_turn(game)
+                self.server.bot_latency.record(time.perf_counter() - start)
+            else:
+                await self._human_turn(seat)
+            self.broadcast({
+                "event": "turn", "table": self.table_id, "turn": game.turn,
+                "scores": [player.count_score() for player in game.players],
+            })
+
+        result = game.result()
+        self.broadcast({
+            "event": "over", "table": self.table_id, "scores": list(result.scores),
+            "winners": list(result.winners), "truncated": result.truncated,
+        })
+
+    async def _human_turn(self, seat: AsyncSocketAdapter) -> None:
+        idx = self.game.active_player_idx
+        await async_human_turn(self.game, seat, self.server.generator, table=self.table_id)
+        if seat.is_closed:
+            # The player left: a bot plays the seat from now on.
+            del self.seats[idx]
+            self.game.policies[idx] = self.server.bot_factory()
+
+
+class GameServer:
+    """
+    Server of many concurrent tables.
+
+    Attributes
+    ----------
+
+    tables: dict[int, Table]
+        Tables being played or waiting for players, by identifier.
+
+    action_latency: LatencyStats
+        Time from the reception of a human answer to the next message sent.
+
+    bot_latency: LatencyStats
+        Duration of the bot turns.
+    """
+    def __init__(
+        self,
+        language: str = "english",
+        bot_factory: tp.Callable[[], Policy] = GreedyPolicy,
+        bot_pool: BotPool | None = None,
+        max_tables: int = 1000,
+        max_turns: int = DEFAULT_MAX_TURNS
+    ) -> None:
+        """
+        Parameters
+        ----------
+        language: str
+            Language setting for the cards names. Defaults to 'english'.
+
+        bot_factory: Callable[[], Policy]
+            Builds the policy of each bot seat. Defaults to `GreedyPolicy`.
+
+        bot_pool: BotPool, optional
+            Workers the bot turns are played in, within the deadline of the
+            pool. Defaults to playing them inline in the event loop, which is
+            faster for cheap policies.
+
+        max_tables: int
+            Maximum number of tables at once. Defaults to 1000.
+
+        max_turns: int
+            Turn limit of each game. Defaults to `DEFAULT_MAX_TURNS`.
+        """
+        check_num_value(max_tables, "max_tables", ">", 0)
+        self.language = language
+        self.bot_factory = bot_factory
+        self.bot_pool = bot_pool
+        self.max_tables = max_tables
+        self.max_turns = max_turns
+        self.generator = MoveGenerator()
+        self.tables: dict[int, Table] = {}
+        self.action_latency = LatencyStats()
+        self.bot_latency = LatencyStats()
+        self._table_ids = itertools.count(1)
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def n_tables(self) -> int:
+        """Number of tables being played or waiting for players."""
+        return len(self.tables)
+
+    def stats(self) -> dict[str, tp.Any]:
+        """Number of tables and latencies of the actions."""
+        return {
+            "tables": self.n_tables,
+            "open_tables": sum(table.is_open for table in self.tables.values()),
+            "actions": self.action_latency.summary(),
+            "bot_turns": self.bot_latency.summary(),
+            "late_bot_turns": self.bot_pool.n_late if self.bot_pool is not None else 0,
+        }
+
+    async def plays_bot_turn(self, game: Game) -> None:
+        """Play the turn of the active bot of `game`, inline or in the bot pool."""
+        if self.bot_pool is None:
+            game.play_turn()
+        else:
+            await self.bot_pool.plays_turn(game)
+
+    # ===== Tables =====
+    def opens_table(self, n_players: int, n_humans: int, seed: int | None = None) -> Table:
+        """Create a table and start its task."""
+        if self.n_tables >= self.max_tables:
+            raise ValueError(f"The server already holds {self.max_tables} tables.")
+        table = Table(self, next(self._table_ids), n_players, n_humans, seed)
+        self.tables[table.table_id] = table
+        task = asyncio.create_task(self._plays(table))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return table
+
+    async def _plays(self, table: Table) -> None:
+        try:
+            await table.run()
+        finally:
+            del self.tables[table.table_id]
+
+    def _table_for(self, request: dict[str, tp.Any]) -> Table:
+        """Table a `join` request sits at."""
+        if "table" in request:
+            table = self.tables.get(request["table"])
+            if table is None or not table.is_open:
+                raise ValueError(f"No free seat at table {request['table']}.")
+            return table
+        if "players" not in request and "humans" not in request:
+            for table in self.tables.values():
+                if table.is_open:
+                    return table
+        return self.opens_table(
+            int(request.get("players", DEFAULT_N_PLAYERS)),
+            int(request.get("humans", 1)),
+            request.get("seed")
+        )
+
+    # ===== Connections =====
+    async def handles(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection until it closes."""
+        seat = None
+        try:
+            async for line in reader:
+                try:
+                    request = json.loads(line)
+                    op = request.get("op")
+                    if op == "join" and seat is None:
+                        seat = AsyncSocketAdapter(
+                            str(request.get("name", "Player")), writer, self.action_latency
+                        )
+                        table = self._table_for(request)
+                        idx = table.sits(seat)
+                        seat.sends({"event": "joined", "table": table.table_id, "seat": idx})
+                    elif op == "act" and seat is not None:
+                        seat.receives(int(request["action"]))
+                    elif op == "stats":
+                        response = {"event": "stats", **self.stats()}
+                        writer.write(json.dumps(response).encode() + b"\n")
+                    else:
+                        raise ValueError(f"Unexpected request {op!r}.")
+                except (ValueError, KeyError, TypeError) as error:
+                    writer.write(json.dumps({"event": "error", "message": str(error)}).encode() + b"\n")
+                await writer.drain()
+        except OSError:
+            pass
+        finally:
+            if seat is not None:
+                seat.closes()
+            writer.close()
+
+    async def serve(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        path: str | None = None,
+        backlog: int = 1024
+    ) -> asyncio.Server:
+        """
+        Start listening, on a Unix socket if `path` is given, else on TCP, with
+        room for `backlog` connections waiting to be accepted.
+
+        Returns
+        -------
+
+        asyncio.Server
+            Listening server, to be closed by the caller.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handles, path=path, backlog=backlog)
+        return await asyncio.start_server(self.handles, host, port, backlog=backlog)
+
+    async def reports(self, interval: float) -> None:
+        """Print the statistics of the server every `interval` seconds, forever."""
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            print(
+                f"{stats['tables']} tables ({stats['open_tables']} waiting for players), "
+                f"action latency p50 {stats['actions']['p50_ms']:.2f}ms "
+                f"p99 {stats['actions']['p99_ms']:.2f}ms, "
+                f"bot turn p99 {stats['bot_turns']['p99_ms']:.2f}ms."
+            )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    pool = None
+    if args.bot_workers:
+        pool = BotPool(args.bot_workers, args.bot_processes, deadline=args.bot_deadline)
+    server = GameServer(args.language, bot_pool=pool, max_tables=args.max_tables)
+    listening = await server.serve(args.host, args.port, args.unix)
+    async with listening:
+        await asyncio.gather(listening.serve_forever(), server.reports(args.report_interval))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host divine-battle tables.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="Path of a Unix socket to listen on instead.")
+    parser.add_argument("--language", default="english")
+    parser.add_argument("--max-tables", type=int, default=1000)
+    parser.add_argument("--bot-workers", type=int, default=0, help="0 plays bots inline.")
+    parser.add_argument(
+        "--bot-processes", action="store_true", help="Think in processes rather than threads."
+    )
+    parser.add_argument(
+        "--bot-deadline", type=float, default=DEFAULT_DEADLINE, help="Seconds per bot turn."
+    )
+    parser.add_argument("--report-interval", type=float, default=10.)
+    asyncio.run(_main(parser.parse_args()))
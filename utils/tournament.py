@@ -0,0 +1,252 @@
+"""
+Monte Carlo tournaments: spread many headless games over a pool of processes
+and gather statistics per seat and per policy.
+"""
+
+import hashlib
+import os
+import random as rdm
+import time
+import typing as tp
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+try:
+    from .data.base import check_num_value
+    from .engine import GameResult, simulate, DEFAULT_MAX_TURNS
+    from .policies import Policy, GreedyPolicy, RandomPolicy
+except ImportError:
+    from data.base import check_num_value
+    from engine import GameResult, simulate, DEFAULT_MAX_TURNS
+    from policies import Policy, GreedyPolicy, RandomPolicy
+
+
+DEFAULT_CHUNK_SIZE = 100
+"""Number of games played by a worker in one go."""
+
+
+@dataclass
+class PlayerStats:
+    """
+    Statistics gathered over several games for one seat or one policy.
+
+    Attributes
+    ----------
+
+    n_games: int
+        Number of games played.
+
+    wins: float
+        Number of games won. A game won ex aequo by k players counts as 1/k win.
+
+    scores: Counter[int]
+        Number of games ended with each final score.
+    """
+    n_games: int = 0
+    wins: float = 0.
+    scores: Counter[int] = field(default_factory=Counter)
+
+    @property
+    def win_rate(self) -> float:
+        """Fraction of games won."""
+        return self.wins / self.n_games if self.n_games else 0.
+
+    @property
+    def mean_score(self) -> float:
+        """Average final score."""
+        if not self.n_games:
+            return 0.
+        return sum(score * count for score, count in self.scores.items()) / self.n_games
+
+    def add(self, score: int, win_share: float) -> None:
+        """Record the outcome of one game."""
+        self.n_games += 1
+        self.wins += win_share
+        self.scores[score] += 1
+
+    def merge(self, other: tp.Self) -> None:
+        """Add statistics of `other` to these ones."""
+        self.n_games += other.n_games
+        self.wins += other.wins
+        self.scores.update(other.scores)
+
+
+@dataclass
+class TournamentReport:
+    """
+    Aggregated results of a tournament.
+
+    Attributes
+    ----------
+
+    seats: list[PlayerStats]
+        Statistics of each seat, in seat order.
+
+    policies: dict[str, PlayerStats]
+        Statistics of each policy (by class name), over all the seats it played.
+
+    game_lengths: Counter[int]
+        Number of games ended after each number of turns.
+
+    n_truncated: int
+        Number of games stopped by the turn limit.
+
+    elapsed: float
+        Wall-clock time of the whole tournament, in seconds.
+    """
+    seats: list[PlayerStats]
+    policies: dict[str, PlayerStats]
+    game_lengths: Counter[int] = field(default_factory=Counter)
+    n_truncated: int = 0
+    elapsed: float = 0.
+
+    @property
+    def n_games(self) -> int:
+        """Number of games played."""
+        return sum(self.game_lengths.values())
+
+    @property
+    def mean_game_length(self) -> float:
+        """Average number of turns per game."""
+        if not self.n_games:
+            return 0.
+        return sum(n * count for n, count in self.game_lengths.items()) / self.n_games
+
+    @property
+    def games_per_second(self) -> float:
+        """Tournament throughput, all workers included."""
+        return self.n_games / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def merge(self, other: tp.Self) -> None:
+        """Add results of `other` to this report (elapsed times are not summed)."""
+        for seat, other_seat in zip(self.seats, other.seats):
+            seat.merge(other_seat)
+        for name, other_stats in other.policies.items():
+            self.policies.setdefault(name, PlayerStats()).merge(other_stats)
+        self.game_lengths.update(other.game_lengths)
+        self.n_truncated += other.n_truncated
+
+
+def chunk_seed(seed: int, chunk_idx: int) -> int:
+    """
+    Derive the seed of a chunk of games from the tournament seed. Derived seeds
+    are hashes, so chunks get independent random streams, and they do not depend
+    on which worker plays the chunk, so tournaments are reproducible.
+    """
+    digest = hashlib.sha256(f"{seed}:{chunk_idx}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def _new_report(policies: tp.Sequence[Policy]) -> TournamentReport:
+    return TournamentReport(
+        seats=[PlayerStats() for _ in policies],
+        policies={type(policy).__name__: PlayerStats() for policy in policies}
+    )
+
+
+def _record(report: TournamentReport, policies: tp.Sequence[Policy], result: GameResult) -> None:
+    win_share = 1 / len(result.winners)
+    for idx, (policy, score) in enumerate(zip(policies, result.scores)):
+        share = win_share if idx in result.winners else 0.
+        report.seats[idx].add(score, share)
+        report.policies[type(policy).__name__].add(score, share)
+    report.game_lengths[result.n_turns] += 1
+    report.n_truncated += result.truncated
+
+
+def _play_chunk(
+    args: tuple[int, int, str, tuple[Policy, ...], int]
+) -> TournamentReport:
+    """Worker task: play a chunk of games with its own seed and summarize them."""
+    n_games, seed, language, policies, max_turns = args
+    chunk_rng = rdm.Random(seed)
+    for policy in policies:
+        policy.reseed(chunk_rng.getrandbits(64))
+
+    report = _new_report(policies)
+    games_seed = chunk_rng.getrandbits(64)
+    for result in simulate(n_games, language, policies, max_turns, games_seed).results:
+        _record(report, policies, result)
+
+    return report
+
+
+def run_tournament(
+    n_games: int,
+    language: str,
+    policies: tp.Sequence[Policy],
+    seed: int = 0,
+    n_workers: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_turns: int = DEFAULT_MAX_TURNS
+) -> TournamentReport:
+    """
+    Play given number of headless games over a pool of processes.
+
+    Parameters
+    ----------
+
+    n_games: int
+        Total number of games to play.
+
+    language: str
+        Language setting for the cards names.
+
+    policies: Sequence[Policy]
+        One policy per seat, in seat order. Policies must be picklable.
+
+    seed: int
+        Seed of the tournament. Same seed and chunk size give the same results,
+        whatever the number of workers. Defaults to 0.
+
+    n_workers: int, optional
+        Number of processes. Defaults to the number of CPUs.
+
+    chunk_size: int
+        Number of games sent to a worker at once. Defaults to `DEFAULT_CHUNK_SIZE`.
+
+    max_turns: int
+        Turn limit of each game. Defaults to `DEFAULT_MAX_TURNS`.
+
+    Returns
+    -------
+
+    TournamentReport
+        Win rates, score distributions and game lengths per seat and per policy.
+    """
+    check_num_value(n_games, "n_games", ">=", 0)
+    check_num_value(chunk_size, "chunk_size", ">", 0)
+
+    policies = tuple(policies)
+    tasks = [
+        (min(chunk_size, n_games - start), chunk_seed(seed, idx), language, policies, max_turns)
+        for idx, start in enumerate(range(0, n_games, chunk_size))
+    ]
+
+    report = _new_report(policies)
+    start_time = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=n_workers or os.cpu_count()) as executor:
+        for chunk_report in executor.map(_play_chunk, tasks):
+            report.merge(chunk_report)
+
+    report.elapsed = time.perf_counter() - start_time
+
+    return report
+
+
+if __name__ == "__main__":
+    tournament = run_tournament(
+        2_000, "english", [RandomPolicy(), GreedyPolicy(), RandomPolicy(), GreedyPolicy()]
+    )
+    print(
+        f"{tournament.n_games} games played in {tournament.elapsed:.2f}s "
+        f"({tournament.games_per_second:.1f} games/s), "
+        f"{tournament.mean_game_length:.1f} turns per game on average."
+    )
+    for seat_idx, stats in enumerate(tournament.seats, start=1):
+        print(f"Seat {seat_idx}: win rate {stats.win_rate:.3f}, mean score {stats.mean_score:.2f}")
+    for policy_name, stats in tournament.policies.items():
+        print(f"{policy_name}: win rate {stats.win_rate:.3f}, mean score {stats.mean_score:.2f}")
@@ -0,0 +1,314 @@
+"""
+Zobrist hashing of game states, and a bounded transposition table to cache
+search results by state hash.
+
+The hash of a state is the XOR of one random 64-bit key per (card, zone) pair,
+plus keys for the active player, the phase, the per-turn flags and effects of
+the players, their score bonuses and their cancelled combinations. Moving a card
+is then two XORs: `Game` keeps the hash of its state up to date move by move,
+each move XORing the keys it changes (see `Move.hash_delta`), and undoing a move
+XORs the same delta again.
+
+The hash sees every zone as a set: the order of the draw
+piles, of the hands and of the major piles is not part of it, nor is the turn
+counter. Within one deal, the order of a draw pile follows from the cards left
+in it, and the order of a hand only changes which card a random steal picks.
+
+Keys are drawn from a generator with a fixed seed, so that hashes are the same
+in every process and can be stored or shared between workers.
+"""
+
+import random as rdm
+import typing as tp
+
+from dataclasses import dataclass
+from enum import IntEnum
+
+try:
+    from .data.base import check_num_value
+    from .data.cards_table import N_CARDS
+    from .data.effects_names import EffectNamesPack, EffectNames
+except ImportError:
+    from data.base import check_num_value
+    from data.cards_table import N_CARDS
+    from data.effects_names import EffectNamesPack, EffectNames
+
+if tp.TYPE_CHECKING:
+    from .engine import Game
+    from .player import Player
+
+
+ZOBRIST_SEED = 0x5EED_D1B1
+"""Seed of the generator the keys are drawn from."""
+
+MAX_PLAYERS = 6
+"""Maximum number of players of a game."""
+
+MAX_COMBINATIONS = 24
+"""Number of combination slots keyed per player, more than any game can fill."""
+
+
+class HashZone(IntEnum):
+    """
+    Zones a card can be in, relative to their owner for player zones. Combination
+    `idx` of a player is zone `COMBINATION + idx`, its equipment `EQUIPMENT + idx`.
+    """
+    HAND = 0
+    MAJOR_PILE = 1
+    ACTIVE_PERMANENTS = 2
+    INACTIVE_PERMANENTS = 3
+    COMBINATION = 4
+    EQUIPMENT = 4 + MAX_COMBINATIONS
+
+
+N_SEAT_ZONES = HashZone.EQUIPMENT + MAX_COMBINATIONS
+"""Number of zones owned by each player."""
+
+MINOR_DRAW_ZONE = MAX_PLAYERS * N_SEAT_ZONES
+"""Zone index of the minor cards draw pile."""
+
+MAJOR_DRAW_ZONE = MINOR_DRAW_ZONE + 1
+"""Zone index of the major cards draw pile."""
+
+MINOR_DISCARD_ZONE = MINOR_DRAW_ZONE + 2
+"""Zone index of the minor cards discard pile."""
+
+ACTION_DISCARD_ZONE = MINOR_DRAW_ZONE + 3
+"""Zone index of the action cards discard pile."""
+
+_N_ZONES = MINOR_DRAW_ZONE + 4
+
+_EFFECTS: tuple[EffectNames, ...] = tuple(
+    effect for effect_type in EffectNamesPack().effects_types for effect in effect_type
+)
+
+_rng = rdm.Random(ZOBRIST_SEED)
+_CARD_KEYS: tuple[int, ...] = tuple(_rng.getrandbits(64) for _ in range(_N_ZONES * N_CARDS))
+_ACTIVE_KEYS: tuple[int, ...] = tuple(_rng.getrandbits(64) for _ in range(MAX_PLAYERS))
+_PHASE_KEYS: tuple[int, ...] = tuple(_rng.getrandbits(64) for _ in range(3))
+# Per seat: revealed a major card, played a combination.
+_FLAG_KEYS: tuple[tuple[int, int], ...] = tuple(
+    (_rng.getrandbits(64), _rng.getrandbits(64)) for _ in range(MAX_PLAYERS)
+)
+_EFFECT_KEYS: tuple[dict[EffectNames, int], ...] = tuple(
+    {effect: _rng.getrandbits(64) for effect in _EFFECTS} for _ in range(MAX_PLAYERS)
+)
+_CANCELLED_KEYS: tuple[tuple[int, ...], ...] = tuple(
+    tuple(_rng.getrandbits(64) for _ in range(MAX_COMBINATIONS)) for _ in range(MAX_PLAYERS)
+)
+_BONUS_KEYS: tuple[int, ...] = tuple(_rng.getrandbits(64) | 1 for _ in range(MAX_PLAYERS))
+del _rng
+
+_MASK_64 = (1 << 64) - 1
+
+
+def zone_of(seat: int, zone: int) -> int:
+    """Zone index of the zone `zone` (`HashZone`) of player `seat`."""
+    return seat * N_SEAT_ZONES + zone
+
+
+def card_key(card_id: int, zone: int) -> int:
+    """Key of the card `card_id` lying in zone `zone` (a zone index)."""
+    return _CARD_KEYS[zone * N_CARDS + card_id]
+
+
+def cards_key(cards: tp.Iterable, zone: int) -> int:
+    """XOR of the keys of given cards lying in zone `zone`."""
+    offset = zone * N_CARDS
+    key = 0
+    for card in cards:
+        key ^= _CARD_KEYS[offset + card.card_id]
+    return key
+
+
+def moves_key(cards: tp.Iterable, from_zone: int, to_zone: int) -> int:
+    """Change of hash when given cards move from zone `from_zone` to zone `to_zone`."""
+    return cards_key(cards, from_zone) ^ cards_key(cards, to_zone)
+
+
+def turn_key(game: "Game") -> int:
+    """
+    Part of the hash which is not about cards locations: active player, phase,
+    and turn flags and active effects of the players.
+    """
+    key = active_key(game)
+    for seat, player in enumerate(game.players):
+        key ^= seat_turn_key(seat, player)
+    return key
+
+
+def active_key(game: "Game") -> int:
+    """Key of the active player and of the phase of a game."""
+    return _ACTIVE_KEYS[game.active_player_idx] ^ _PHASE_KEYS[int(game.phase)]
+
+
+def seat_turn_key(seat: int, player: "Player") -> int:
+    """Key of the turn flags and active effects of the player `seat`."""
+    flags = _FLAG_KEYS[seat]
+    key = 0
+    if player.has_revealed_major():
+        key ^= flags[0]
+    if player.has_played_combination():
+        key ^= flags[1]
+    if player.active_effects:
+        for effect in set(active.name for active in player.active_effects):
+            key ^= _EFFECT_KEYS[seat][effect]
+    return key
+
+
+def flag_key(seat: int, played_combination: bool) -> int:
+    """Key of the `revealed_major` (False) or `played_combination` (True) flag of a player."""
+    return _FLAG_KEYS[seat][played_combination]
+
+
+def hash_game(game: "Game") -> int:
+    """Zobrist hash of a game, computed from scratch."""
+    key = turn_key(game)
+    key ^= cards_key(game.minor_draw_pile.cards_left, MINOR_DRAW_ZONE)
+    key ^= cards_key(game.major_draw_pile.cards_left, MAJOR_DRAW_ZONE)
+    key ^= cards_key(game.minor_discard, MINOR_DISCARD_ZONE)
+    key ^= cards_key(game.action_discard, ACTION_DISCARD_ZONE)
+    for seat, player in enumerate(game.players):
+        base = seat * N_SEAT_ZONES
+        key ^= cards_key(player.hand, base + HashZone.HAND)
+        key ^= cards_key(player.major_pile, base + HashZone.MAJOR_PILE)
+        key ^= cards_key(player.active_permanents, base + HashZone.ACTIVE_PERMANENTS)
+        key ^= cards_key(player.inactive_permanents, base + HashZone.INACTIVE_PERMANENTS)
+        for idx, (combination, equipment) in enumerate(
+            zip(player.combinations, player.equipments)
+        ):
+            key ^= cards_key(combination, base + HashZone.COMBINATION + idx)
+            key ^= cards_key(equipment, base + HashZone.EQUIPMENT + idx)
+            if player.score_sheet.cancelled[idx]:
+                key ^= _CANCELLED_KEYS[seat][idx]
+        if player.score_sheet.bonus:
+            key ^= _BONUS_KEYS[seat] * player.score_sheet.bonus & _MASK_64
+    return key
+
+
+# ===== Transposition table =====
+class Bound(IntEnum):
+    """How a stored value relates to the true value of a state."""
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+
+@dataclass(frozen=True, slots=True)
+class TableEntry:
+    """
+    Search result stored for a state.
+
+    Attributes
+    ----------
+
+    key: int
+        Hash of the state.
+
+    depth: int
+        Depth the state was searched to. Deeper results are more reliable.
+
+    value: tp.Any
+        Value of the state, e.g. the expected score of each player.
+
+    bound: Bound
+        Whether `value` is exact or a bound of the true value.
+
+    best: tp.Any
+        Best action found from the state, if any.
+
+    generation: int
+        Search generation the entry was stored in.
+    """
+    key: int
+    depth: int
+    value: tp.Any
+    bound: Bound = Bound.EXACT
+    best: tp.Any = None
+    generation: int = 0
+
+
+class TranspositionTable:
+    """
+    Fixed-size cache of search results indexed by state hash, which can be shared
+    by several searches (bots, endgame solver).
+
+    Each hash maps to one slot. A new entry replaces the entry of its slot when
+    it was searched at least as deep, or when the old entry is from an earlier
+    search generation (replace-by-depth with aging).
+
+    Attributes
+    ----------
+
+    size: int
+        Number of slots of the table.
+
+    generation: int
+        Current search generation, see `new_search`.
+
+    hits, misses, stores: int
+        Lookup and store statistics.
+    """
+    def __init__(self, size_log2: int = 18) -> None:
+        """
+        Parameters
+        ----------
+        size_log2: int
+            Base-2 logarithm of the number of slots. Defaults to 18 (262144 slots).
+        """
+        check_num_value(size_log2, "size_log2", ">=", 0)
+        check_num_value(size_log2, "size_log2", "<=", 30)
+        self.size = 1 << size_log2
+        self._mask = self.size - 1
+        self._slots: list[TableEntry | None] = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __len__(self) -> int:
+        return self.size - self._slots.count(None)
+
+    def get(self, key: int) -> TableEntry | None:
+        """Entry stored for the state of hash `key`, None if there is none."""
+        entry = self._slots[key & self._mask]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        value: tp.Any,
+        bound: Bound = Bound.EXACT,
+        best: tp.Any = None
+    ) -> bool:
+        """
+        Store a search result for the state of hash `key`. Returns whether it
+        was stored, i.e. whether it replaced a shallower or older entry.
+        """
+        idx = key & self._mask
+        old = self._slots[idx]
+        if old is not None and old.generation == self.generation and old.depth > depth:
+            return False
+        self._slots[idx] = TableEntry(key, depth, value, bound, best, self.generation)
+        self.stores += 1
+        return True
+
+    def new_search(self) -> None:
+        """Start a new search generation: older entries get replaced first."""
+        self.generation += 1
+
+    def clear(self) -> None:
+        """Remove every entry and reset the statistics."""
+        self._slots = [None] * self.size
+        self.generation = self.hits = self.misses = self.stores = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the lookups which found an entry."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.